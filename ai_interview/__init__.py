@@ -4,16 +4,30 @@
 ai_interview package: 模块化的 AI 面试系统
 
 模块概览：
-- jd: JD 解析器
+- jd: JD 解析器（无状态解析，按内容哈希缓存）
+- jd_store: JD 持久化存储、批量导入与按职位/关键词检索
+- matching: 简历–JD匹配矩阵（稀疏矩阵批量计算匹配分，按JD初筛候选人，确定第三阶段初始难度）
+- keywords: 关键词匹配（Aho-Corasick 单次扫描，大小写不敏感，兼容中英文混排）与共享技术词表
 - stages: 三阶段面试管理器
 - review: 面试复盘与报告
+- report: 面试报告版面（复盘窗口与PDF共用），后台逐页导出PDF
+- report_batch: 批量生成面试报告（PDF/HTML，多进程，输入未变化则跳过）
+- event_log: 面试事件日志（只追加，后台组提交，SQLite 索引，崩溃后补建索引；分析与重评分的数据来源）
+- analytics: 面试数据分析（事件日志增量导出为按日期/岗位分区的 Parquet，能力项、难度分布与题目区分度统计）
 - questions: 题库管理
 - scoring: 评分与难度调整
 - prompting: 动态提示调整
 - voice: 语音录制与TTS解决方案
 - resume: 简历解析
 - ui: 图形界面
+- ui_adapter: 界面适配层（通过三阶段面试管理器出题、评分，后台线程执行）
+- ui_dispatcher: 界面事件分发（后台线程的界面更新合并后交给主线程，无轮询）
+- transcript_view: 有界对话记录控件（旧记录移入磁盘记录文件，按需加载）
 - app: 应用入口
+- llm: 统一的LLM调用入口（模型配置、keep_alive、前缀缓存友好的消息组织）
+- rescoring: 归档回答的离线批量重评分
+- metrics: 运行指标（模型调用延迟、降级命中、缓存命中、抽题次数等），Prometheus 文本格式
+- tracing: 每轮延迟追踪（语音转写、模型调用、评分、选题、播报），导出 JSONL 或 Chrome trace
 """
 
 
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+面试数据分析
+
+把事件日志中已结束的面试导出为按日期和岗位分区的 Parquet 数据集（每题一行），
+分析时只读取需要的列和分区，用 pandas 向量化分组统计，不再逐条解析 JSON：
+- capability_failures()：各能力项的作答数、平均分和未达标比例（题库维护）
+- score_distribution() / score_histogram()：B1/B2/B3 各级别的得分分布（难度校准）
+- question_discrimination()：题库各题的区分度（该题得分与候选人其余题目平均分的相关系数），
+  区分度低的题目不能有效区分能力高低，应修改或下线
+
+导出是增量的：输出目录中的 _export_state.json 记录已导出面试的最后更新时间，之后只导出新结束的面试。
+
+用法：
+    python -m ai_interview.analytics export                 # 数据集目录默认为 Data/analytics，可用 --data 指定
+    python -m ai_interview.analytics capabilities --since 2026-07-01 --track 后端
+    python -m ai_interview.analytics levels
+    python -m ai_interview.analytics discrimination --min-responses 30 --below 0.2
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from .event_log import DEFAULT_LOG_DIR, InterviewEventLog
+
+
+DEFAULT_ANALYTICS_DIR = 'Data/analytics'
+# 以下划线开头，读取数据集时被忽略
+EXPORT_STATE_NAME = '_export_state.json'
+
+SCHEMA = pa.schema([
+    ('interview_id', pa.string()),
+    ('stage', pa.int8()),
+    ('question_number', pa.int16()),
+    ('question_id', pa.string()),
+    ('capability', pa.string()),
+    ('question_type', pa.string()),
+    ('difficulty', pa.string()),
+    ('score', pa.float32()),
+    ('interview_score', pa.float32()),
+    ('response_seconds', pa.float32()),
+    ('processing_seconds', pa.float32()),
+    ('answered_at', pa.timestamp('s')),
+    ('date', pa.string()),
+    ('track', pa.string())
+])
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.string()), ('track', pa.string())]), flavor='hive')
+
+# 导出时每累积这么多行写入一次
+EXPORT_BATCH_ROWS = 200000
+
+# 低于该分数视为该能力项未达标
+FAIL_THRESHOLD = 0.6
+
+
+def _track_name(jd_data: Optional[Dict]) -> str:
+    """岗位分区名（取JD中的职位名称）"""
+    position = (jd_data or {}).get('position') or 'unknown'
+    return re.sub(r'[\\/:*?"<>|=\s]+', '_', str(position)).strip('_') or 'unknown'
+
+
+def export_parquet(event_log: InterviewEventLog, output_dir: str = DEFAULT_ANALYTICS_DIR,
+                   full: bool = False) -> Dict:
+    """
+    把已结束的面试导出为 Parquet 数据集（date=YYYY-MM-DD/track=岗位/ 分区）
+
+    Args:
+        event_log: 面试事件日志
+        output_dir: 数据集目录
+        full: 忽略导出进度，全部重新导出（会清空已有数据集）
+
+    Returns:
+        {'interviews', 'rows', 'elapsed_seconds'}
+    """
+    started = time.time()
+    state_path = os.path.join(output_dir, EXPORT_STATE_NAME)
+    watermark = 0.0
+    if full and os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    elif os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            watermark = json.load(f).get('exported_until', 0.0)
+
+    columns = {field.name: [] for field in SCHEMA}
+    exported, rows, latest = 0, 0, watermark
+    # 每次导出使用新的文件名前缀，增量导出只新增文件
+    prefix = uuid.uuid4().hex[:8]
+    for interview in event_log.interviews(since=watermark):
+        if interview['status'] == 'in_progress' or interview['updated_at'] <= watermark:
+            continue
+        data = event_log.interview_data(interview['interview_id'])
+        if not data:
+            continue
+        assessment = data.get('final_assessment') or {}
+        date = time.strftime('%Y-%m-%d', time.localtime(interview['started_at']))
+        track = _track_name(data['candidate_data'].get('jd_data'))
+        for number, turn in enumerate(data['turns'], 1):
+            columns['interview_id'].append(interview['interview_id'])
+            columns['stage'].append(turn['stage'])
+            columns['question_number'].append(number)
+            columns['question_id'].append(turn.get('question_id'))
+            columns['capability'].append(turn.get('category'))
+            columns['question_type'].append(turn.get('question_type'))
+            columns['difficulty'].append(turn.get('difficulty'))
+            columns['score'].append(turn.get('score'))
+            columns['interview_score'].append(assessment.get('overall_score'))
+            columns['response_seconds'].append(turn.get('response_seconds'))
+            columns['processing_seconds'].append(turn.get('processing_seconds'))
+            columns['answered_at'].append(int(turn.get('answered_at') or turn['time']))
+            columns['date'].append(date)
+            columns['track'].append(track)
+        exported += 1
+        latest = max(latest, interview['updated_at'])
+        if len(columns['interview_id']) >= EXPORT_BATCH_ROWS:
+            rows += _write_batch(columns, output_dir, f"{prefix}-{rows}")
+
+    rows += _write_batch(columns, output_dir, f"{prefix}-{rows}")
+    os.makedirs(output_dir, exist_ok=True)
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump({'exported_until': latest}, f)
+    return {'interviews': exported, 'rows': rows, 'elapsed_seconds': round(time.time() - started, 2)}
+
+
+def _write_batch(columns: Dict[str, List], output_dir: str, prefix: str) -> int:
+    """写入一批行并清空列缓冲，返回行数"""
+    rows = len(columns['interview_id'])
+    if rows:
+        ds.write_dataset(pa.table(columns, schema=SCHEMA), output_dir, format='parquet',
+                         partitioning=PARTITIONING, basename_template=f"part-{prefix}-{{i}}.parquet",
+                         existing_data_behavior='overwrite_or_ignore')
+        for values in columns.values():
+            values.clear()
+    return rows
+
+
+class InterviewAnalytics:
+    """面试数据查询（按分区裁剪，只读取用到的列）"""
+
+    def __init__(self, path: str = DEFAULT_ANALYTICS_DIR, since: Optional[str] = None,
+                 until: Optional[str] = None, tracks: Optional[Sequence[str]] = None):
+        """
+        Args:
+            path: Parquet 数据集目录
+            since: 起始日期（含），YYYY-MM-DD
+            until: 截止日期（含），YYYY-MM-DD
+            tracks: 只统计这些岗位
+        """
+        self.dataset = ds.dataset(path, format='parquet', partitioning=PARTITIONING)
+        self.filter = None
+        conditions = []
+        if since:
+            conditions.append(ds.field('date') >= since)
+        if until:
+            conditions.append(ds.field('date') <= until)
+        if tracks:
+            conditions.append(ds.field('track').isin([_track_name({'position': track}) for track in tracks]))
+        for condition in conditions:
+            self.filter = condition if self.filter is None else self.filter & condition
+
+    def load(self, columns: List[str], stage: Optional[int] = None) -> pd.DataFrame:
+        """读取指定列（可只取某一阶段）"""
+        expression = self.filter
+        if stage is not None:
+            condition = ds.field('stage') == stage
+            expression = condition if expression is None else expression & condition
+        return self.dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+    def capability_failures(self, threshold: float = FAIL_THRESHOLD, min_responses: int = 1) -> pd.DataFrame:
+        """
+        各能力项的未达标情况（第三阶段题库题目）
+
+        Returns:
+            以能力项为索引：responses, mean_score, fail_rate，按未达标比例降序
+        """
+        df = self.load(['capability', 'score'], stage=3).dropna()
+        df['failed'] = df['score'] < threshold
+        result = df.groupby('capability').agg(
+            responses=('score', 'size'), mean_score=('score', 'mean'), fail_rate=('failed', 'mean')
+        )
+        result = result[result['responses'] >= min_responses]
+        return result.sort_values(['fail_rate', 'responses'], ascending=[False, False])
+
+    def score_distribution(self) -> pd.DataFrame:
+        """
+        B1/B2/B3 各级别的得分分布
+
+        Returns:
+            以难度为索引：count, mean, std, p10, p25, p50, p75, p90
+        """
+        df = self.load(['difficulty', 'score'], stage=3).dropna()
+        grouped = df.groupby('difficulty')['score']
+        result = grouped.agg(['count', 'mean', 'std'])
+        quantiles = grouped.quantile([0.1, 0.25, 0.5, 0.75, 0.9]).unstack()
+        quantiles.columns = ['p10', 'p25', 'p50', 'p75', 'p90']
+        return result.join(quantiles)
+
+    def score_histogram(self, bins: int = 10) -> pd.DataFrame:
+        """各级别得分的直方图（行为难度，列为得分区间）"""
+        df = self.load(['difficulty', 'score'], stage=3).dropna()
+        edges = np.linspace(0.0, 1.0, bins + 1)
+        buckets = pd.cut(df['score'].clip(0.0, 1.0), edges, include_lowest=True)
+        return pd.crosstab(df['difficulty'], buckets)
+
+    def question_discrimination(self, min_responses: int = 20) -> pd.DataFrame:
+        """
+        题库各题的区分度
+
+        区分度为该题得分与同一候选人其余各题平均分的相关系数（item-rest correlation），
+        全部由分组求和计算，不逐题循环。
+
+        Returns:
+            以题目编号为索引：capability, difficulty, responses, mean_score, discrimination，按区分度升序
+        """
+        df = self.load(['interview_id', 'question_id', 'capability', 'difficulty', 'score']).dropna(subset=['score'])
+        totals = df.groupby('interview_id')['score'].agg(['sum', 'count'])
+        df = df.join(totals, on='interview_id')
+        df = df[(df['count'] > 1) & df['question_id'].notna()]
+        x = df['score'].to_numpy(dtype=np.float64)
+        y = ((df['sum'] - df['score']) / (df['count'] - 1)).to_numpy(dtype=np.float64)
+        sums = pd.DataFrame({
+            'question_id': df['question_id'].to_numpy(),
+            'x': x, 'y': y, 'xx': x * x, 'yy': y * y, 'xy': x * y
+        }).groupby('question_id').agg(
+            n=('x', 'size'), x=('x', 'sum'), y=('y', 'sum'), xx=('xx', 'sum'), yy=('yy', 'sum'), xy=('xy', 'sum')
+        )
+        n = sums['n']
+        covariance = sums['xy'] - sums['x'] * sums['y'] / n
+        variance_x = sums['xx'] - sums['x'] ** 2 / n
+        variance_y = sums['yy'] - sums['y'] ** 2 / n
+        denominator = np.sqrt((variance_x * variance_y).clip(lower=0))
+        result = pd.DataFrame({
+            'responses': n,
+            'mean_score': sums['x'] / n,
+            'discrimination': (covariance / denominator).where(denominator > 1e-12)
+        })
+        labels = df.drop_duplicates('question_id').set_index('question_id')[['capability', 'difficulty']]
+        result = labels.join(result, how='right')
+        result = result[result['responses'] >= min_responses]
+        return result.sort_values('discrimination', na_position='first')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="面试数据分析")
+    parser.add_argument('--data', default=DEFAULT_ANALYTICS_DIR, help="Parquet 数据集目录")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help="从事件日志导出（增量）")
+    export_parser.add_argument('--log-dir', default=DEFAULT_LOG_DIR, help="事件日志目录")
+    export_parser.add_argument('--full', action='store_true', help="清空后全部重新导出")
+
+    query_options = argparse.ArgumentParser(add_help=False)
+    query_options.add_argument('--since', help="起始日期 YYYY-MM-DD")
+    query_options.add_argument('--until', help="截止日期 YYYY-MM-DD")
+    query_options.add_argument('--track', action='append', help="岗位（可重复）")
+
+    capabilities_parser = commands.add_parser('capabilities', parents=[query_options], help="能力项未达标比例")
+    capabilities_parser.add_argument('--threshold', type=float, default=FAIL_THRESHOLD)
+    capabilities_parser.add_argument('--min-responses', type=int, default=10)
+    capabilities_parser.add_argument('--top', type=int, default=30)
+
+    levels_parser = commands.add_parser('levels', parents=[query_options], help="各难度级别的得分分布")
+    levels_parser.add_argument('--bins', type=int, default=10)
+
+    discrimination_parser = commands.add_parser('discrimination', parents=[query_options], help="题目区分度")
+    discrimination_parser.add_argument('--min-responses', type=int, default=20)
+    discrimination_parser.add_argument('--below', type=float, help="只列出区分度低于该值的题目")
+
+    args = parser.parse_args(argv)
+    pd.set_option('display.width', 200)
+
+    if args.command == 'export':
+        log = InterviewEventLog(args.log_dir)
+        try:
+            stats = export_parquet(log, args.data, full=args.full)
+        finally:
+            log.close()
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return 0
+
+    if not os.path.isdir(args.data):
+        print(f"未找到分析数据集: {args.data}，请先运行 export")
+        return 1
+    analytics = InterviewAnalytics(args.data, since=args.since, until=args.until, tracks=args.track)
+    if args.command == 'capabilities':
+        result = analytics.capability_failures(args.threshold, args.min_responses).head(args.top)
+        print(result.to_string(float_format='{:.3f}'.format))
+    elif args.command == 'levels':
+        print(analytics.score_distribution().to_string(float_format='{:.3f}'.format))
+        print()
+        print(analytics.score_histogram(args.bins).to_string())
+    elif args.command == 'discrimination':
+        result = analytics.question_discrimination(args.min_responses)
+        if args.below is not None:
+            result = result[result['discrimination'].isna() | (result['discrimination'] < args.below)]
+        print(result.to_string(float_format='{:.3f}'.format))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import os
 import threading
+import time
 import pyttsx3
 import tkinter as tk
 from vosk import Model, SetLogLevel
 
+from . import metrics, tracing
 from .voice import VoiceRecorder
 from .ui import InteractiveTextApp
 
@@ -16,27 +19,41 @@ class Solution:
         self.recorder = VoiceRecorder(model_path, device="cpu")
 
     def use_pyttsx3(self, word):
-        threading.Thread(target=self._speak, args=(word,), daemon=True).start()
+        threading.Thread(target=self._speak, args=(word, time.perf_counter()), daemon=True).start()
 
-    def _speak(self, word):
+    def _speak(self, word, requested_at=None):
         try:
-            engine = pyttsx3.init()
-            engine.setProperty('rate', 200)
-            engine.setProperty('volume', 1.0)
-            voices = engine.getProperty('voices')
-            if voices:
-                engine.setProperty('voice', voices[0].id)
-            engine.say(word)
-            engine.runAndWait()
-            engine.stop()
+            with tracing.span('tts.start', chars=len(word)) as span:
+                engine = pyttsx3.init()
+                engine.setProperty('rate', 200)
+                engine.setProperty('volume', 1.0)
+                voices = engine.getProperty('voices')
+                if voices:
+                    engine.setProperty('voice', voices[0].id)
+                if requested_at is not None:
+                    # 从请求播报到引擎就绪的总等待（含线程调度）
+                    span.set(queued_ms=round((time.perf_counter() - requested_at) * 1000, 3))
+            with tracing.span('tts.speak', chars=len(word)):
+                engine.say(word)
+                engine.runAndWait()
+                engine.stop()
         except Exception as e:
             print(f"语音播报出错: {e}")
 
 
 def run_app():
+    metrics_port = os.environ.get('AI_INTERVIEW_METRICS_PORT')
+    if metrics_port:
+        try:
+            metrics.start_http_server(int(metrics_port))
+        except Exception as e:
+            print(f"指标服务启动失败: {e}")
     solution = Solution()
     root = tk.Tk()
-    _ = InteractiveTextApp(root, solution)
+    app = InteractiveTextApp(root, solution)
     root.mainloop()
+    # 写完尚在队列中的面试事件和对话记录
+    app.event_log.close()
+    app.transcript.close()
 
 
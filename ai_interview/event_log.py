@@ -0,0 +1,495 @@
+# -*- coding: utf-8 -*-
+"""
+面试事件日志
+
+面试过程中的数据原本只保存在各引擎的列表里，进程退出即丢失。InterviewEventLog 把每场面试记录为只追加的事件：
+- interview_started：简历、JD
+- turn：每题的问题、回答、得分、难度变化和耗时
+- stage_completed：阶段汇总（含延迟评分的批量评估结果）
+- interview_completed：最终评估
+
+写入方式：
+- append() 只把事件序列化后放入内存队列，立即返回，不在出题/评分的路径上等待磁盘
+- 后台写线程按组提交：攒够一批（或等待满 commit_interval 秒）后一次写入日志分段文件（JSON Lines）、
+  一次 fsync，再在一个 SQLite 事务中写入索引（WAL 模式，读写互不阻塞）
+- 日志文件是唯一的数据来源，索引只记录每条事件所在的分段和字节位置；
+  打开时对比各分段的已索引位置，补建崩溃前已写入日志但未写入索引的事件，末尾写了一半的行被忽略
+
+事件日志同时是离线分析和批量重评分的数据来源：
+    python -m ai_interview.event_log list --status completed
+    python -m ai_interview.event_log show <interview_id>
+    python -m ai_interview.event_log export-interviews interviews.jsonl     # 供 report_batch 使用
+    python -m ai_interview.event_log export-answers archive.jsonl           # 供 rescoring 使用
+
+用法：
+    log = InterviewEventLog()
+    manager = IntegratedInterviewManager(event_log=log)
+    ...
+    log.close()
+"""
+
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from . import metrics
+
+
+DEFAULT_LOG_DIR = 'Data/interview_events'
+INDEX_NAME = 'index.sqlite'
+
+# 组提交：一批最多的事件数、凑批的最长等待时间（秒）
+MAX_BATCH = 256
+COMMIT_INTERVAL = 0.05
+
+# 分段文件超过该大小后写入新分段
+SEGMENT_BYTES = 64 * 1024 * 1024
+
+_CLOSE = object()
+
+
+class InterviewEventLog:
+    """只追加的面试事件日志（JSON Lines 分段文件 + SQLite 索引）"""
+
+    def __init__(self, log_dir: str = DEFAULT_LOG_DIR, max_batch: int = MAX_BATCH,
+                 commit_interval: float = COMMIT_INTERVAL, fsync: bool = True,
+                 segment_bytes: int = SEGMENT_BYTES):
+        """
+        Args:
+            log_dir: 日志目录（分段文件和 index.sqlite）
+            max_batch: 每次组提交最多的事件数
+            commit_interval: 凑批的最长等待时间（秒）
+            fsync: 每次组提交后是否 fsync 日志文件
+            segment_bytes: 单个分段文件的大小上限
+        """
+        self.log_dir = log_dir
+        self.max_batch = max_batch
+        self.commit_interval = commit_interval
+        self.fsync = fsync
+        self.segment_bytes = segment_bytes
+        self.index_path = os.path.join(log_dir, INDEX_NAME)
+        os.makedirs(log_dir, exist_ok=True)
+
+        self.conn = self._connect()
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "segment TEXT, offset INTEGER, length INTEGER, interview_id TEXT, event_type TEXT, "
+            "stage INTEGER, created_at REAL, PRIMARY KEY (segment, offset));"
+            "CREATE INDEX IF NOT EXISTS idx_events_interview ON events(interview_id, created_at);"
+            "CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type, created_at);"
+            "CREATE TABLE IF NOT EXISTS interviews ("
+            "interview_id TEXT PRIMARY KEY, status TEXT, candidate_name TEXT, jd_id TEXT, "
+            "questions INTEGER DEFAULT 0, overall_score REAL, started_at REAL, updated_at REAL);"
+            "CREATE INDEX IF NOT EXISTS idx_interviews_status ON interviews(status, updated_at);"
+            "CREATE TABLE IF NOT EXISTS segments (segment TEXT PRIMARY KEY, indexed_offset INTEGER);"
+        )
+        self.conn.commit()
+        self._read_lock = threading.Lock()
+        self.recovered = self.recover()
+
+        self._queue = queue.SimpleQueue()
+        self._segment = None
+        self._segment_name = None
+        self._unindexed = []
+        self._closed = False
+        self._writer = threading.Thread(target=self._run_writer, name='interview-event-log', daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.index_path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def append(self, interview_id: str, event_type: str, stage: Optional[int] = None, **data):
+        """
+        记录一条事件（线程安全，不等待写盘）
+
+        事件在调用时序列化，之后调用方修改传入的对象不影响已记录的内容。
+        """
+        if self._closed:
+            print(f"事件日志已关闭，丢弃事件: {event_type}")
+            return
+        try:
+            line = json.dumps({
+                'interview_id': interview_id,
+                'type': event_type,
+                'stage': stage,
+                'time': time.time(),
+                'data': data
+            }, ensure_ascii=False, default=str)
+        except (TypeError, ValueError) as e:
+            print(f"事件序列化失败: {e}")
+            return
+        self._queue.put(line)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前记录的事件全部写入日志和索引"""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """写完队列中的事件后关闭"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._writer.join()
+        with self._read_lock:
+            self.conn.close()
+
+    # ---- 写线程 ----
+
+    def _run_writer(self):
+        conn = self._connect()
+        closing = False
+        while not closing:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.commit_interval
+            while True:
+                if item is _CLOSE:
+                    closing = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if closing or len(batch) >= self.max_batch:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(conn, batch)
+            for waiter in waiters:
+                waiter.set()
+        if self._segment is not None:
+            self._segment.close()
+        conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, lines: List[str]):
+        """组提交：一次写入、一次 fsync、一个索引事务"""
+        started = time.perf_counter()
+        try:
+            segment = self._open_segment()
+            offset = segment.tell()
+            rows, chunks = [], []
+            for line in lines:
+                encoded = (line + "\n").encode('utf-8')
+                rows.append((self._segment_name, offset, len(encoded), json.loads(line)))
+                chunks.append(encoded)
+                offset += len(encoded)
+            segment.write(b''.join(chunks))
+            segment.flush()
+            if self.fsync:
+                os.fsync(segment.fileno())
+        except OSError as e:
+            print(f"事件日志写入失败: {e}")
+            return
+
+        rows = self._unindexed + rows
+        try:
+            self._index(conn, rows)
+            conn.commit()
+            self._unindexed = []
+        except sqlite3.Error as e:
+            # 日志已落盘，索引随下一批重试（或在下次打开时补建）
+            conn.rollback()
+            self._unindexed = rows
+            print(f"事件索引写入失败: {e}")
+        metrics.EVENT_LOG_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
+    def _open_segment(self):
+        if self._segment is not None and self._segment.tell() < self.segment_bytes:
+            return self._segment
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_name = f"events-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl"
+        self._segment = open(os.path.join(self.log_dir, self._segment_name), 'ab')
+        return self._segment
+
+    @staticmethod
+    def _index(conn: sqlite3.Connection, rows: List[Tuple[str, int, int, Dict]]):
+        """写入事件索引、各分段的已索引位置，并更新面试概况（已索引过的事件不重复计入）"""
+        indexed_offsets = {}
+        for segment, offset, length, event in rows:
+            indexed_offsets[segment] = max(indexed_offsets.get(segment, 0), offset + length)
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO events (segment, offset, length, interview_id, event_type, stage, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (segment, offset, length, event['interview_id'], event['type'], event.get('stage'), event['time'])
+            ).rowcount
+            if not inserted:
+                continue
+            interview_id, data, created_at = event['interview_id'], event['data'], event['time']
+            if event['type'] == 'interview_started':
+                resume_data = data.get('resume_data') or {}
+                conn.execute(
+                    "INSERT OR REPLACE INTO interviews "
+                    "(interview_id, status, candidate_name, jd_id, questions, overall_score, started_at, updated_at) "
+                    "VALUES (?, 'in_progress', ?, ?, 0, NULL, ?, ?)",
+                    (interview_id, resume_data.get('name'), data.get('jd_id'), created_at, created_at)
+                )
+            elif event['type'] == 'turn':
+                conn.execute(
+                    "UPDATE interviews SET questions = questions + 1, updated_at = ? WHERE interview_id = ?",
+                    (created_at, interview_id)
+                )
+            elif event['type'] == 'interview_completed':
+                assessment = data.get('final_assessment') or {}
+                conn.execute(
+                    "UPDATE interviews SET status = ?, overall_score = ?, updated_at = ? WHERE interview_id = ?",
+                    ('completed' if 'error' not in assessment else 'abandoned',
+                     assessment.get('overall_score'), created_at, interview_id)
+                )
+        conn.executemany(
+            "INSERT INTO segments (segment, indexed_offset) VALUES (?, ?) "
+            "ON CONFLICT(segment) DO UPDATE SET indexed_offset = MAX(indexed_offset, excluded.indexed_offset)",
+            list(indexed_offsets.items())
+        )
+
+    # ---- 崩溃恢复 ----
+
+    def recover(self) -> int:
+        """
+        补建索引：对每个分段，从已索引位置读到最后一个完整的行
+
+        Returns:
+            补建的事件数
+        """
+        indexed = dict(self.conn.execute("SELECT segment, indexed_offset FROM segments"))
+        recovered = 0
+        for name in sorted(os.listdir(self.log_dir)):
+            if not (name.startswith('events-') and name.endswith('.jsonl')):
+                continue
+            start = indexed.get(name, 0)
+            path = os.path.join(self.log_dir, name)
+            if os.path.getsize(path) <= start:
+                continue
+            with open(path, 'rb') as f:
+                f.seek(start)
+                tail = f.read()
+            # 末尾没有换行的部分是写了一半的事件，忽略
+            tail = tail[:tail.rfind(b"\n") + 1]
+            rows, offset = [], start
+            for raw in tail.splitlines(keepends=True):
+                try:
+                    rows.append((name, offset, len(raw), json.loads(raw)))
+                except json.JSONDecodeError as e:
+                    print(f"事件日志 {name} 第{offset}字节处的记录损坏，已跳过: {e}")
+                offset += len(raw)
+            if not rows:
+                continue
+            self._index(self.conn, rows)
+            self.conn.commit()
+            recovered += len(rows)
+        if recovered:
+            print(f"事件日志恢复：补建 {recovered} 条事件的索引")
+        return recovered
+
+    # ---- 读取 ----
+
+    def events(self, interview_id: str, event_type: Optional[str] = None) -> List[Dict]:
+        """按时间顺序读取一场面试的事件（只包含已提交的事件，需要时先调用 flush()）"""
+        query = "SELECT segment, offset, length FROM events WHERE interview_id = ?"
+        params = [interview_id]
+        if event_type:
+            query += " AND event_type = ?"
+            params.append(event_type)
+        query += " ORDER BY created_at, segment, offset"
+        with self._read_lock:
+            locations = self.conn.execute(query, params).fetchall()
+        return list(self._read(locations))
+
+    def _read(self, locations: List[Tuple[str, int, int]]) -> Iterator[Dict]:
+        files = {}
+        try:
+            for segment, offset, length in locations:
+                if segment not in files:
+                    files[segment] = open(os.path.join(self.log_dir, segment), 'rb')
+                f = files[segment]
+                f.seek(offset)
+                yield json.loads(f.read(length))
+        finally:
+            for f in files.values():
+                f.close()
+
+    def interviews(self, status: Optional[str] = None, since: Optional[float] = None,
+                   limit: Optional[int] = None) -> List[Dict]:
+        """
+        面试概况
+
+        Args:
+            status: in_progress / completed / abandoned
+            since: 只返回此时间戳之后有更新的面试
+            limit: 最多返回条数
+
+        Returns:
+            [{'interview_id', 'status', 'candidate_name', 'jd_id', 'questions', 'overall_score',
+              'started_at', 'updated_at'}, ...]，按开始时间升序
+        """
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if since is not None:
+            conditions.append("updated_at >= ?")
+            params.append(since)
+        query = ("SELECT interview_id, status, candidate_name, jd_id, questions, overall_score, started_at, updated_at "
+                 "FROM interviews")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY started_at"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        columns = ('interview_id', 'status', 'candidate_name', 'jd_id', 'questions', 'overall_score',
+                   'started_at', 'updated_at')
+        with self._read_lock:
+            return [dict(zip(columns, row)) for row in self.conn.execute(query, params)]
+
+    def interview_data(self, interview_id: str) -> Optional[Dict]:
+        """
+        由事件重建与 IntegratedInterviewManager.get_complete_interview_data() 相同结构的面试数据
+
+        另附 'turns'：按作答顺序的每题记录（延迟评分的题目补齐阶段批量评分的得分）。
+        """
+        events = self.events(interview_id)
+        if not events:
+            return None
+        data = {
+            'interview_id': interview_id,
+            'candidate_data': {'resume_data': None, 'jd_data': None},
+            'stage_summaries': {},
+            'final_assessment': None,
+            'turns': []
+        }
+        for event in events:
+            payload = event['data']
+            if event['type'] == 'interview_started':
+                data['candidate_data'] = {'resume_data': payload.get('resume_data'), 'jd_data': payload.get('jd_data')}
+                data['stage_summaries'] = {}
+                data['final_assessment'] = None
+                data['turns'] = []
+            elif event['type'] == 'turn':
+                data['turns'].append({**payload, 'stage': event['stage'], 'time': event['time']})
+            elif event['type'] == 'stage_completed':
+                data['stage_summaries'][payload['stage_key']] = payload['summary']
+            elif event['type'] == 'interview_completed':
+                data['final_assessment'] = payload.get('final_assessment')
+
+        # 延迟评分时单题事件中没有得分，用阶段汇总中的批量评分结果补齐
+        for stage_key, summary in data['stage_summaries'].items():
+            stage_turns = [turn for turn in data['turns'] if f"stage{turn['stage']}" == stage_key]
+            for turn, score in zip(stage_turns, summary.get('detailed_scores') or []):
+                if turn.get('score') is None:
+                    turn['score'] = score
+
+        scores = [score for summary in data['stage_summaries'].values() for score in summary.get('detailed_scores', [])]
+        data['interview_metadata'] = {
+            'current_stage': 4 if data['final_assessment'] else (data['turns'][-1]['stage'] if data['turns'] else 1),
+            'total_questions': len(scores),
+            'overall_average_score': sum(scores) / len(scores) if scores else 0
+        }
+        return data
+
+    def iter_answers(self, status: Optional[str] = 'completed') -> Iterator[Dict]:
+        """
+        按重评分归档格式（见 rescoring）逐条生成已作答的题目
+
+        每条附带 session_id（面试编号）和 question_id（题库题目编号，JD定制问题仍为原题编号），
+        可直接用于 irt_difficulty calibrate 标定题目参数。
+        """
+        for interview in self.interviews(status=status):
+            data = self.interview_data(interview['interview_id'])
+            if not data:
+                continue
+            context = {'jd_data': data['candidate_data'].get('jd_data'),
+                       'resume_data': data['candidate_data'].get('resume_data')}
+            for number, turn in enumerate(data['turns'], 1):
+                yield {
+                    'id': f"{interview['interview_id']}-q{number}",
+                    'session_id': interview['interview_id'],
+                    'stage': turn['stage'],
+                    'question': turn.get('question', ''),
+                    'question_id': turn.get('question_id'),
+                    'question_type': turn.get('question_type'),
+                    'difficulty': turn.get('difficulty'),
+                    'answer': turn.get('answer', ''),
+                    'context': context,
+                    'score': turn.get('score')
+                }
+
+
+def _write_jsonl(path: str, records: Iterator[Dict]) -> int:
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            count += 1
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="面试事件日志")
+    parser.add_argument('--log-dir', default=DEFAULT_LOG_DIR, help="日志目录")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="列出面试")
+    list_parser.add_argument('--status', choices=('in_progress', 'completed', 'abandoned'))
+    list_parser.add_argument('--limit', type=int, default=50)
+
+    show_parser = commands.add_parser('show', help="显示一场面试的全部事件")
+    show_parser.add_argument('interview_id')
+
+    interviews_parser = commands.add_parser('export-interviews', help="导出已完成的面试（report_batch 的输入格式）")
+    interviews_parser.add_argument('output')
+
+    answers_parser = commands.add_parser('export-answers', help="导出已作答的题目（rescoring 的归档格式）")
+    answers_parser.add_argument('output')
+    answers_parser.add_argument('--all', action='store_true', help="包含未完成的面试")
+
+    args = parser.parse_args(argv)
+    log = InterviewEventLog(args.log_dir)
+    try:
+        if args.command == 'list':
+            for interview in log.interviews(status=args.status, limit=args.limit):
+                started = time.strftime('%Y-%m-%d %H:%M', time.localtime(interview['started_at'] or 0))
+                print(f"{interview['interview_id']}  {started}  {interview['status']:<11}  "
+                      f"{interview['questions']:>3}题  {interview['overall_score'] if interview['overall_score'] is not None else '-'}  "
+                      f"{interview['candidate_name'] or ''}")
+        elif args.command == 'show':
+            events = log.events(args.interview_id)
+            if not events:
+                print(f"未找到面试: {args.interview_id}")
+                return 1
+            for event in events:
+                print(json.dumps(event, ensure_ascii=False, indent=2))
+        elif args.command == 'export-interviews':
+            records = (
+                {'interview_id': interview['interview_id'], 'interview_data': log.interview_data(interview['interview_id'])}
+                for interview in log.interviews(status='completed')
+            )
+            print(f"已导出 {_write_jsonl(args.output, records)} 场面试")
+        elif args.command == 'export-answers':
+            count = _write_jsonl(args.output, log.iter_answers(status=None if args.all else 'completed'))
+            print(f"已导出 {count} 条回答")
+    finally:
+        log.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,162 @@
 # -*- coding: utf-8 -*-
+"""
+JD解析
+
+parse_jd_text() 是无状态的解析函数，结果按内容哈希缓存：
+- 同一份JD重复确认时直接返回缓存结果（副本，调用方可以随意修改）
+- 逐行的段落判断与关键词扫描也按行缓存，只改动一两行的JD只需重新扫描改动的行
+- 技术词表热加载后缓存自动失效
+- 结果带有 jd_id（内容哈希前缀），界面中粘贴的JD与JD存储中导入的同一份JD编号相同
+JDAnalyzer 保留原有接口，供界面使用。
+"""
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from . import metrics
+from .keywords import KeywordMatcher, TechLexicon, get_lexicon
+
+
+# 段落标题关键词，按 要求 > 职责 > 技能 的优先级判断
+SECTION_MATCHER = KeywordMatcher.from_groups({
+    "requirements": ["要求", "任职要求", "岗位要求", "职位要求"],
+    "responsibilities": ["职责", "工作职责", "岗位职责", "工作内容"],
+    "skills": ["技能", "技术要求", "专业技能", "掌握"]
+})
+
+JD_ID_LENGTH = 16
+
+PARSE_CACHE_SIZE = 1024
+LINE_CACHE_SIZE = 65536
+
+_parse_cache = OrderedDict()
+_line_cache = {}
+_line_cache_lexicon = None
+_cache_lock = threading.Lock()
+
+
+def jd_content_hash(jd_text: str) -> str:
+    """JD内容哈希（SHA-256）"""
+    return hashlib.sha256(jd_text.encode('utf-8')).hexdigest()
+
+
+def make_jd_id(jd_text: str) -> str:
+    """JD编号：去除首尾空白后的内容哈希前缀"""
+    return jd_content_hash(jd_text.strip())[:JD_ID_LENGTH]
+
+
+def parse_jd_text(jd_text: str) -> Dict:
+    """
+    解析JD文本，提取关键信息
+
+    Returns:
+        {'jd_id', 'position', 'requirements', 'responsibilities', 'skills', 'experience', 'education', 'keywords'}
+    """
+    lexicon = get_lexicon()
+    key = (jd_content_hash(jd_text), lexicon.version, id(lexicon))
+
+    with _cache_lock:
+        cached = _parse_cache.get(key)
+        if cached is not None:
+            _parse_cache.move_to_end(key)
+    metrics.record_cache('jd_parse', cached is not None)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    jd_data = _parse(jd_text, lexicon)
+
+    with _cache_lock:
+        _parse_cache[key] = jd_data
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return copy.deepcopy(jd_data)
+
+
+def _parse(jd_text: str, lexicon: TechLexicon) -> Dict:
+    jd_data = {
+        "jd_id": make_jd_id(jd_text),
+        "position": "",
+        "requirements": [],
+        "responsibilities": [],
+        "skills": [],
+        "experience": "",
+        "education": "",
+        "keywords": []
+    }
+
+    # 提取职位名称
+    lines = jd_text.split('\n')
+    if lines:
+        jd_data["position"] = lines[0].strip()
+
+    keywords = {}
+    current_section = ""
+    for index, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+
+        section, line_keywords = _scan_line(line, lexicon)
+        # 提取技术关键词（共享词表，别名归一为规范写法，按出现顺序去重）
+        for keyword in line_keywords:
+            keywords.setdefault(keyword, True)
+        if index == 0:
+            continue
+
+        # 判断当前段落类型
+        if section:
+            current_section = section
+            continue
+
+        # 添加到对应段落
+        if current_section in ("requirements", "responsibilities", "skills"):
+            jd_data[current_section].append(line)
+
+    jd_data["keywords"] = list(keywords)
+    return jd_data
+
+
+def _scan_line(line: str, lexicon: TechLexicon) -> Tuple[Optional[str], Tuple[str, ...]]:
+    """单行的段落标题判断与关键词提取（按行缓存）"""
+    global _line_cache, _line_cache_lexicon
+    with _cache_lock:
+        if _line_cache_lexicon is not lexicon:
+            # 词表重新加载后旧的逐行结果失效
+            _line_cache = {}
+            _line_cache_lexicon = lexicon
+        cached = _line_cache.get(line)
+    if cached is not None:
+        return cached
+
+    sections = SECTION_MATCHER.count_by_group(line)
+    section = next(
+        (name for name in ("requirements", "responsibilities", "skills") if name in sections), None
+    )
+    result = (section, tuple(lexicon.find_keywords(line)))
+
+    with _cache_lock:
+        if _line_cache_lexicon is lexicon:
+            if len(_line_cache) >= LINE_CACHE_SIZE:
+                _line_cache.clear()
+            _line_cache[line] = result
+    return result
+
+
+def summarize_jd(jd_data: Dict) -> str:
+    """JD摘要文本"""
+    if not jd_data:
+        return "未解析JD信息"
+
+    return f"""
+职位: {jd_data['position']}
+技术要求: {', '.join(jd_data['keywords'][:8])}
+要求数量: {len(jd_data['requirements'])}项
+职责数量: {len(jd_data['responsibilities'])}项
+"""
+
 
 class JDAnalyzer:
     """职位描述分析器"""
@@ -7,75 +165,9 @@ class JDAnalyzer:
 
     def parse_jd(self, jd_text):
         """解析JD文本，提取关键信息"""
-        self.jd_data = {
-            "position": "",
-            "requirements": [],
-            "responsibilities": [],
-            "skills": [],
-            "experience": "",
-            "education": "",
-            "keywords": []
-        }
-
-        # 提取职位名称
-        lines = jd_text.split('\n')
-        if lines:
-            self.jd_data["position"] = lines[0].strip()
-
-        # 关键词匹配提取
-        requirements_keywords = ["要求", "任职要求", "岗位要求", "职位要求"]
-        responsibilities_keywords = ["职责", "工作职责", "岗位职责", "工作内容"]
-        skills_keywords = ["技能", "技术要求", "专业技能", "掌握"]
-
-        current_section = ""
-        for line in lines[1:]:
-            line = line.strip()
-            if not line:
-                continue
-
-            # 判断当前段落类型
-            if any(keyword in line for keyword in requirements_keywords):
-                current_section = "requirements"
-                continue
-            elif any(keyword in line for keyword in responsibilities_keywords):
-                current_section = "responsibilities"
-                continue
-            elif any(keyword in line for keyword in skills_keywords):
-                current_section = "skills"
-                continue
-
-            # 添加到对应段落
-            if current_section == "requirements":
-                self.jd_data["requirements"].append(line)
-            elif current_section == "responsibilities":
-                self.jd_data["responsibilities"].append(line)
-            elif current_section == "skills":
-                self.jd_data["skills"].append(line)
-
-        # 提取技术关键词
-        tech_keywords = [
-            "Java", "Python", "JavaScript", "React", "Vue", "Node.js", "Spring", "MySQL",
-            "Redis", "Docker", "Kubernetes", "微服务", "分布式", "高并发", "架构设计",
-            "算法", "数据结构", "设计模式", "Linux", "Git", "Jenkins", "DevOps"
-        ]
-
-        jd_lower = jd_text.lower()
-        for keyword in tech_keywords:
-            if keyword.lower() in jd_lower:
-                self.jd_data["keywords"].append(keyword)
-
+        self.jd_data = parse_jd_text(jd_text)
         return self.jd_data
 
     def get_jd_summary(self):
         """获取JD摘要"""
-        if not self.jd_data:
-            return "未解析JD信息"
-
-        return f"""
-职位: {self.jd_data['position']}
-技术要求: {', '.join(self.jd_data['keywords'][:8])}
-要求数量: {len(self.jd_data['requirements'])}项
-职责数量: {len(self.jd_data['responsibilities'])}项
-"""
-
-
+        return summarize_jd(self.jd_data)
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+JD持久化存储与批量导入
+
+招聘方每天导入大量JD，这里把解析结果存入 SQLite，按职位和技术关键词建立索引：
+- JD编号取内容（去除首尾空白）哈希的前16位，内容相同的JD只存一份，重复导入直接跳过；
+  与界面中 JDAnalyzer 解析同一份JD得到的 jd_id 相同
+- 批量导入时多进程并行解析，主进程集中写库
+- 面试会话只需保存JD编号，需要时再按编号取出解析结果
+
+用法：
+    python -m ai_interview.jd_store ingest jds/ --workers 4          # 目录下的 .txt/.md，每个文件一份JD
+    python -m ai_interview.jd_store ingest jds.jsonl                 # 每行 {"text": "...", "source": "..."}
+    python -m ai_interview.jd_store search --keyword Redis --keyword Kafka
+    python -m ai_interview.jd_store show 3f2a9c0d1e4b5a6c
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .jd import make_jd_id, parse_jd_text
+from .keywords import get_lexicon
+
+
+class JDStore:
+    """JD存储（SQLite）"""
+
+    def __init__(self, db_path: str = 'jd_store.sqlite'):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jds ("
+            "jd_id TEXT PRIMARY KEY, position TEXT, source TEXT, text TEXT, data TEXT, "
+            "lexicon_version TEXT, created_at REAL);"
+            "CREATE INDEX IF NOT EXISTS idx_jds_position ON jds(position);"
+            "CREATE TABLE IF NOT EXISTS jd_keywords ("
+            "jd_id TEXT, keyword TEXT, PRIMARY KEY (jd_id, keyword));"
+            "CREATE INDEX IF NOT EXISTS idx_jd_keywords_keyword ON jd_keywords(keyword);"
+        )
+        self.conn.commit()
+
+    def add(self, jd_text: str, source: Optional[str] = None) -> str:
+        """解析并保存一份JD，返回JD编号"""
+        jd_id = make_jd_id(jd_text)
+        if not self.contains(jd_id):
+            self._insert(jd_id, jd_text, parse_jd_text(jd_text), source)
+            self.conn.commit()
+        return jd_id
+
+    def get(self, jd_id: str) -> Optional[Dict]:
+        """按编号读取JD解析结果（附带 jd_id 字段）"""
+        row = self.conn.execute("SELECT data FROM jds WHERE jd_id = ?", (jd_id,)).fetchone()
+        if not row:
+            return None
+        jd_data = json.loads(row[0])
+        jd_data['jd_id'] = jd_id
+        return jd_data
+
+    def get_text(self, jd_id: str) -> Optional[str]:
+        """按编号读取JD原文"""
+        row = self.conn.execute("SELECT text FROM jds WHERE jd_id = ?", (jd_id,)).fetchone()
+        return row[0] if row else None
+
+    def contains(self, jd_id: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM jds WHERE jd_id = ?", (jd_id,)).fetchone() is not None
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM jds").fetchone()[0]
+
+    def search(self, position: Optional[str] = None, keywords: Optional[List[str]] = None,
+               match_all: bool = True, limit: int = 50) -> List[Dict]:
+        """
+        按职位（包含匹配）和技术关键词检索JD
+
+        Args:
+            position: 职位名称片段
+            keywords: 技术关键词（规范写法或别名）
+            match_all: True 时要求包含全部关键词，否则包含任一即可
+            limit: 最多返回条数
+
+        Returns:
+            [{'jd_id', 'position', 'source', 'matched_keywords'}, ...]，按命中关键词数降序
+        """
+        conditions, params = [], []
+        if position:
+            conditions.append("j.position LIKE ?")
+            params.append(f"%{position}%")
+
+        canonical = self._canonical_keywords(keywords or [])
+        if canonical:
+            placeholders = ','.join('?' * len(canonical))
+            query = (
+                "SELECT j.jd_id, j.position, j.source, COUNT(k.keyword) AS matched "
+                f"FROM jds j JOIN jd_keywords k ON k.jd_id = j.jd_id AND k.keyword IN ({placeholders})"
+            )
+            params = list(canonical) + params
+        else:
+            query = "SELECT j.jd_id, j.position, j.source, 0 AS matched FROM jds j"
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " GROUP BY j.jd_id"
+        if canonical and match_all:
+            query += " HAVING matched = ?"
+            params.append(len(canonical))
+        query += " ORDER BY matched DESC, j.created_at DESC LIMIT ?"
+        params.append(limit)
+
+        return [
+            {'jd_id': jd_id, 'position': position_name, 'source': source, 'matched_keywords': matched}
+            for jd_id, position_name, source, matched in self.conn.execute(query, params)
+        ]
+
+    def ingest(self, items: Iterable[Tuple[Optional[str], str]], workers: int = 4,
+               chunk_size: int = 256) -> Dict:
+        """
+        批量导入JD
+
+        Args:
+            items: (来源, JD原文) 序列
+            workers: 解析进程数，1 表示在当前进程解析
+            chunk_size: 每批提交的JD数
+
+        Returns:
+            {'total', 'added', 'skipped'}
+        """
+        stats = {'total': 0, 'added': 0, 'skipped': 0}
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            batch, batch_ids = [], set()
+            for source, jd_text in items:
+                stats['total'] += 1
+                jd_id = make_jd_id(jd_text)
+                if jd_id in batch_ids or self.contains(jd_id):
+                    stats['skipped'] += 1
+                    continue
+                batch.append((jd_id, source, jd_text))
+                batch_ids.add(jd_id)
+                if len(batch) >= chunk_size:
+                    stats['added'] += self._ingest_batch(batch, pool)
+                    batch, batch_ids = [], set()
+            if batch:
+                stats['added'] += self._ingest_batch(batch, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return stats
+
+    def _ingest_batch(self, batch: List[Tuple[str, Optional[str], str]], pool) -> int:
+        texts = [jd_text for _, _, jd_text in batch]
+        if pool is not None:
+            parsed = list(pool.map(parse_jd_text, texts, chunksize=max(1, len(texts) // 16)))
+        else:
+            parsed = [parse_jd_text(text) for text in texts]
+        for (jd_id, source, jd_text), jd_data in zip(batch, parsed):
+            self._insert(jd_id, jd_text, jd_data, source)
+        self.conn.commit()
+        return len(batch)
+
+    def _insert(self, jd_id: str, jd_text: str, jd_data: Dict, source: Optional[str]):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO jds VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (jd_id, jd_data.get('position', ''), source, jd_text,
+             json.dumps(jd_data, ensure_ascii=False), get_lexicon().version, time.time())
+        )
+        self.conn.execute("DELETE FROM jd_keywords WHERE jd_id = ?", (jd_id,))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jd_keywords VALUES (?, ?)",
+            [(jd_id, keyword) for keyword in jd_data.get('keywords', [])]
+        )
+
+    @staticmethod
+    def _canonical_keywords(keywords: List[str]) -> List[str]:
+        """把别名（如 k8s）转换为词表中的规范写法，词表外的词原样保留"""
+        lexicon = get_lexicon()
+        canonical = []
+        for keyword in keywords:
+            found = lexicon.matcher.find(keyword, longest=True)
+            term = found[0] if len(found) == 1 else keyword
+            if term not in canonical:
+                canonical.append(term)
+        return canonical
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def iter_jd_sources(path: str) -> Iterator[Tuple[Optional[str], str]]:
+    """
+    读取待导入的JD
+
+    目录：其中每个 .txt/.md 文件为一份JD，来源为文件名；
+    .jsonl 文件：每行包含 text（或 jd_text/content）字段，来源取 source 或 id 字段。
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(('.txt', '.md')):
+                with open(os.path.join(path, name), 'r', encoding='utf-8') as f:
+                    yield name, f.read()
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"第{line_number}行解析失败，已跳过: {e}")
+                continue
+            text = record.get('text') or record.get('jd_text') or record.get('content')
+            if not text:
+                print(f"第{line_number}行缺少JD内容，已跳过")
+                continue
+            source = record.get('source') or record.get('id')
+            yield (str(source) if source is not None else None), text
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="JD持久化存储与批量导入")
+    parser.add_argument('--db', default='jd_store.sqlite', help="JD存储数据库")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help="批量导入JD")
+    ingest_parser.add_argument('path', help="JD目录或 JSON Lines 文件")
+    ingest_parser.add_argument('--workers', type=int, default=4, help="解析进程数")
+
+    search_parser = subparsers.add_parser('search', help="按职位和关键词检索")
+    search_parser.add_argument('--position', help="职位名称片段")
+    search_parser.add_argument('--keyword', action='append', default=[], help="技术关键词，可重复")
+    search_parser.add_argument('--any', action='store_true', help="包含任一关键词即可")
+    search_parser.add_argument('--limit', type=int, default=20)
+
+    show_parser = subparsers.add_parser('show', help="查看JD解析结果")
+    show_parser.add_argument('jd_id')
+
+    args = parser.parse_args(argv)
+    store = JDStore(args.db)
+    try:
+        if args.command == 'ingest':
+            started = time.time()
+            stats = store.ingest(iter_jd_sources(args.path), workers=args.workers)
+            stats['elapsed_seconds'] = round(time.time() - started, 2)
+            stats['stored'] = store.count()
+            print(json.dumps(stats, ensure_ascii=False, indent=2))
+        elif args.command == 'search':
+            results = store.search(args.position, args.keyword, match_all=not args.any, limit=args.limit)
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+        else:
+            jd_data = store.get(args.jd_id)
+            if jd_data is None:
+                print(f"未找到JD: {args.jd_id}")
+                return 1
+            print(json.dumps(jd_data, ensure_ascii=False, indent=2))
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
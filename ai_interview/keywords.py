@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+关键词匹配
+
+JD解析、第二阶段关键词提取和各评估器的规则指标都需要在一段文本中查找一组关键词。
+这里用 Aho-Corasick 自动机一次线性扫描找出所有命中（含位置），耗时与关键词数量无关：
+- 匹配不区分大小写，命中结果返回规范写法
+- 英文关键词要求两侧不是英文字母或数字（避免 Go 命中 Google），
+  与中文相邻时照常命中（正则的 \\b 在中英文之间不成立，"用Java开发" 会漏匹配）
+- 中文关键词不做边界检查
+- 支持分组：多组指标词合并为一个自动机，一次扫描得到各组的命中数
+
+技术词表保存在 Data/tech_lexicon.json（规范写法、别名、类别、权重），启动时编译为匹配器；
+文件修改后 get_lexicon() 会自动重新加载，进行中的面试无需重启即可使用新词表。
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+def _is_ascii_alnum(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+def _fold(text: str) -> str:
+    """逐字符小写，保证与原文位置一一对应"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick 多模式匹配器
+
+    用法：
+        matcher = KeywordMatcher(['Java', 'Redis', '微服务'])
+        matcher.find("基于Java和redis的微服务")   # ['Java', 'Redis', '微服务']
+    """
+
+    def __init__(self, keywords: Union[Iterable[Union[str, Tuple[str, object]]], Dict[str, str]],
+                 groups: Optional[Dict[str, Tuple[str, ...]]] = None):
+        """
+        Args:
+            keywords: 关键词列表，或 {匹配写法: 规范写法} 映射（如 {'k8s': 'Kubernetes'}）；
+                列表中也可以是 (匹配写法, 标签) 二元组，同一写法可以对应多个标签
+            groups: {规范写法: 所属分组}，由 from_groups() 构建
+        """
+        if isinstance(keywords, dict):
+            entries = list(keywords.items())
+        else:
+            entries = [(keyword, keyword) if isinstance(keyword, str) else tuple(keyword) for keyword in keywords]
+
+        self.groups = groups or {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]   # 每个状态命中的 (关键词长度, 规范写法, 检查左边界, 检查右边界)
+
+        for surface, label in entries:
+            if surface:
+                self._add(surface, label)
+        self._build()
+        self.size = len(entries)
+
+    @classmethod
+    def from_groups(cls, groups: Dict[str, Iterable[str]]) -> 'KeywordMatcher':
+        """
+        由多组关键词构建一个自动机
+
+        Args:
+            groups: {分组名: 关键词列表}，同一个词可以属于多个分组
+        """
+        membership = {}
+        for group, words in groups.items():
+            for word in words:
+                membership.setdefault(word, [])
+                if group not in membership[word]:
+                    membership[word].append(group)
+        return cls(list(membership), {word: tuple(names) for word, names in membership.items()})
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _add(self, surface: str, label: str):
+        state = 0
+        for ch in _fold(surface):
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(
+            (len(surface), label, _is_ascii_alnum(surface[0]), _is_ascii_alnum(surface[-1]))
+        )
+
+    def _build(self):
+        """广度优先计算失败指针，并把失败链上的输出合并到当前状态"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """按结束位置顺序产出所有命中 (起始位置, 结束位置, 规范写法)，允许重叠"""
+        if not text:
+            return
+        goto, fail, output = self._goto, self._fail, self._output
+        root = goto[0]
+        state = 0
+        for index, ch in enumerate(_fold(text)):
+            if state == 0:
+                state = root.get(ch, 0)
+                if state == 0:
+                    continue
+            else:
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(ch, 0)
+            for length, label, check_left, check_right in output[state]:
+                start, end = index - length + 1, index + 1
+                if check_left and start > 0 and _is_ascii_alnum(text[start - 1]):
+                    continue
+                if check_right and end < len(text) and _is_ascii_alnum(text[end]):
+                    continue
+                yield start, end, label
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """所有命中（含位置）"""
+        return list(self.finditer(text))
+
+    def find(self, text: str, limit: Optional[int] = None, longest: bool = False) -> List[str]:
+        """
+        命中的关键词（去重，按出现顺序）
+
+        Args:
+            limit: 最多返回的关键词数
+            longest: 重叠的命中只保留最左最长的一个（如 "Spring Boot" 不再同时返回 "Spring"）
+        """
+        hits = self.finditer(text)
+        if longest:
+            hits = self._leftmost_longest(list(hits))
+        found = {}
+        for _, _, label in hits:
+            if label not in found:
+                found[label] = True
+                if limit is not None and len(found) >= limit:
+                    break
+        return list(found)
+
+    @staticmethod
+    def _leftmost_longest(hits: List[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+        selected = []
+        covered_until = 0
+        for start, end, label in sorted(hits, key=lambda hit: (hit[0], hit[0] - hit[1])):
+            if start >= covered_until:
+                selected.append((start, end, label))
+                covered_until = end
+        return selected
+
+    def count_distinct(self, text: str) -> int:
+        """命中的不同关键词数"""
+        return len({label for _, _, label in self.finditer(text)})
+
+    def contains_any(self, text: str) -> bool:
+        """是否命中任一关键词"""
+        return next(self.finditer(text), None) is not None
+
+    def count_by_group(self, text: str) -> Dict[str, int]:
+        """各分组命中的不同关键词数（用于 from_groups 构建的匹配器）"""
+        counts = {}
+        for label in self.find(text):
+            for group in self.groups.get(label, ()):
+                counts[group] = counts.get(group, 0) + 1
+        return counts
+
+
+DEFAULT_LEXICON_PATH = 'Data/tech_lexicon.json'
+
+# 检查词表文件是否修改的最小间隔（秒）
+RELOAD_CHECK_INTERVAL = 2.0
+
+# 不参与技术关键词提取的类别（评估规则使用的通用词汇）
+NON_KEYWORD_CATEGORIES = ('concept',)
+
+
+class TechLexicon:
+    """编译后的技术词表"""
+
+    def __init__(self, terms: List[Dict], version: str = ''):
+        """
+        Args:
+            terms: [{'term': 规范写法, 'aliases': [...], 'category': 类别, 'weight': 权重}, ...]
+            version: 词表版本
+        """
+        self.version = version
+        self.categories = {}
+        self.weights = {}
+        self.surfaces = surfaces = {}   # 匹配写法（含别名） → 规范写法
+        for entry in terms:
+            term = entry['term']
+            self.categories[term] = entry.get('category', 'other')
+            self.weights[term] = float(entry.get('weight', 1.0))
+            surfaces[term] = term
+            for alias in entry.get('aliases', []):
+                surfaces[alias] = term
+        self.matcher = KeywordMatcher(surfaces)
+
+    @classmethod
+    def load(cls, path: str) -> 'TechLexicon':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['terms'], str(data.get('version', '')))
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def category(self, term: str) -> Optional[str]:
+        return self.categories.get(term)
+
+    def weight(self, term: str) -> float:
+        return self.weights.get(term, 1.0)
+
+    def find_keywords(self, text: str, limit: Optional[int] = None) -> List[str]:
+        """提取技术关键词（规范写法，去重，重叠时取最长，不含通用词汇）"""
+        keywords = [
+            term for term in self.matcher.find(text, longest=True)
+            if self.categories.get(term) not in NON_KEYWORD_CATEGORIES
+        ]
+        return keywords[:limit] if limit is not None else keywords
+
+    def find(self, text: str, categories: Optional[Iterable[str]] = None) -> List[str]:
+        """命中的词（规范写法，去重），可按类别过滤"""
+        terms = self.matcher.find(text)
+        if categories is None:
+            return terms
+        categories = set(categories)
+        return [term for term in terms if self.categories.get(term) in categories]
+
+
+class _LexiconLoader:
+    """按文件修改时间热加载词表"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lexicon = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> TechLexicon:
+        now = time.monotonic()
+        if self.lexicon is not None and now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return self.lexicon
+        with self._lock:
+            if self.lexicon is None or now - self._checked_at >= RELOAD_CHECK_INTERVAL:
+                self._checked_at = now
+                self._reload_if_changed()
+        return self.lexicon
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            if self.lexicon is None:
+                print(f"加载技术词表失败: {e}")
+                self.lexicon = TechLexicon([])
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            # 新词表编译完成后整体替换，读取方始终看到完整的匹配器
+            self.lexicon = TechLexicon.load(self.path)
+            self._mtime = mtime
+        except Exception as e:
+            # 文件写到一半或格式错误时保留旧词表，下次检查再试
+            print(f"加载技术词表失败: {e}")
+            if self.lexicon is None:
+                self.lexicon = TechLexicon([])
+
+
+_loader = _LexiconLoader(DEFAULT_LEXICON_PATH)
+
+
+def get_lexicon() -> TechLexicon:
+    """共享的技术词表（文件修改后自动重新加载）"""
+    return _loader.get()
+
+
+def set_lexicon_path(path: str):
+    """切换词表文件，下次调用 get_lexicon() 时加载"""
+    global _loader
+    _loader = _LexiconLoader(path)
+
+
+_matcher_cache = {}
+_matcher_cache_lock = threading.Lock()
+
+
+def matcher_for(keywords: Iterable[str]) -> KeywordMatcher:
+    """按关键词集合缓存的匹配器，用于会话内固定的动态词表（如候选人经历中的技术词）"""
+    key = tuple(keywords)
+    matcher = _matcher_cache.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(key)
+        with _matcher_cache_lock:
+            if len(_matcher_cache) >= 256:
+                _matcher_cache.clear()
+            _matcher_cache[key] = matcher
+    return matcher
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+统一的LLM调用入口
+
+各阶段的问题生成和评估都通过 chat() 调用 Ollama：
+- 模型名、keep_alive 和上下文选项集中配置，避免各处 num_ctx 不一致导致模型重新加载
+- 提示词统一组织为“字节稳定的系统消息 + 末尾的动态用户消息”，
+  Ollama 服务端可以复用相同前缀的KV缓存，长系统提示词每个会话只需计算一次
+- 客户端延迟创建，可通过 set_client() 替换（如压测时使用模拟客户端）
+- 每次调用记录为 tracing 的 llm.chat span，附带调用位置、token数和模型加载耗时；
+  耗时和失败次数按调用位置计入 metrics
+- 推理模型的回复带有 <think> 推理过程，展示给候选人之前用 strip_reasoning()/clean_question() 去除
+"""
+
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import ollama
+
+from . import metrics, tracing
+
+
+MODEL_NAME = "Jerrypoi/deepseek-r1-with-tool-calls:latest"
+
+# 模型在两次请求之间保持加载的时间，避免会话中途被卸载后重新计算提示词
+KEEP_ALIVE = "30m"
+
+# 所有调用共用的上下文选项；num_ctx 变化会触发模型重新加载，因此只在这里设置
+DEFAULT_OPTIONS = {
+    "num_ctx": 8192,
+}
+
+_client = None
+_client_lock = threading.Lock()
+
+_THINK_BLOCK_PATTERN = re.compile(r'<think>.*?</think>', re.DOTALL)
+_CJK_PATTERN = re.compile(r'[　-〿㐀-䶿一-鿿＀-￯]')
+
+
+def configure(model: Optional[str] = None, keep_alive: Optional[str] = None,
+              num_ctx: Optional[int] = None, num_keep: Optional[int] = None):
+    """
+    调整全局调用配置
+
+    Args:
+        model: 模型名称
+        keep_alive: 模型保持加载的时间，如 "30m"、"-1"（常驻）
+        num_ctx: 上下文窗口长度
+        num_keep: 上下文滑动时保留的前缀token数，通常设为系统提示词长度
+    """
+    global MODEL_NAME, KEEP_ALIVE
+    if model:
+        MODEL_NAME = model
+    if keep_alive is not None:
+        KEEP_ALIVE = keep_alive
+    if num_ctx is not None:
+        DEFAULT_OPTIONS["num_ctx"] = num_ctx
+    if num_keep is not None:
+        DEFAULT_OPTIONS["num_keep"] = num_keep
+
+
+def get_client():
+    """获取（必要时创建）Ollama客户端"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ollama.Client()
+    return _client
+
+
+def set_client(client):
+    """替换客户端，client 需提供与 ollama.Client.chat 相同的接口"""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def build_messages(system_prompt: str, user_content: str,
+                   history: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    按“系统消息 + 历史 + 动态用户消息”的顺序组织消息
+
+    system_prompt 应只包含会话内不变的内容，每轮变化的数据放在 user_content。
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    if history:
+        messages.extend(history)
+    messages.append({"role": "user", "content": user_content})
+    return messages
+
+
+def chat(messages: List[Dict], format=None, options: Optional[Dict] = None,
+         model: Optional[str] = None, call_site: Optional[str] = None) -> Dict:
+    """
+    调用模型完成一次对话
+
+    Args:
+        messages: 消息列表
+        format: 结构化输出格式（JSON Schema 或 'json'）
+        options: 额外的推理选项（如 temperature），与默认选项合并
+        model: 模型名称，缺省使用 MODEL_NAME
+        call_site: 调用位置标识（如 'stage3.evaluate'），用于追踪与统计
+
+    Returns:
+        Ollama 返回的响应，可按 response['message']['content'] 访问
+    """
+    merged_options = dict(DEFAULT_OPTIONS)
+    if options:
+        merged_options.update(options)
+
+    kwargs = {
+        "model": model or MODEL_NAME,
+        "messages": messages,
+        "options": merged_options,
+        "keep_alive": KEEP_ALIVE,
+    }
+    if format is not None:
+        kwargs["format"] = format
+
+    site = call_site or 'unknown'
+    started = time.perf_counter()
+    with tracing.span('llm.chat', call_site=call_site, model=kwargs["model"],
+                      structured=format is not None) as span:
+        try:
+            response = get_client().chat(**kwargs)
+        except Exception:
+            metrics.LLM_CALL_ERRORS.inc(call_site=site)
+            raise
+        finally:
+            metrics.LLM_CALL_SECONDS.observe(time.perf_counter() - started, call_site=site)
+        span.set(**tracing.response_timings(response))
+    return response
+
+
+def strip_reasoning(text: str) -> str:
+    """去除模型输出中的 <think> 推理过程"""
+    if not text:
+        return ''
+    text = _THINK_BLOCK_PATTERN.sub('', text)
+    # 部分模型省略开始标签，只输出“推理内容</think>答案”
+    if '</think>' in text:
+        text = text.rsplit('</think>', 1)[1]
+    # 输出被截断时只剩未闭合的推理过程
+    if '<think>' in text:
+        text = text.split('<think>', 1)[0]
+    return text.strip()
+
+
+def clean_question(text: str) -> str:
+    """模型生成的问题文本：去除推理过程和行首的引用标记（“> 问题”）"""
+    return strip_reasoning(text).lstrip('> ').strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数：中日韩字符约1字1token，其他字符约4个1token"""
+    if not text:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+简历–JD匹配矩阵
+
+用共享技术词表把简历（技能、项目、工作经历）和JD关键词映射到同一组技术词上，
+构建稀疏的 候选人×技术词 与 JD×技术词 矩阵（SciPy CSR），一次矩阵乘法得到全部组合的匹配分：
+- coverage：简历命中的JD关键词数 / JD关键词数
+- score：按词表权重加权的覆盖率（命中关键词权重之和 / JD关键词权重之和）
+- shortlist()：每个JD按 score 取前 k 名候选人
+- 匹配分同时决定第三阶段的初始难度，无需调用模型
+
+用法：
+    from ai_interview.matching import MatchMatrix
+    matrix = MatchMatrix.from_data(resumes, jds)     # 简历/JD解析结果列表
+    matrix.shortlist(k=20)                           # {JD序号: [{'resume', 'score', 'coverage', ...}, ...]}
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from .keywords import TechLexicon, get_lexicon
+
+
+# 参与匹配的简历字段
+RESUME_FIELDS = ('skills', 'projects', 'experience')
+
+# 匹配分对应的第三阶段初始难度（按阈值从高到低判断，均不满足时为 B1）
+DIFFICULTY_THRESHOLDS = (('B3', 0.7), ('B2', 0.4))
+DEFAULT_DIFFICULTY = 'B2'
+
+# shortlist 时每次展开为稠密矩阵的JD数
+SHORTLIST_BLOCK_SIZE = 256
+
+
+def resume_keywords(resume_data: Dict, lexicon: Optional[TechLexicon] = None) -> List[str]:
+    """从简历的技能、项目和工作经历中提取技术关键词（规范写法）"""
+    lexicon = lexicon or get_lexicon()
+    lines = []
+    for field in RESUME_FIELDS:
+        value = resume_data.get(field) or []
+        if isinstance(value, str):
+            value = [value]
+        lines.extend(str(item) for item in value)
+    return lexicon.find_keywords('\n'.join(lines))
+
+
+def jd_keywords(jd_data: Dict, lexicon: Optional[TechLexicon] = None) -> List[str]:
+    """JD关键词，别名统一为规范写法"""
+    lexicon = lexicon or get_lexicon()
+    keywords = {}
+    for keyword in jd_data.get('keywords', []):
+        found = lexicon.matcher.find(keyword, longest=True)
+        keywords.setdefault(found[0] if len(found) == 1 else keyword, True)
+    return list(keywords)
+
+
+def difficulty_for_score(score: Optional[float]) -> str:
+    """由匹配分确定第三阶段初始难度"""
+    if score is None:
+        return DEFAULT_DIFFICULTY
+    for difficulty, threshold in DIFFICULTY_THRESHOLDS:
+        if score >= threshold:
+            return difficulty
+    return 'B1'
+
+
+def match_resume_to_jd(resume_data: Dict, jd_data: Dict, lexicon: Optional[TechLexicon] = None) -> Dict:
+    """
+    单个简历与单个JD的匹配（面试开始时使用，计算方式与 MatchMatrix 相同）
+
+    Returns:
+        {'score', 'coverage', 'matched_keywords', 'missing_keywords', 'starting_difficulty'}
+        JD没有关键词时 score 与 coverage 为 None，初始难度取默认值
+    """
+    lexicon = lexicon or get_lexicon()
+    required = jd_keywords(jd_data, lexicon)
+    owned = set(resume_keywords(resume_data, lexicon))
+    matched = [keyword for keyword in required if keyword in owned]
+    missing = [keyword for keyword in required if keyword not in owned]
+
+    score = coverage = None
+    if required:
+        total_weight = sum(lexicon.weight(keyword) for keyword in required)
+        coverage = len(matched) / len(required)
+        score = sum(lexicon.weight(keyword) for keyword in matched) / total_weight if total_weight else coverage
+    return {
+        'score': score,
+        'coverage': coverage,
+        'matched_keywords': matched,
+        'missing_keywords': missing,
+        'starting_difficulty': difficulty_for_score(score)
+    }
+
+
+class MatchMatrix:
+    """
+    候选人×JD 匹配矩阵
+
+    overlap[i, j] 为简历 i 命中JD j 的关键词数，weighted[i, j] 为命中关键词的权重之和，
+    两者都是稀疏矩阵，只保存有交集的组合。
+    """
+
+    def __init__(self, resume_keyword_lists: Sequence[Iterable[str]], jd_keyword_lists: Sequence[Iterable[str]],
+                 resume_ids: Optional[Sequence] = None, jd_ids: Optional[Sequence] = None,
+                 lexicon: Optional[TechLexicon] = None):
+        """
+        Args:
+            resume_keyword_lists: 每份简历的技术关键词（规范写法）
+            jd_keyword_lists: 每份JD的技术关键词（规范写法）
+            resume_ids: 简历标识，默认为序号
+            jd_ids: JD标识，默认为序号
+            lexicon: 提供关键词权重的词表，默认为共享词表
+        """
+        lexicon = lexicon or get_lexicon()
+        self.resume_ids = list(resume_ids) if resume_ids is not None else list(range(len(resume_keyword_lists)))
+        self.jd_ids = list(jd_ids) if jd_ids is not None else list(range(len(jd_keyword_lists)))
+        if len(self.resume_ids) != len(resume_keyword_lists) or len(self.jd_ids) != len(jd_keyword_lists):
+            raise ValueError("标识数量与关键词列表数量不一致")
+
+        # 技术词 → 列号，词表外的关键词追加在后面（权重 1.0）
+        self.term_index = {}
+        self.resumes = self._build(resume_keyword_lists)
+        self.jds = self._build(jd_keyword_lists)
+        terms = sorted(self.term_index, key=self.term_index.get)
+        self.terms = terms
+        self.weights = np.array([lexicon.weight(term) for term in terms], dtype=np.float32)
+
+        n_terms = len(terms)
+        self.resumes.resize((self.resumes.shape[0], n_terms))
+        self.jds.resize((self.jds.shape[0], n_terms))
+
+        # 全部组合一次计算：R·Jᵀ 得到命中数，R·diag(w)·Jᵀ 得到命中权重
+        jds_t = self.jds.T.tocsr()
+        self.overlap = (self.resumes @ jds_t).tocsr()
+        self.weighted = (self.resumes @ sparse.diags(self.weights) @ jds_t).tocsr()
+        self.jd_sizes = np.asarray(self.jds.sum(axis=1)).ravel()
+        self.jd_weights = self.jds @ self.weights
+
+    @classmethod
+    def from_data(cls, resumes: Sequence[Dict], jds: Sequence[Dict], resume_ids: Optional[Sequence] = None,
+                  jd_ids: Optional[Sequence] = None, lexicon: Optional[TechLexicon] = None) -> 'MatchMatrix':
+        """由简历解析结果和JD解析结果构建（JD带 jd_id 字段时默认用作标识）"""
+        lexicon = lexicon or get_lexicon()
+        if jd_ids is None and jds and all('jd_id' in jd_data for jd_data in jds):
+            jd_ids = [jd_data['jd_id'] for jd_data in jds]
+        return cls(
+            [resume_keywords(resume_data, lexicon) for resume_data in resumes],
+            [jd_keywords(jd_data, lexicon) for jd_data in jds],
+            resume_ids, jd_ids, lexicon
+        )
+
+    @property
+    def shape(self):
+        return self.overlap.shape
+
+    def _build(self, keyword_lists: Sequence[Iterable[str]]) -> sparse.csr_matrix:
+        """关键词列表 → 0/1 稀疏矩阵"""
+        indptr = [0]
+        indices = []
+        for keywords in keyword_lists:
+            columns = {self.term_index.setdefault(keyword, len(self.term_index)) for keyword in keywords}
+            indices.extend(sorted(columns))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float32)
+        return sparse.csr_matrix(
+            (data, np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(keyword_lists), max(len(self.term_index), 1))
+        )
+
+    def _normalize(self, matrix: sparse.csr_matrix, totals: np.ndarray) -> sparse.csr_matrix:
+        """按列（JD）除以总数，没有关键词的JD保持为 0"""
+        scale = np.divide(1.0, totals, out=np.zeros_like(totals, dtype=np.float32), where=totals > 0)
+        return (matrix @ sparse.diags(scale.astype(np.float32))).tocsr()
+
+    def coverage_matrix(self) -> sparse.csr_matrix:
+        """覆盖率矩阵（简历×JD）"""
+        return self._normalize(self.overlap, self.jd_sizes)
+
+    def score_matrix(self) -> sparse.csr_matrix:
+        """加权覆盖率矩阵（简历×JD）"""
+        return self._normalize(self.weighted, self.jd_weights)
+
+    def pair(self, resume_index: int, jd_index: int) -> Dict:
+        """单个组合的匹配结果"""
+        jd_size = self.jd_sizes[jd_index]
+        jd_weight = self.jd_weights[jd_index]
+        overlap = float(self.overlap[resume_index, jd_index])
+        weighted = float(self.weighted[resume_index, jd_index])
+        score = weighted / jd_weight if jd_weight > 0 else None
+        return {
+            'resume': self.resume_ids[resume_index],
+            'jd': self.jd_ids[jd_index],
+            'score': score,
+            'coverage': overlap / jd_size if jd_size > 0 else None,
+            'matched_keywords': self.matched_keywords(resume_index, jd_index),
+            'starting_difficulty': difficulty_for_score(score)
+        }
+
+    def matched_keywords(self, resume_index: int, jd_index: int) -> List[str]:
+        """简历命中的JD关键词"""
+        resume_terms = self.resumes.indices[self.resumes.indptr[resume_index]:self.resumes.indptr[resume_index + 1]]
+        jd_terms = self.jds.indices[self.jds.indptr[jd_index]:self.jds.indptr[jd_index + 1]]
+        return [self.terms[column] for column in np.intersect1d(resume_terms, jd_terms)]
+
+    def shortlist(self, k: int = 20, min_score: float = 0.0,
+                  jd_indices: Optional[Sequence[int]] = None) -> Dict:
+        """
+        每个JD按匹配分取前 k 名候选人
+
+        Args:
+            k: 每个JD保留的候选人数
+            min_score: 低于该匹配分的候选人不进入名单
+            jd_indices: 只计算这些JD，默认全部
+
+        Returns:
+            {JD标识: [{'resume', 'score', 'coverage', 'matched_keywords', 'starting_difficulty'}, ...]}，
+            名单按 score、coverage 降序
+        """
+        jd_indices = list(range(len(self.jd_ids))) if jd_indices is None else list(jd_indices)
+        n_resumes = len(self.resume_ids)
+        k = min(k, n_resumes)
+        shortlists = {}
+        if k <= 0:
+            return {self.jd_ids[index]: [] for index in jd_indices}
+
+        scores = self.score_matrix().tocsc()
+        coverage = self.coverage_matrix().tocsc()
+        for start in range(0, len(jd_indices), SHORTLIST_BLOCK_SIZE):
+            block = jd_indices[start:start + SHORTLIST_BLOCK_SIZE]
+            block_scores = scores[:, block].toarray()
+            block_coverage = coverage[:, block].toarray()
+            # 先按 score 粗选前 k 名，再在候选内按 (score, coverage) 精确排序
+            if k < n_resumes:
+                top = np.argpartition(-block_scores, k - 1, axis=0)[:k]
+            else:
+                top = np.tile(np.arange(n_resumes)[:, None], (1, len(block)))
+            for column, jd_index in enumerate(block):
+                candidates = top[:, column]
+                candidate_scores = block_scores[candidates, column]
+                candidate_coverage = block_coverage[candidates, column]
+                order = np.lexsort((-candidate_coverage, -candidate_scores))
+                entries = []
+                for position in order:
+                    score = float(candidate_scores[position])
+                    if score <= 0 or score < min_score:
+                        continue
+                    resume_index = int(candidates[position])
+                    entries.append({
+                        'resume': self.resume_ids[resume_index],
+                        'score': round(score, 4),
+                        'coverage': round(float(candidate_coverage[position]), 4),
+                        'matched_keywords': self.matched_keywords(resume_index, jd_index),
+                        'starting_difficulty': difficulty_for_score(score)
+                    })
+                shortlists[self.jd_ids[jd_index]] = entries
+        return shortlists
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+运行指标（Prometheus 文本格式）
+
+tracing 记录单轮的细节，这里记录面向运维的聚合指标：
+- 模型调用延迟（按调用位置）与失败次数
+- 降级路径命中次数：AI评估失败回退到规则评分、AI出题失败回退到模板/备用题
+- 缓存命中与未命中次数
+- 题库按难度的抽题次数
+- 语音转写实时率（转写耗时 / 音频时长）
+- 进行中的面试数
+- 面试事件日志的组提交耗时
+
+指标只在内存中累加（一次加锁的字典更新），通过 render() 或内置 HTTP 服务暴露：
+    from ai_interview import metrics
+    metrics.start_http_server(9464)     # GET http://127.0.0.1:9464/metrics
+启动界面时也可以设置环境变量 AI_INTERVIEW_METRICS_PORT=9464。
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """带标签的指标基类"""
+
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: Tuple, value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+
+    type_name = 'gauge'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """分桶直方图，记录观测值的分布、总和与次数"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [各桶计数（末位为 +Inf）, 总和, 次数]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def get(self, **labels) -> Dict:
+        """返回 {'count', 'sum'}"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return {'count': state[2], 'sum': state[1]} if state else {'count': 0, 'sum': 0.0}
+
+    def _render_sample(self, key: Tuple, state) -> List[str]:
+        bucket_counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    'ai_interview_llm_call_seconds', '模型调用耗时（秒），按调用位置', ('call_site',)
+)
+LLM_CALL_ERRORS = REGISTRY.counter(
+    'ai_interview_llm_call_errors_total', '模型调用失败次数，按调用位置', ('call_site',)
+)
+FALLBACKS = REGISTRY.counter(
+    'ai_interview_fallback_total', '降级路径命中次数（AI不可用时改用规则评分或模板题）', ('component',)
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'ai_interview_cache_requests_total', '缓存查询次数，result 为 hit 或 miss', ('cache', 'result')
+)
+QUESTION_BANK_DRAWS = REGISTRY.counter(
+    'ai_interview_question_bank_draws_total', '第三阶段按难度抽题次数，source 为 question_pool 或 fallback',
+    ('difficulty', 'source')
+)
+ASR_REAL_TIME_FACTOR = REGISTRY.histogram(
+    'ai_interview_asr_real_time_factor', '语音转写实时率（转写耗时 / 音频时长）', (),
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 4.0)
+)
+ACTIVE_SESSIONS = REGISTRY.gauge(
+    'ai_interview_active_sessions', '进行中的面试数'
+)
+EVENT_LOG_COMMIT_SECONDS = REGISTRY.histogram(
+    'ai_interview_event_log_commit_seconds', '面试事件日志每次组提交的耗时（写入、fsync 和索引事务，秒）', (),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+
+
+def record_fallback(component: str):
+    """记录一次降级"""
+    FALLBACKS.inc(component=component)
+
+
+def record_cache(cache: str, hit: bool):
+    """记录一次缓存查询"""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def render() -> str:
+    """全局注册表的 Prometheus 文本格式"""
+    return REGISTRY.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int = 9464, host: str = '127.0.0.1',
+                      registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    在后台线程中启动指标服务
+
+    Returns:
+        HTTP 服务对象，调用 shutdown() 停止
+    """
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
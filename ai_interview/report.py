@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+面试报告
+
+报告内容先整理为与输出格式无关的版面块（build_report），复盘窗口和 PDF 共用同一份版面：
+- render_text()：复盘窗口的纯文本，按块生成片段，由调用方一次拼接
+- render_html()：单文件 HTML（批量生成时使用，模板只解析一次）
+- render_pdf()：逐页排版，版面块按需转换为 reportlab 流式元素，每排完一页回调一次进度，
+  内存中只保留当前页待排的元素
+- 中文字体只注册一次并缓存（可用环境变量 AI_INTERVIEW_REPORT_FONT 指定 TTF/TTC 字体文件，
+  否则依次尝试常见系统字体，最后使用 reportlab 内置的 STSong-Light）
+
+用法：
+    from ai_interview import report
+    blocks = report.build_report(adapter.records, adapter.final_assessment, candidate_name='张三', track_name='后端')
+    text = ''.join(report.render_text(blocks))
+    report.render_pdf(blocks, 'report.pdf', progress=lambda pages, done, total: ...)
+"""
+
+import os
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+
+STAGE_TITLES = {
+    'stage1': '第一阶段：非技术问题',
+    'stage2': '第二阶段：经历类问题',
+    'stage3': '第三阶段：技术类问题'
+}
+
+FONT_ENV = 'AI_INTERVIEW_REPORT_FONT'
+FONT_CANDIDATES = (
+    'C:/Windows/Fonts/msyh.ttc',
+    'C:/Windows/Fonts/simhei.ttf',
+    '/System/Library/Fonts/PingFang.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc'
+)
+FALLBACK_CID_FONT = 'STSong-Light'
+
+RULE = '=' * 60
+QA_RULE = '━' * 52
+
+# 版面或模板变化时递增，批量生成据此判断已有报告是否需要重新生成
+LAYOUT_VERSION = 1
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>
+body { font-family: "Microsoft YaHei", "PingFang SC", "Noto Sans CJK SC", sans-serif; max-width: 860px;
+       margin: 32px auto; color: #1f2937; line-height: 1.7; }
+h1 { text-align: center; }
+h2 { color: #2c3e50; border-bottom: 1px solid #e5e7eb; padding-bottom: 4px; margin-top: 28px; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border: 1px solid #bdc3c7; padding: 6px 10px; text-align: left; }
+th { background: #ecf0f1; }
+.meta dt { float: left; clear: left; width: 6em; color: #6b7280; }
+.meta dd { margin-left: 7em; }
+.qa { border-left: 3px solid #2980b9; padding: 4px 12px; margin: 14px 0; }
+.qa h3 { color: #2980b9; font-size: 1em; margin: 0 0 6px; }
+.muted { color: #6b7280; }
+</style>
+</head>
+<body>
+$body
+</body>
+</html>
+"""
+
+
+def performance_label(score: float) -> str:
+    """阶段平均分对应的表现评价"""
+    if score >= 0.75:
+        return '优秀'
+    if score >= 0.6:
+        return '良好'
+    if score >= 0.5:
+        return '一般'
+    return '需改进'
+
+
+def records_from_interview_data(interview_data: Dict) -> List[Dict]:
+    """
+    从 IntegratedInterviewManager.get_complete_interview_data() 的结果整理问答记录
+
+    Returns:
+        [{'stage', 'question', 'answer', 'score', 'feedback'}, ...]，各阶段的评估反馈未保存时为空
+    """
+    records = []
+    for stage_key, summary in (interview_data.get('stage_summaries') or {}).items():
+        scores = summary.get('detailed_scores') or []
+        evaluations = summary.get('batch_evaluations') or []
+        for index, response in enumerate(summary.get('question_responses') or []):
+            evaluation = evaluations[index] if index < len(evaluations) else {}
+            records.append({
+                'stage': summary.get('stage_name') or STAGE_TITLES.get(stage_key, stage_key),
+                'question': response.get('question', ''),
+                'answer': response.get('response', ''),
+                'score': scores[index] if index < len(scores) else None,
+                'feedback': evaluation.get('feedback', '')
+            })
+    return records
+
+
+def build_report(records: List[Dict], assessment: Dict, candidate_name: str = '候选人',
+                 track_name: str = '', interview_date: Optional[str] = None) -> List[Dict]:
+    """
+    整理报告版面
+
+    Args:
+        records: 问答记录 [{'stage', 'question', 'answer', 'score', 'feedback', 'timestamp'?}, ...]
+        assessment: IntegratedInterviewManager 的最终评估
+        candidate_name: 候选人姓名
+        track_name: 面试赛道
+        interview_date: 面试日期，默认取第一条记录的时间或今天
+
+    Returns:
+        版面块列表，每块为 {'type': 'title'|'meta'|'heading'|'table'|'bullets'|'paragraph'|'qa', ...}
+    """
+    if interview_date is None:
+        first_timestamp = records[0].get('timestamp') if records else None
+        interview_date = first_timestamp[:10] if first_timestamp else time.strftime('%Y-%m-%d')
+
+    meta = [('候选人', candidate_name)]
+    if track_name:
+        meta.append(('面试赛道', track_name))
+    meta.extend([
+        ('面试日期', interview_date),
+        ('总题数', f"{assessment.get('total_questions', len(records))}题"),
+        ('综合得分', f"{assessment.get('overall_score', 0):.2f}/1.00（{assessment.get('overall_rating', '')}）"),
+        ('评估建议', assessment.get('recommendation', ''))
+    ])
+    blocks = [
+        {'type': 'title', 'text': '面试复盘报告', 'icon': '🎯'},
+        {'type': 'meta', 'items': meta},
+        {'type': 'heading', 'text': '各阶段表现分析', 'icon': '📈'},
+        {'type': 'table', 'header': ['阶段', '题目数量', '平均得分', '表现评价'], 'rows': [
+            [STAGE_TITLES.get(stage_key, stage_key), f"{performance['questions_count']}题",
+             f"{performance['average_score']:.2f}", performance_label(performance['average_score'])]
+            for stage_key, performance in assessment.get('stage_performance', {}).items()
+        ]}
+    ]
+
+    technical = assessment.get('technical_assessment') or {}
+    if technical.get('overall_level') and technical['overall_level'] != '无法评估':
+        blocks.append({'type': 'heading', 'text': '技术能力评估', 'icon': '🛠️'})
+        blocks.append({'type': 'paragraph', 'text': f"技术水平: {technical['overall_level']}"
+                                                    f"（最终难度 {technical.get('final_difficulty', '-')}）"})
+        blocks.append({'type': 'bullets', 'items': technical.get('recommendations', []), 'empty': ''})
+
+    blocks.extend([
+        {'type': 'heading', 'text': '优势表现', 'icon': '✅'},
+        {'type': 'bullets', 'items': assessment.get('strengths', []), 'empty': '建议在各个方面继续努力'},
+        {'type': 'heading', 'text': '待改进方面', 'icon': '⚠️'},
+        {'type': 'bullets', 'items': assessment.get('improvement_areas', []), 'empty': '整体表现良好'},
+        {'type': 'heading', 'text': '详细问答记录', 'icon': '📝'}
+    ])
+    for number, record in enumerate(records, 1):
+        blocks.append({'type': 'qa', 'number': number, **record})
+    return blocks
+
+
+def render_text(blocks: List[Dict]) -> Iterator[str]:
+    """复盘窗口使用的纯文本，逐块生成片段"""
+    for block in blocks:
+        block_type = block['type']
+        if block_type == 'title':
+            yield f"\n{block['icon']} {block['text']}\n{RULE}\n\n"
+        elif block_type == 'meta':
+            for label, value in block['items']:
+                yield f"{label}: {value}\n"
+        elif block_type == 'heading':
+            yield f"\n{RULE}\n{block['icon']} {block['text']}\n{RULE}\n"
+        elif block_type == 'table':
+            for row in block['rows']:
+                yield "\n🔸 {}:\n".format(row[0])
+                for label, value in zip(block['header'][1:], row[1:]):
+                    yield f"   - {label}: {value}\n"
+        elif block_type == 'bullets':
+            if not block['items'] and block['empty']:
+                yield f"{block['empty']}\n"
+            for item in block['items']:
+                yield f"• {item}\n"
+        elif block_type == 'paragraph':
+            yield f"{block['text']}\n"
+        elif block_type == 'qa':
+            yield (
+                f"\n第{block['number']}题 [{block['stage']}]"
+                f"{' - ' + block['timestamp'] if block.get('timestamp') else ''}\n{QA_RULE}\n"
+                f"❓ 问题: {block['question']}\n\n💬 回答: {block['answer']}\n\n"
+                f"📊 得分: {_score_text(block.get('score'))}\n\n💭 反馈: {block.get('feedback') or '无'}\n\n"
+            )
+
+
+def _score_text(score: Optional[float]) -> str:
+    return f"{score:.2f}/1.00" if score is not None else "未评分"
+
+
+@lru_cache(maxsize=1)
+def _html_template():
+    from string import Template
+    return Template(HTML_TEMPLATE)
+
+
+def render_html(blocks: List[Dict], title: str = '面试复盘报告') -> str:
+    """生成单文件 HTML 报告（模板只解析一次）"""
+    parts = []
+    for block in blocks:
+        block_type = block['type']
+        if block_type == 'title':
+            parts.append(f"<h1>{escape(block['text'])}</h1>")
+        elif block_type == 'meta':
+            items = ''.join(f"<dt>{escape(label)}</dt><dd>{escape(str(value))}</dd>" for label, value in block['items'])
+            parts.append(f'<dl class="meta">{items}</dl>')
+        elif block_type == 'heading':
+            parts.append(f"<h2>{escape(block['text'])}</h2>")
+        elif block_type == 'table':
+            if not block['rows']:
+                continue
+            header = ''.join(f"<th>{escape(cell)}</th>" for cell in block['header'])
+            rows = ''.join('<tr>' + ''.join(f"<td>{escape(str(cell))}</td>" for cell in row) + '</tr>'
+                           for row in block['rows'])
+            parts.append(f"<table><tr>{header}</tr>{rows}</table>")
+        elif block_type == 'bullets':
+            if not block['items'] and block['empty']:
+                parts.append(f'<p class="muted">{escape(block["empty"])}</p>')
+            elif block['items']:
+                parts.append('<ul>' + ''.join(f"<li>{escape(str(item))}</li>" for item in block['items']) + '</ul>')
+        elif block_type == 'paragraph':
+            parts.append(f"<p>{escape(block['text'])}</p>")
+        elif block_type == 'qa':
+            parts.append(
+                f'<div class="qa"><h3>第{block["number"]}题 [{escape(block["stage"])}]</h3>'
+                f"<p>问题：{escape(block['question'])}</p><p>回答：{escape(block['answer'])}</p>"
+                f'<p class="muted">得分：{_score_text(block.get("score"))}　'
+                f"反馈：{escape(block.get('feedback') or '无')}</p></div>"
+            )
+    return _html_template().substitute(title=escape(title), body='\n'.join(parts))
+
+
+@lru_cache(maxsize=1)
+def register_cjk_font() -> str:
+    """注册中文字体（每个进程一次），返回字体名"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    candidates = [os.environ[FONT_ENV]] if os.environ.get(FONT_ENV) else []
+    candidates.extend(FONT_CANDIDATES)
+    for path in candidates:
+        if not os.path.exists(path):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont('ReportCJK', path, subfontIndex=0))
+            return 'ReportCJK'
+        except Exception as e:
+            print(f"字体注册失败({path}): {e}")
+    pdfmetrics.registerFont(UnicodeCIDFont(FALLBACK_CID_FONT))
+    return FALLBACK_CID_FONT
+
+
+@lru_cache(maxsize=1)
+def get_styles() -> Dict:
+    """报告段落样式（使用缓存的中文字体）"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+
+    font = register_cjk_font()
+    base = ParagraphStyle('ReportBody', fontName=font, fontSize=10.5, leading=16, wordWrap='CJK')
+    return {
+        'title': ParagraphStyle('ReportTitle', parent=base, fontSize=20, leading=28, alignment=1, spaceAfter=12),
+        'heading': ParagraphStyle('ReportHeading', parent=base, fontSize=14, leading=20, spaceBefore=12,
+                                  spaceAfter=6, textColor=colors.HexColor('#2c3e50')),
+        'body': base,
+        'bullet': ParagraphStyle('ReportBullet', parent=base, leftIndent=12, bulletIndent=2),
+        'qa_title': ParagraphStyle('ReportQATitle', parent=base, fontSize=11, spaceBefore=10,
+                                   textColor=colors.HexColor('#2980b9')),
+        'muted': ParagraphStyle('ReportMuted', parent=base, textColor=colors.HexColor('#6b7280')),
+        'font': font
+    }
+
+
+def iter_flowables(blocks: List[Dict], styles: Dict) -> Iterator[Tuple[int, object]]:
+    """版面块按需转换为 reportlab 流式元素，产出 (块序号, 元素)"""
+    from reportlab.lib import colors
+    from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+    def paragraph(text, style='body', **kwargs):
+        return Paragraph(escape(str(text)).replace('\n', '<br/>'), styles[style], **kwargs)
+
+    for index, block in enumerate(blocks):
+        block_type = block['type']
+        if block_type == 'title':
+            yield index, paragraph(block['text'], 'title')
+        elif block_type == 'meta':
+            for label, value in block['items']:
+                yield index, paragraph(f"{label}：{value}")
+        elif block_type == 'heading':
+            yield index, paragraph(block['text'], 'heading')
+        elif block_type == 'table':
+            if not block['rows']:
+                continue
+            rows = [[paragraph(cell) for cell in row] for row in [block['header']] + block['rows']]
+            table = Table(rows, colWidths=['40%', '20%', '20%', '20%'], repeatRows=1)
+            table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ecf0f1')),
+                ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#bdc3c7')),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+            ]))
+            yield index, table
+        elif block_type == 'bullets':
+            if not block['items'] and block['empty']:
+                yield index, paragraph(block['empty'], 'muted')
+            for item in block['items']:
+                yield index, paragraph(item, 'bullet', bulletText='•')
+        elif block_type == 'paragraph':
+            yield index, paragraph(block['text'])
+        elif block_type == 'qa':
+            yield index, paragraph(f"第{block['number']}题 [{block['stage']}]", 'qa_title')
+            yield index, paragraph(f"问题：{block['question']}")
+            yield index, paragraph(f"回答：{block['answer']}")
+            yield index, paragraph(f"得分：{_score_text(block.get('score'))}    反馈：{block.get('feedback') or '无'}", 'muted')
+            yield index, Spacer(1, 4)
+
+
+def _fill_frame(frame, pending: List[Tuple[int, object]], source: Iterator, pdf) -> int:
+    """
+    排一页：依次放入待排的 (块序号, 元素)，用完后再从 source 取，放不下时按剩余空间拆分，
+    剩余部分留在 pending 中排到下一页。返回放入的元素数
+    """
+    placed = 0
+    while True:
+        if not pending:
+            item = next(source, None)
+            if item is None:
+                return placed
+            pending.append(item)
+        index, head = pending[0]
+        if frame.add(head, pdf, trySplit=0):
+            pending.pop(0)
+            placed += 1
+            continue
+        pieces = frame.split(head, pdf)
+        if len(pieces) > 1 and frame.add(pieces[0], pdf, trySplit=1):
+            pending[0:1] = [(index, piece) for piece in pieces[1:]]
+            placed += 1
+        return placed
+
+
+def render_pdf(blocks: List[Dict], path: str, title: str = '面试复盘报告',
+               progress: Optional[Callable[[int, int, int], None]] = None) -> int:
+    """
+    逐页排版生成 PDF
+
+    Args:
+        blocks: build_report() 的版面块
+        path: 输出路径
+        title: PDF 文档标题
+        progress: 每排完一页调用 progress(已排页数, 已完成块数, 总块数)
+
+    Returns:
+        页数
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Frame
+
+    styles = get_styles()
+    width, height = A4
+    margin = 18 * mm
+    pdf = canvas.Canvas(path, pagesize=A4, pageCompression=1)
+    pdf.setTitle(title)
+
+    source = iter_flowables(blocks, styles)
+    pending = []
+    pages = 0
+    while True:
+        if not pending:
+            item = next(source, None)
+            if item is None:
+                break
+            pending.append(item)
+
+        frame = Frame(margin, margin + 8 * mm, width - 2 * margin, height - 2 * margin - 8 * mm,
+                      leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+        if not _fill_frame(frame, pending, source, pdf):
+            # 空白页也放不下且无法拆分的元素（极少见）直接跳过，避免死循环
+            print(f"报告元素过大，已跳过第{pending[0][0] + 1}块")
+            pending.pop(0)
+            # 本页尚未放入任何内容，继续在同一页排版，不输出空白页
+            continue
+
+        pages += 1
+        pdf.setFont(styles['font'], 9)
+        pdf.drawCentredString(width / 2, margin, f"第 {pages} 页")
+        pdf.showPage()
+        if progress:
+            progress(pages, pending[0][0] if pending else len(blocks), len(blocks))
+    pdf.save()
+    return pages
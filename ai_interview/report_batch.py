@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+批量生成面试报告
+
+读取已完成的面试记录（IntegratedInterviewManager.get_complete_interview_data() 的结果），
+为整批候选人生成 PDF 和 HTML 报告：
+- 多进程并行排版，每个进程启动时注册一次中文字体、解析一次 HTML 模板
+- 输出目录中的 manifest.json 记录每场面试的输入哈希（含版面版本和输出格式），
+  输入未变化且报告文件仍在时直接跳过，重复运行只生成新增或变化的报告
+- 报告先写临时文件再替换，中断后不会留下不完整的报告
+
+用法：
+    python -m ai_interview.report_batch interviews.jsonl --output reports/ --workers 8
+    python -m ai_interview.report_batch archive/ --output reports/ --formats html
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import report
+
+
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_FORMATS = ('pdf', 'html')
+
+
+def iter_interviews(path: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    读取面试记录
+
+    目录：其中每个 .json 文件为一场面试，编号为文件名；
+    .jsonl 文件：每行一场面试，编号取 interview_id 字段，缺省为行号。
+    每条记录可以直接是 get_complete_interview_data() 的结果，
+    也可以是 {'interview_id', 'interview_data', 'candidate_name', 'track', 'interview_date'}（后三项可选）。
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(path, name), 'r', encoding='utf-8') as f:
+                    item = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"{name} 读取失败，已跳过: {e}")
+                continue
+            yield str(item.get('interview_id') or os.path.splitext(name)[0]), item
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"第{line_number}行解析失败，已跳过: {e}")
+                continue
+            yield str(item.get('interview_id') or line_number), item
+
+
+def input_hash(item: Dict, formats: Iterable[str]) -> str:
+    """报告输入的哈希：面试记录、版面版本和输出格式"""
+    payload = json.dumps(item, ensure_ascii=False, sort_keys=True, default=str)
+    key = f"{report.LAYOUT_VERSION}|{','.join(sorted(formats))}|{payload}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def safe_file_name(interview_id: str) -> str:
+    """面试编号转为文件名"""
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', interview_id).strip('._') or 'interview'
+
+
+def _init_worker():
+    """工作进程启动时预先注册字体、构建样式和解析模板，之后各报告共用"""
+    report.register_cjk_font()
+    report.get_styles()
+    report.render_html([])
+
+
+def render_interview(job: Tuple[str, Dict, str, Tuple[str, ...]]) -> Dict:
+    """
+    生成一场面试的报告（在工作进程中执行）
+
+    Returns:
+        {'interview_id', 'status': 'rendered'|'incomplete'|'failed', 'files', 'pages', 'error'}
+    """
+    interview_id, item, output_dir, formats = job
+    data = item.get('interview_data', item)
+    assessment = data.get('final_assessment')
+    if not assessment or 'error' in assessment:
+        return {'interview_id': interview_id, 'status': 'incomplete'}
+
+    resume_data = (data.get('candidate_data') or {}).get('resume_data') or {}
+    candidate_name = item.get('candidate_name') or resume_data.get('name') or '候选人'
+    title = f"{candidate_name} 面试复盘报告"
+    base = os.path.join(output_dir, safe_file_name(interview_id))
+    result = {'interview_id': interview_id, 'status': 'rendered', 'files': [], 'pages': None}
+    try:
+        blocks = report.build_report(report.records_from_interview_data(data), assessment,
+                                     candidate_name=candidate_name, track_name=item.get('track', ''),
+                                     interview_date=item.get('interview_date'))
+        if 'pdf' in formats:
+            result['pages'] = report.render_pdf(blocks, base + '.pdf.tmp', title)
+            os.replace(base + '.pdf.tmp', base + '.pdf')
+            result['files'].append(base + '.pdf')
+        if 'html' in formats:
+            with open(base + '.html.tmp', 'w', encoding='utf-8') as f:
+                f.write(report.render_html(blocks, title))
+            os.replace(base + '.html.tmp', base + '.html')
+            result['files'].append(base + '.html')
+    except Exception as e:
+        result.update(status='failed', error=str(e))
+    return result
+
+
+class ReportBatch:
+    """批量报告生成"""
+
+    def __init__(self, output_dir: str, formats: Iterable[str] = DEFAULT_FORMATS, workers: int = 4,
+                 chunk_size: int = 256):
+        """
+        Args:
+            output_dir: 报告输出目录（同时保存 manifest.json）
+            formats: 输出格式，pdf 和/或 html
+            workers: 排版进程数，1 表示在当前进程生成
+            chunk_size: 每批提交的面试数（每批完成后保存一次 manifest）
+        """
+        self.output_dir = output_dir
+        self.formats = tuple(sorted(set(formats)))
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        os.makedirs(output_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"manifest 读取失败，将重新生成全部报告: {e}")
+            return {}
+
+    def _save_manifest(self):
+        with open(self.manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+
+    def is_current(self, interview_id: str, digest: str) -> bool:
+        """已有报告的输入未变化且文件都在"""
+        entry = self.manifest.get(interview_id)
+        return bool(entry) and entry['hash'] == digest and all(os.path.exists(path) for path in entry['files'])
+
+    def run(self, interviews: Iterable[Tuple[str, Dict]], force: bool = False) -> Dict:
+        """
+        生成报告
+
+        Args:
+            interviews: (面试编号, 面试记录) 序列
+            force: 忽略 manifest，全部重新生成
+
+        Returns:
+            {'total', 'rendered', 'skipped', 'incomplete', 'failed', 'pages', 'elapsed_seconds'}
+        """
+        started = time.time()
+        stats = {'total': 0, 'rendered': 0, 'skipped': 0, 'incomplete': 0, 'failed': 0, 'pages': 0}
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) if self.workers > 1 else None
+        try:
+            batch, digests = [], {}
+            for interview_id, item in interviews:
+                stats['total'] += 1
+                digest = input_hash(item, self.formats)
+                if not force and self.is_current(interview_id, digest):
+                    stats['skipped'] += 1
+                    continue
+                batch.append((interview_id, item, self.output_dir, self.formats))
+                digests[interview_id] = digest
+                if len(batch) >= self.chunk_size:
+                    self._render_batch(batch, digests, pool, stats)
+                    batch, digests = [], {}
+            if batch:
+                self._render_batch(batch, digests, pool, stats)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        stats['elapsed_seconds'] = round(time.time() - started, 2)
+        return stats
+
+    def _render_batch(self, batch: List[Tuple], digests: Dict, pool, stats: Dict):
+        if pool is not None:
+            results = pool.map(render_interview, batch, chunksize=max(1, len(batch) // (self.workers * 4)))
+        else:
+            results = map(render_interview, batch)
+        for result in results:
+            interview_id = result['interview_id']
+            stats[result['status']] += 1
+            if result['status'] == 'rendered':
+                stats['pages'] += result['pages'] or 0
+                self.manifest[interview_id] = {
+                    'hash': digests[interview_id],
+                    'files': result['files'],
+                    'rendered_at': time.strftime('%Y-%m-%d %H:%M:%S')
+                }
+            elif result['status'] == 'failed':
+                print(f"报告生成失败({interview_id}): {result.get('error')}")
+        self._save_manifest()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="批量生成面试报告")
+    parser.add_argument('path', help="面试记录目录（每个 .json 一场）或 JSON Lines 文件")
+    parser.add_argument('--output', default='reports', help="报告输出目录")
+    parser.add_argument('--formats', nargs='+', choices=DEFAULT_FORMATS, default=list(DEFAULT_FORMATS))
+    parser.add_argument('--workers', type=int, default=4, help="排版进程数")
+    parser.add_argument('--force', action='store_true', help="忽略已有报告，全部重新生成")
+    args = parser.parse_args(argv)
+
+    batch = ReportBatch(args.output, formats=args.formats, workers=args.workers)
+    stats = batch.run(iter_interviews(args.path), force=args.force)
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
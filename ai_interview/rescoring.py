@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+"""
+离线批量重评分工具
+
+调整评估权重（如 TechnicalEvaluator.evaluation_criteria 或 AI/规则 0.8/0.2 融合比例）后，
+对归档的面试回答重新计算得分：
+
+- 归档记录为 JSON Lines，每行包含 question、answer、stage、context 等字段
+- AI子评分按“模型 + 评估消息 + 输出Schema”的哈希缓存在 SQLite 中，提示词未变化时直接复用，
+  只重新计算规则指标和加权融合
+- 缓存未命中的记录通过有界并发队列调用LLM，相同提示词只请求一次
+- 规则指标按批（RuleFeatureBatch）一次性计算
+- 输出新的得分表（CSV）和与原得分的差异统计，可选导出规则特征表用于训练快速评分模型
+
+用法：
+    python -m ai_interview.rescoring archive.jsonl --output rescored.csv --workers 8
+    python -m ai_interview.rescoring archive.jsonl --offline --features features.csv
+
+记录格式示例：
+    {"id": "s1-q3", "stage": 3, "question": "如何设计缓存？", "difficulty": "B2",
+     "answer": "...", "context": {"jd_data": {...}}, "score": 0.72}
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import sqlite3
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List, Optional
+
+from . import metrics
+from .stages.stage1_non_technical import NonTechnicalEvaluator
+from .stages.stage2_experience import ExperienceEvaluator
+from .stages.rule_features import FEATURE_NAMES, RuleFeatureBatch
+from .stages.stage3_technical import TechnicalEvaluator
+
+
+# 各阶段缺省的问题类型（归档记录未给出 question_type 时使用）
+DEFAULT_QUESTION_TYPES = {
+    1: 'self_introduction',
+    2: 'deep_dive',
+    3: 'technical'
+}
+
+# 每批计算规则指标的记录数
+FEATURE_BATCH_SIZE = 256
+
+
+class AIScoreCache:
+    """AI子评分缓存（SQLite），键为模型、评估消息与输出Schema的哈希"""
+
+    def __init__(self, db_path: str = 'rescoring_cache.sqlite'):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ai_scores ("
+            "prompt_key TEXT PRIMARY KEY, model TEXT, evaluation TEXT, created_at REAL)"
+        )
+        self.conn.commit()
+        self._pending_writes = 0
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], format=None) -> str:
+        """生成缓存键（系统提示词或输出Schema变化都会使旧结果失效）"""
+        payload = json.dumps({'messages': messages, 'format': format},
+                             ensure_ascii=False, sort_keys=True)
+        digest = hashlib.sha256()
+        digest.update(model.encode('utf-8'))
+        digest.update(b'\x00')
+        digest.update(payload.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """读取缓存的AI评估结果"""
+        row = self.conn.execute(
+            "SELECT evaluation FROM ai_scores WHERE prompt_key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, model: str, evaluation: Dict):
+        """写入AI评估结果，批量提交以减少磁盘同步"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO ai_scores VALUES (?, ?, ?, ?)",
+            (key, model, json.dumps(evaluation, ensure_ascii=False), time.time())
+        )
+        self._pending_writes += 1
+        if self._pending_writes >= 500:
+            self.flush()
+
+    def flush(self):
+        """提交未落盘的写入"""
+        self.conn.commit()
+        self._pending_writes = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+class InterviewRescorer:
+    """
+    归档面试回答的批量重评分器
+
+    缓存命中的记录在主线程内直接完成融合计算；
+    缓存未命中的记录提交到线程池，在途请求数不超过 max_pending。
+    """
+
+    def __init__(self, cache: AIScoreCache, workers: int = 4,
+                 max_pending: Optional[int] = None, offline: bool = False,
+                 collect_features: bool = False):
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.max_pending = max_pending or self.workers * 4
+        self.offline = offline
+        self.collect_features = collect_features
+        self.evaluators = {
+            1: NonTechnicalEvaluator(),
+            2: ExperienceEvaluator(),
+            3: TechnicalEvaluator()
+        }
+        self.stats = {
+            'cache_hits': 0,
+            'llm_calls': 0,
+            'llm_errors': 0,
+            'skipped': 0
+        }
+
+    def rescore(self, records: Iterator[Dict]) -> List[Dict]:
+        """
+        对记录流重新评分
+
+        Args:
+            records: 归档记录迭代器
+
+        Returns:
+            按输入顺序排列的新得分行
+        """
+        results = []
+        inflight = {}   # prompt_key -> future
+        waiting = {}    # prompt_key -> [(结果下标, 记录上下文)]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for job in self._iter_jobs(records):
+                index = len(results)
+                results.append(None)
+
+                cached = self.cache.get(job['prompt_key'])
+                metrics.record_cache('rescoring_ai_scores', cached is not None)
+                if cached is not None:
+                    self.stats['cache_hits'] += 1
+                    results[index] = self._finish(job, cached, 'cache')
+                    continue
+
+                if self.offline:
+                    results[index] = self._finish(job, None, 'none')
+                    continue
+
+                if job['prompt_key'] in inflight:
+                    # 相同提示词已在请求中，等待同一个结果
+                    waiting[job['prompt_key']].append((index, job))
+                    continue
+
+                while len(inflight) >= self.max_pending:
+                    self._drain(inflight, waiting, results, return_when=FIRST_COMPLETED)
+
+                evaluator = self.evaluators[job['stage']]
+                inflight[job['prompt_key']] = pool.submit(
+                    evaluator._request_ai_evaluation, job['prompt'], job['question_data']
+                )
+                waiting[job['prompt_key']] = [(index, job)]
+
+            while inflight:
+                self._drain(inflight, waiting, results, return_when=FIRST_COMPLETED)
+
+        self.cache.flush()
+        return results
+
+    def _drain(self, inflight: Dict, waiting: Dict, results: List, return_when):
+        """等待在途请求完成并写回结果"""
+        done, _ = wait(list(inflight.values()), return_when=return_when)
+        for key in [k for k, f in inflight.items() if f in done]:
+            future = inflight.pop(key)
+            jobs = waiting.pop(key)
+            try:
+                ai_evaluation = future.result()
+            except Exception as e:
+                print(f"重评分调用模型失败: {e}")
+                ai_evaluation = None
+            if ai_evaluation and ai_evaluation.get('scores'):
+                self.stats['llm_calls'] += 1
+                self.cache.put(key, jobs[0][1]['model'], ai_evaluation)
+                source = 'llm'
+            else:
+                # 调用失败或回复中没有可用的维度评分：不写缓存，下次重评分时重新请求模型
+                self.stats['llm_errors'] += 1
+                ai_evaluation = None
+                source = 'error'
+            for index, job in jobs:
+                results[index] = self._finish(job, ai_evaluation, source)
+
+    def _iter_jobs(self, records: Iterator[Dict]) -> Iterator[Dict]:
+        """规范化记录，每 FEATURE_BATCH_SIZE 条一批计算规则指标"""
+        batch = []
+        for record in records:
+            job = self._prepare(record)
+            if job is None:
+                self.stats['skipped'] += 1
+                continue
+            batch.append(job)
+            if len(batch) >= FEATURE_BATCH_SIZE:
+                yield from self._attach_rule_metrics(batch)
+                batch = []
+        if batch:
+            yield from self._attach_rule_metrics(batch)
+
+    def _attach_rule_metrics(self, jobs: List[Dict]) -> Iterator[Dict]:
+        features = RuleFeatureBatch(
+            [job['answer'] for job in jobs],
+            [job['context'].get('technical_keywords', []) for job in jobs]
+        )
+        for index, job in enumerate(jobs):
+            job['rule_metrics'] = features.rule_metrics(
+                index, job['stage'], job['question_data'].get('question_type')
+            )
+            job['features'] = features.features[index]
+            yield job
+
+    def _prepare(self, record: Dict) -> Optional[Dict]:
+        """规范化归档记录并构建评估提示词"""
+        stage = self._normalize_stage(record.get('stage'))
+        answer = record.get('answer')
+        if stage is None or answer is None:
+            return None
+
+        question = record.get('question', '')
+        if isinstance(question, dict):
+            question_data = dict(question)
+        else:
+            question_data = {'question': question}
+        question_data.setdefault('question_type', record.get('question_type') or DEFAULT_QUESTION_TYPES[stage])
+        if record.get('difficulty'):
+            question_data.setdefault('difficulty', record['difficulty'])
+
+        context = record.get('context') or {}
+        evaluator = self.evaluators[stage]
+        prompt = evaluator._build_evaluation_prompt(answer, question_data, context)
+        messages = evaluator._evaluation_messages(prompt)
+        output_format = evaluator._evaluation_format(question_data)
+
+        return {
+            'id': record.get('id'),
+            'stage': stage,
+            'answer': answer,
+            'question_data': question_data,
+            'context': context,
+            'old_score': record.get('score'),
+            'prompt': prompt,
+            'model': evaluator.model_name,
+            'prompt_key': AIScoreCache.make_key(evaluator.model_name, messages, output_format)
+        }
+
+    def _finish(self, job: Dict, ai_evaluation: Optional[Dict], source: str) -> Dict:
+        """复用AI子评分，仅重新计算规则指标与加权融合"""
+        evaluator = self.evaluators[job['stage']]
+        evaluation = evaluator._assemble_evaluation(
+            job['answer'], job['question_data'], job['context'], ai_evaluation or {},
+            rule_metrics=job.get('rule_metrics')
+        )
+        new_score = evaluation['score']
+        old_score = job['old_score']
+        delta = round(new_score - old_score, 4) if isinstance(old_score, (int, float)) else None
+
+        row = {
+            'id': job['id'],
+            'stage': job['stage'],
+            'question_type': job['question_data'].get('question_type'),
+            'old_score': old_score,
+            'new_score': new_score,
+            'delta': delta,
+            'ai_source': source
+        }
+        if self.collect_features:
+            row['features'] = job['features'].tolist()
+        return row
+
+    @staticmethod
+    def _normalize_stage(stage) -> Optional[int]:
+        """兼容 1 / "1" / "stage1" 等阶段写法"""
+        if isinstance(stage, str):
+            stage = stage.lower().replace('stage', '').strip()
+        try:
+            stage = int(stage)
+        except (TypeError, ValueError):
+            return None
+        return stage if stage in DEFAULT_QUESTION_TYPES else None
+
+
+def compute_diff_statistics(rows: List[Dict]) -> Dict:
+    """计算新旧得分的差异统计"""
+    rows = [r for r in rows if r is not None]
+    deltas = [r['delta'] for r in rows if r['delta'] is not None]
+
+    summary = {
+        'total_records': len(rows),
+        'compared_records': len(deltas),
+        'changed_records': sum(1 for d in deltas if d != 0),
+        'mean_delta': round(statistics.fmean(deltas), 4) if deltas else 0.0,
+        'mean_abs_delta': round(statistics.fmean(abs(d) for d in deltas), 4) if deltas else 0.0,
+        'max_abs_delta': round(max((abs(d) for d in deltas), default=0.0), 4),
+        'by_stage': {}
+    }
+
+    for stage in sorted({r['stage'] for r in rows}):
+        stage_rows = [r for r in rows if r['stage'] == stage]
+        old_scores = [r['old_score'] for r in stage_rows if isinstance(r['old_score'], (int, float))]
+        new_scores = [r['new_score'] for r in stage_rows]
+        summary['by_stage'][f'stage{stage}'] = {
+            'records': len(stage_rows),
+            'old_mean': round(statistics.fmean(old_scores), 4) if old_scores else None,
+            'new_mean': round(statistics.fmean(new_scores), 4) if new_scores else None
+        }
+
+    return summary
+
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    """逐行读取 JSON Lines 文件，跳过空行和无法解析的行"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"第{line_number}行解析失败，已跳过: {e}")
+
+
+def write_score_table(rows: List[Dict], path: str):
+    """写出新的得分表"""
+    fields = ['id', 'stage', 'question_type', 'old_score', 'new_score', 'delta', 'ai_source']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            if row is not None:
+                writer.writerow(row)
+
+
+def write_feature_table(rows: List[Dict], path: str):
+    """写出规则特征表（每行一条回答，末列为新得分，可作为快速评分模型的训练数据）"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'stage', 'question_type'] + list(FEATURE_NAMES) + ['new_score'])
+        for row in rows:
+            if row is not None and 'features' in row:
+                writer.writerow([row['id'], row['stage'], row['question_type']] + row['features'] + [row['new_score']])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="归档面试回答的离线批量重评分")
+    parser.add_argument('input', help="归档记录（JSON Lines）")
+    parser.add_argument('--output', default='rescored_scores.csv', help="新的得分表（CSV）")
+    parser.add_argument('--stats', help="差异统计输出路径（JSON），缺省打印到标准输出")
+    parser.add_argument('--cache', default='rescoring_cache.sqlite', help="AI子评分缓存数据库")
+    parser.add_argument('--workers', type=int, default=4, help="并发调用模型的线程数")
+    parser.add_argument('--max-pending', type=int, default=None, help="在途请求上限，缺省为 workers*4")
+    parser.add_argument('--offline', action='store_true', help="不调用模型，缓存未命中时仅使用规则评分")
+    parser.add_argument('--features', help="规则特征表输出路径（CSV）")
+    args = parser.parse_args(argv)
+
+    cache = AIScoreCache(args.cache)
+    rescorer = InterviewRescorer(cache, workers=args.workers, max_pending=args.max_pending,
+                                 offline=args.offline, collect_features=bool(args.features))
+
+    started = time.time()
+    try:
+        rows = rescorer.rescore(iter_jsonl(args.input))
+    finally:
+        cache.close()
+
+    write_score_table(rows, args.output)
+    if args.features:
+        write_feature_table(rows, args.features)
+    summary = compute_diff_statistics(rows)
+    summary.update(rescorer.stats)
+    summary['elapsed_seconds'] = round(time.time() - started, 2)
+
+    if args.stats:
+        with open(args.stats, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
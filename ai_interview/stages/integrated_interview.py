@@ -6,7 +6,10 @@
 整合了所有阶段的功能，支持流程控制、数据传递和综合评估。
 """
 
+import time
+import uuid
 from typing import Dict, List, Optional, Tuple
+from .. import metrics, tracing
 from .stage1_non_technical import NonTechnicalQuestionEngine
 from .stage2_experience import ExperienceQuestionEngine
 from .stage3_technical import TechnicalQuestionEngine
@@ -17,13 +20,29 @@ class IntegratedInterviewManager:
     集成面试管理器
     
     统一管理三阶段面试流程，提供完整的面试体验
+    
+    deferred_scoring=True 时第一、二阶段使用延迟评分：每题只记录回答，
+    阶段结束时一次批量评分；第三阶段依赖单题得分调整难度，仍逐题评估。
+    
+    传入 jd_store 后，start_interview() 可以直接使用JD编号代替完整的JD数据。
+    
+    irt=True 时第三阶段使用IRT难度引擎（按能力估计选题，达到目标精度提前结束）。
+    
+    传入 event_log（InterviewEventLog）后，每题的问答、得分和耗时、阶段汇总和最终评估都记录为事件，
+    写入在后台完成，不增加每轮的响应时间。
+    
+    question_stats（QuestionStatsStore）为第三阶段的题目作答统计，缺省时只在内存中统计；
+    需要跨会话累积并持久化时传入 get_question_stats()。
     """
     
-    def __init__(self):
+    def __init__(self, deferred_scoring: bool = False, jd_store=None, irt: bool = False, event_log=None,
+                 question_stats=None):
         # 初始化三个阶段的引擎
-        self.stage1_engine = NonTechnicalQuestionEngine()
-        self.stage2_engine = ExperienceQuestionEngine()
-        self.stage3_engine = TechnicalQuestionEngine()
+        self.stage1_engine = NonTechnicalQuestionEngine(deferred_scoring=deferred_scoring)
+        self.stage2_engine = ExperienceQuestionEngine(deferred_scoring=deferred_scoring)
+        self.stage3_engine = TechnicalQuestionEngine(irt=irt, question_stats=question_stats)
+        self.jd_store = jd_store
+        self.event_log = event_log
         
         # 当前状态
         self.current_stage = 0  # 0: 未开始, 1-3: 对应三个阶段, 4: 完成
@@ -38,8 +57,11 @@ class IntegratedInterviewManager:
         # 面试数据
         self.resume_data = None
         self.jd_data = None
+        self.jd_id = None
         self.stage_summaries = {}
         self.overall_scores = []
+        self.interview_id = None
+        self._question_issued_at = None
         
     def start_interview(self, resume_data: Dict, jd_data: Dict) -> Dict:
         """
@@ -47,13 +69,19 @@ class IntegratedInterviewManager:
         
         Args:
             resume_data: 简历数据
-            jd_data: 职位描述数据
+            jd_data: 职位描述数据，或JD存储中的JD编号
             
         Returns:
             第一阶段的第一个问题
         """
+        if isinstance(jd_data, str):
+            jd_data = self._load_jd(jd_data)
+        
         self.resume_data = resume_data
         self.jd_data = jd_data
+        self.jd_id = jd_data.get('jd_id')
+        if self.current_stage not in (1, 2, 3):
+            metrics.ACTIVE_SESSIONS.inc()
         self.current_stage = 1
         
         # 重置所有状态
@@ -63,12 +91,39 @@ class IntegratedInterviewManager:
         # 开始第一阶段
         first_question = self.stage1_engine.start_stage(resume_data, jd_data)
         
+        self.interview_id = uuid.uuid4().hex[:16]
+        self._question_issued_at = time.time()
+        if self.event_log is not None:
+            self.event_log.append(self.interview_id, 'interview_started', stage=1,
+                                  resume_data=resume_data, jd_data=jd_data, jd_id=self.jd_id)
+        
         return {
             **first_question,
             'interview_progress': self.get_progress_info(),
             'stage_info': self.get_current_stage_info()
         }
     
+    def prepare_interview(self, resume_data: Dict, jd_data: Dict):
+        """
+        简历和JD解析完成后调用：在后台预生成第一阶段的问题，开始面试时第一题可直接给出
+        
+        Args:
+            resume_data: 简历数据
+            jd_data: 职位描述数据，或JD存储中的JD编号
+        """
+        if isinstance(jd_data, str):
+            jd_data = self._load_jd(jd_data)
+        self.stage1_engine.prepare(resume_data, jd_data)
+    
+    def _load_jd(self, jd_id: str) -> Dict:
+        """按编号从JD存储读取JD"""
+        if self.jd_store is None:
+            raise ValueError("未配置JD存储，无法按编号加载JD")
+        jd_data = self.jd_store.get(jd_id)
+        if jd_data is None:
+            raise ValueError(f"未找到JD: {jd_id}")
+        return jd_data
+    
     def process_answer_and_get_next_question(self, user_response: str, 
                                            current_question: Dict) -> Dict:
         """
@@ -81,18 +136,64 @@ class IntegratedInterviewManager:
         Returns:
             下一个问题或阶段转换信息
         """
+        stage = self.current_stage
+        answered_at = time.time()
+        started = time.perf_counter()
+        
         # 根据当前阶段处理回答
-        if self.current_stage == 1:
-            return self._handle_stage1_answer(user_response, current_question)
-        elif self.current_stage == 2:
-            return self._handle_stage2_answer(user_response, current_question)
-        elif self.current_stage == 3:
-            return self._handle_stage3_answer(user_response, current_question)
-        else:
-            return {
-                'error': '面试状态异常',
-                'current_stage': self.current_stage
-            }
+        with tracing.span('interview.answer', stage=self.current_stage):
+            if self.current_stage == 1:
+                result = self._handle_stage1_answer(user_response, current_question)
+            elif self.current_stage == 2:
+                result = self._handle_stage2_answer(user_response, current_question)
+            elif self.current_stage == 3:
+                result = self._handle_stage3_answer(user_response, current_question)
+            else:
+                return {
+                    'error': '面试状态异常',
+                    'current_stage': self.current_stage
+                }
+        
+        if self.event_log is not None:
+            self._record_turn(stage, user_response, current_question, result,
+                              answered_at, time.perf_counter() - started)
+        self._question_issued_at = time.time() if result.get('question') else None
+        return result
+    
+    def _record_turn(self, stage: int, user_response: str, question: Dict, result: Dict,
+                     answered_at: float, processing_seconds: float):
+        """记录一题，以及由这一题引起的阶段结束和面试完成"""
+        evaluation = result.get('evaluation') or {}
+        asked_at = self._question_issued_at
+        self.event_log.append(
+            self.interview_id, 'turn', stage=stage,
+            question=question.get('question'),
+            question_id=question.get('question_id'),
+            question_type=question.get('question_type'),
+            category=question.get('category'),
+            difficulty=question.get('difficulty'),
+            answer=user_response,
+            score=evaluation.get('score'),
+            feedback=evaluation.get('feedback', ''),
+            next_difficulty=evaluation.get('next_difficulty'),
+            asked_at=asked_at,
+            answered_at=answered_at,
+            response_seconds=round(answered_at - asked_at, 3) if asked_at else None,
+            processing_seconds=round(processing_seconds, 3)
+        )
+        transition = result.get('stage_transition')
+        if transition:
+            self._record_stage_completed(transition['from_stage'])
+        if result.get('interview_completed'):
+            self._record_stage_completed(3)
+            self.event_log.append(self.interview_id, 'interview_completed', stage=3,
+                                  final_assessment=result.get('final_assessment'))
+    
+    def _record_stage_completed(self, stage: int):
+        stage_key = f"stage{stage}"
+        if stage_key in self.stage_summaries:
+            self.event_log.append(self.interview_id, 'stage_completed', stage=stage,
+                                  stage_key=stage_key, summary=self.stage_summaries[stage_key])
     
     def _handle_stage1_answer(self, user_response: str, current_question: Dict) -> Dict:
         """处理第一阶段回答"""
@@ -113,6 +214,9 @@ class IntegratedInterviewManager:
             # 第一阶段结束，准备进入第二阶段
             stage1_summary = self.stage1_engine.get_stage_summary()
             self.stage_summaries['stage1'] = stage1_summary
+            if evaluation.get('deferred') and stage1_summary.get('batch_evaluations'):
+                # 延迟评分模式下用批量评分结果替换最后一题的占位评估
+                evaluation = stage1_summary['batch_evaluations'][-1]
             self.overall_scores.extend(stage1_summary['detailed_scores'])
             
             # 进入第二阶段
@@ -156,6 +260,9 @@ class IntegratedInterviewManager:
             # 第二阶段结束，准备进入第三阶段
             stage2_summary = self.stage2_engine.get_stage_summary()
             self.stage_summaries['stage2'] = stage2_summary
+            if evaluation.get('deferred') and stage2_summary.get('batch_evaluations'):
+                # 延迟评分模式下用批量评分结果替换最后一题的占位评估
+                evaluation = stage2_summary['batch_evaluations'][-1]
             self.overall_scores.extend(stage2_summary['detailed_scores'])
             
             # 进入第三阶段
@@ -201,6 +308,7 @@ class IntegratedInterviewManager:
             
             # 面试完成
             self.current_stage = 4
+            metrics.ACTIVE_SESSIONS.dec()
             final_assessment = self.generate_final_assessment()
             
             return {
@@ -212,6 +320,35 @@ class IntegratedInterviewManager:
                 'stage_info': self.get_current_stage_info()
             }
     
+    def end_interview(self) -> Dict:
+        """
+        提前结束面试：汇总当前阶段已作答的题目并生成最终评估
+    
+        Returns:
+            最终评估（面试已正常完成时与完成时的评估相同）
+        """
+        engines = {
+            1: ('stage1', self.stage1_engine),
+            2: ('stage2', self.stage2_engine),
+            3: ('stage3', self.stage3_engine)
+        }
+        if self.current_stage in engines:
+            stage_key, engine = engines[self.current_stage]
+            summary = engine.get_stage_summary()
+            if summary['detailed_scores']:
+                self.stage_summaries[stage_key] = summary
+                self.overall_scores.extend(summary['detailed_scores'])
+            stage = self.current_stage
+            self.current_stage = 4
+            metrics.ACTIVE_SESSIONS.dec()
+            if self.event_log is not None:
+                final_assessment = self.generate_final_assessment()
+                self._record_stage_completed(stage)
+                self.event_log.append(self.interview_id, 'interview_completed', stage=stage,
+                                      final_assessment=final_assessment, ended_early=True)
+                return final_assessment
+        return self.generate_final_assessment()
+    
     def get_progress_info(self) -> Dict:
         """获取面试进度信息"""
         total_stages = 3
@@ -387,11 +524,16 @@ class IntegratedInterviewManager:
     
     def reset_interview(self):
         """重置面试状态"""
+        if self.current_stage in (1, 2, 3):
+            metrics.ACTIVE_SESSIONS.dec()
         self.current_stage = 0
         self.resume_data = None
         self.jd_data = None
+        self.jd_id = None
         self.stage_summaries.clear()
         self.overall_scores.clear()
+        self.interview_id = None
+        self._question_issued_at = None
         
         # 重置各阶段引擎
         self.stage1_engine.reset()
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+规则指标
+
+三个阶段的评估器在AI子评分之外都会计算一组规则指标（回答长度、词汇丰富度、结构词、
+技术细节词、经验/规模指标词、数字与单位、技术词汇、JD关键词覆盖度）。
+这里集中定义指标词表和长度分档，评估器逐条计算时使用；
+RuleFeatureBatch 对一批回答一次性计算同样的指标：
+- 所有指标词与技术词表合并为一个 Aho-Corasick 自动机，每条回答只扫描一次
+- 数字与单位用一个预编译正则扫描拼接后的全部回答，再按位置分回各条回答
+- 分档与截断等换算在 NumPy 数组上完成，结果与逐条计算完全一致
+特征矩阵（features）可用于离线重评分，也可作为训练快速评分模型的输入。
+
+用法：
+    batch = RuleFeatureBatch(answers, technical_keywords)
+    batch.features                  # (回答数, len(FEATURE_NAMES)) 的 float64 矩阵
+    batch.scores(2, question_types) # {'keyword_coverage': array, 'detail_score': array, ...}
+    batch.rule_metrics(0, 2, 'deep_dive')   # 与评估器逐条计算相同格式的指标字典
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..keywords import KeywordMatcher, TechLexicon, get_lexicon, matcher_for
+
+
+# 各类指标词（评估器与批量计算共用）
+INDICATOR_WORDS = {
+    # 第一阶段：表达结构词
+    'structure': ['首先', '其次', '然后', '最后', '另外', '因为', '所以', '但是', '然而'],
+    # 第二阶段：技术细节指标词
+    'detail': [
+        '具体', '实现', '优化', '性能', '架构', '设计', '算法', '数据结构',
+        '并发', '分布式', '缓存', '数据库', '接口', 'API', '框架', '库'
+    ],
+    # 第二阶段：经验指标词
+    'experience': [
+        '负责', '主导', '设计', '开发', '实现', '优化', '解决', '处理',
+        '团队', '合作', '协调', '管理', '维护', '部署', '测试'
+    ],
+    # 第二阶段：项目规模指标词
+    'scale': [
+        '用户', '数据', '请求', '并发', '集群', '节点', '服务器',
+        '万', '千', '亿', '千万', '百万'
+    ]
+}
+
+STRUCTURE_WORDS = KeywordMatcher(INDICATOR_WORDS['structure'])
+DETAIL_INDICATORS = KeywordMatcher(INDICATOR_WORDS['detail'])
+# 经验指标词与项目规模指标词，一次扫描分别计数
+EXPERIENCE_INDICATORS = KeywordMatcher.from_groups({
+    'experience': INDICATOR_WORDS['experience'],
+    'scale': INDICATOR_WORDS['scale']
+})
+
+# 第三阶段计入技术词汇评分的词表类别（通用技术词汇与计算机基础）
+TECH_WORD_CATEGORIES = ('concept', 'cs_fundamentals')
+
+# 数量指标：数字及可选的单位
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?(?:%|万|千|亿|MB|GB|TB|ms|s|分钟|小时|天)?')
+
+# 长度分档：(分档上界, 各档得分)，长度小于第 i 个上界时取第 i 档，均不小于时取最后一档
+LENGTH_BANDS = {
+    'stage1': ((50, 200, 500), (0.3, 0.6, 0.9, 1.0)),
+    'stage2_initial': ((200, 500, 1000), (0.3, 0.7, 1.0, 0.9)),   # 第一个经历问题期望更详细，过长扣分
+    'stage2_deep_dive': ((50, 200, 500), (0.2, 0.8, 1.0, 0.9)),   # 深挖问题可以相对简短但要有深度
+    'stage3': ((50, 200, 500), (0.3, 0.7, 1.0, 0.9))
+}
+
+FEATURE_NAMES = (
+    'response_length',      # 去除首尾空白后的字符数
+    'word_count',           # 按空白切分的词数
+    'unique_word_count',    # 不同词数
+    'structure_count',      # 命中的不同结构词数
+    'detail_count',         # 命中的不同技术细节指标词数
+    'experience_count',     # 命中的不同经验指标词数
+    'scale_count',          # 命中的不同规模指标词数
+    'number_count',         # 数字（含单位）出现次数
+    'tech_word_count',      # 命中的第三阶段技术词汇数
+    'keyword_coverage'      # 按词表权重加权的JD关键词覆盖度
+)
+
+
+def length_score(response_length: int, band: str) -> float:
+    """按长度分档取得分"""
+    bounds, scores = LENGTH_BANDS[band]
+    for bound, score in zip(bounds, scores):
+        if response_length < bound:
+            return score
+    return scores[-1]
+
+
+def stage2_length_band(question_type: str) -> str:
+    return 'stage2_initial' if question_type == "initial_experience_request" else 'stage2_deep_dive'
+
+
+def keyword_coverage(user_response: str, mentioned: set, technical_keywords: List[str],
+                     lexicon: TechLexicon) -> Tuple[float, List[str]]:
+    """
+    JD关键词覆盖度（按词表权重加权；词表内的词可以用别名命中，如 k8s → Kubernetes）
+
+    Args:
+        mentioned: 回答中命中的词表规范写法
+        technical_keywords: JD技术关键词
+
+    Returns:
+        (覆盖度, 命中的关键词)
+    """
+    unknown_keywords = [kw for kw in technical_keywords if lexicon.category(kw) is None]
+    if unknown_keywords:
+        mentioned = mentioned | set(matcher_for(unknown_keywords).find(user_response))
+    mentioned_keywords = [kw for kw in technical_keywords if kw in mentioned]
+    total_weight = sum(lexicon.weight(kw) for kw in technical_keywords)
+    coverage = (
+        sum(lexicon.weight(kw) for kw in mentioned_keywords) / total_weight if total_weight > 0 else 0.0
+    )
+    return coverage, mentioned_keywords
+
+
+_combined_matcher = None
+_combined_lexicon = None
+_combined_lock = threading.Lock()
+
+
+def _get_combined_matcher(lexicon: TechLexicon) -> KeywordMatcher:
+    """指标词与技术词表合并的自动机，标签为 (分组, 规范写法)；词表热加载后重新构建"""
+    global _combined_matcher, _combined_lexicon
+    with _combined_lock:
+        if _combined_lexicon is not lexicon:
+            entries = [
+                (word, (group, word)) for group, words in INDICATOR_WORDS.items() for word in words
+            ]
+            entries.extend((surface, ('lexicon', term)) for surface, term in lexicon.surfaces.items())
+            _combined_matcher = KeywordMatcher(entries)
+            _combined_lexicon = lexicon
+        return _combined_matcher
+
+
+class RuleFeatureBatch:
+    """一批回答的规则指标"""
+
+    def __init__(self, answers: Sequence[str],
+                 technical_keywords: Optional[Union[List[str], Sequence[List[str]]]] = None,
+                 lexicon: Optional[TechLexicon] = None):
+        """
+        Args:
+            answers: 回答文本
+            technical_keywords: JD技术关键词；所有回答共用一个列表，或每条回答各一个列表
+            lexicon: 技术词表，默认为共享词表
+        """
+        self.answers = list(answers)
+        self.lexicon = lexicon or get_lexicon()
+        n = len(self.answers)
+        if not technical_keywords:
+            keyword_lists = [[]] * n
+        elif all(isinstance(keyword, str) for keyword in technical_keywords):
+            keyword_lists = [list(technical_keywords)] * n
+        else:
+            keyword_lists = [list(keywords or []) for keywords in technical_keywords]
+            if len(keyword_lists) != n:
+                raise ValueError("technical_keywords 数量与回答数量不一致")
+
+        self.features = np.zeros((n, len(FEATURE_NAMES)), dtype=np.float64)
+        self.mentioned_keywords = []
+        self.numbers = self._scan_numbers()
+        self._columns = {name: index for index, name in enumerate(FEATURE_NAMES)}
+        self._length_scores_cache = {}
+        self._metric_scores_cache = {}
+
+        matcher = _get_combined_matcher(self.lexicon)
+        categories = self.lexicon.categories
+        columns = self._columns
+        group_columns = [(group, columns[f'{group}_count']) for group in INDICATOR_WORDS]
+        for row, (answer, keywords) in enumerate(zip(self.answers, keyword_lists)):
+            words = answer.split()
+            hits = {label for _, _, label in matcher.finditer(answer)}
+            terms = {term for group, term in hits if group == 'lexicon'}
+            coverage, mentioned = keyword_coverage(answer, terms, keywords, self.lexicon)
+            self.mentioned_keywords.append(mentioned)
+
+            values = self.features[row]
+            values[columns['response_length']] = len(answer.strip())
+            values[columns['word_count']] = len(words)
+            values[columns['unique_word_count']] = len(set(words))
+            for group, column in group_columns:
+                values[column] = sum(1 for hit_group, _ in hits if hit_group == group)
+            values[columns['number_count']] = len(self.numbers[row])
+            values[columns['tech_word_count']] = sum(
+                1 for term in terms if categories.get(term) in TECH_WORD_CATEGORIES
+            )
+            values[columns['keyword_coverage']] = coverage
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def _scan_numbers(self) -> List[List[str]]:
+        """一次正则扫描全部回答（以 \\x00 分隔），按起始位置分回各条回答"""
+        numbers = [[] for _ in self.answers]
+        if not self.answers:
+            return numbers
+        offsets = np.cumsum([0] + [len(answer) + 1 for answer in self.answers[:-1]])
+        matches = list(NUMBER_PATTERN.finditer('\x00'.join(self.answers)))
+        if matches:
+            rows = np.searchsorted(offsets, [match.start() for match in matches], side='right') - 1
+            for row, match in zip(rows, matches):
+                numbers[row].append(match.group())
+        return numbers
+
+    def column(self, name: str) -> np.ndarray:
+        return self.features[:, self._columns[name]]
+
+    def scores(self, stage: int, question_types: Optional[Union[str, Sequence[str]]] = None) -> Dict[str, np.ndarray]:
+        """
+        各阶段规则指标得分（与评估器逐条计算的公式相同）
+
+        Args:
+            stage: 1、2、3
+            question_types: 第二阶段的问题类型（决定长度分档），单个值或每条回答一个值
+        """
+        if stage == 1:
+            return {
+                'length_score': self._length_scores('stage1'),
+                'vocabulary_score': np.minimum(
+                    self.column('unique_word_count') / np.maximum(self.column('word_count'), 1) * 2, 1.0
+                ),
+                'structure_score': np.minimum(self.column('structure_count') / 3, 1.0)
+            }
+        if stage == 2:
+            if question_types is None or isinstance(question_types, str):
+                question_types = [question_types] * len(self)
+            bands = np.array([stage2_length_band(question_type) == 'stage2_initial'
+                              for question_type in question_types], dtype=bool)
+            return {
+                'keyword_coverage': self.column('keyword_coverage'),
+                'detail_score': np.minimum(self.column('detail_count') / 8, 1.0),
+                'number_score': np.minimum(self.column('number_count') / 5, 1.0),
+                'experience_score': np.minimum(self.column('experience_count') / 6, 1.0),
+                'scale_score': np.minimum(self.column('scale_count') / 3, 1.0),
+                'length_score': np.where(
+                    bands, self._length_scores('stage2_initial'), self._length_scores('stage2_deep_dive')
+                )
+            }
+        if stage == 3:
+            return {
+                'length_score': self._length_scores('stage3'),
+                'tech_score': np.minimum(self.column('tech_word_count') / 3, 1.0)
+            }
+        raise ValueError(f"未知的阶段: {stage}")
+
+    def _length_scores(self, band: str) -> np.ndarray:
+        scores = self._length_scores_cache.get(band)
+        if scores is None:
+            bounds, band_scores = LENGTH_BANDS[band]
+            index = np.searchsorted(np.array(bounds), self.column('response_length'), side='right')
+            scores = self._length_scores_cache[band] = np.array(band_scores)[index]
+        return scores
+
+    def rule_metrics(self, index: int, stage: int, question_type: Optional[str] = None) -> Dict:
+        """
+        单条回答的规则指标，格式与评估器逐条计算的结果相同，可直接传给 _assemble_evaluation()
+
+        第二阶段返回 {'technical_analysis', 'experience_analysis'}，其他阶段返回基础指标字典
+        """
+        key = (stage, question_type if stage == 2 else None)
+        scores = self._metric_scores_cache.get(key)
+        if scores is None:
+            scores = self._metric_scores_cache[key] = self.scores(stage, question_type)
+        values = {name: float(array[index]) for name, array in scores.items()}
+        response_length = int(self.column('response_length')[index])
+        word_count = int(self.column('word_count')[index])
+
+        if stage == 2:
+            return {
+                'technical_analysis': {
+                    'keyword_coverage': values['keyword_coverage'],
+                    'mentioned_keywords': list(self.mentioned_keywords[index]),
+                    'detail_score': values['detail_score'],
+                    'number_score': values['number_score'],
+                    'technical_numbers': self.numbers[index][:10]
+                },
+                'experience_analysis': {
+                    'experience_score': values['experience_score'],
+                    'scale_score': values['scale_score'],
+                    'length_score': values['length_score'],
+                    'response_length': response_length
+                }
+            }
+        values.update(response_length=response_length, word_count=word_count)
+        return values
+
+
+def extract_features(answers: Sequence[str],
+                     technical_keywords: Optional[Union[List[str], Sequence[List[str]]]] = None) -> np.ndarray:
+    """批量计算规则特征矩阵，列顺序见 FEATURE_NAMES"""
+    return RuleFeatureBatch(answers, technical_keywords).features
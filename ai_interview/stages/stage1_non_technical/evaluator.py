@@ -6,15 +6,20 @@
 完整性等多个维度进行综合评估。
 """
 
-import ollama
-import re
 from typing import Dict, List, Optional
+from ... import llm, metrics, tracing
+from ..structured_evaluation import (
+    EvaluationParseError, build_batch_evaluation_schema, build_evaluation_schema,
+    parse_batch_evaluation, parse_structured_evaluation, weighted_score
+)
+from ..rule_features import STRUCTURE_WORDS, length_score
 
 
 class NonTechnicalEvaluator:
     """非技术问题评估器"""
     
     def __init__(self):
+        self.model_name = llm.MODEL_NAME
         self.evaluation_criteria = {
             "self_introduction": {
                 "communication": 0.3,    # 表达清晰度
@@ -39,6 +44,36 @@ class NonTechnicalEvaluator:
                 "problem_solving": 0.3   # 问题解决
             }
         }
+        
+        # 评估维度的中文名称和评分说明（提示词与解析修复共用）
+        self.dimension_descriptions = {
+            "communication": ("表达清晰度", "语言表达是否清晰、流畅、有条理"),
+            "completeness": ("信息完整性", "是否包含教育背景、工作经历、技能等关键信息"),
+            "relevance": ("与岗位相关性", "介绍内容与目标职位的相关程度"),
+            "logic": ("逻辑结构", "介绍是否有清晰的逻辑结构和层次"),
+            "clarity": ("目标清晰度", "职业目标是否明确、具体"),
+            "feasibility": ("规划可行性", "规划是否现实、可执行"),
+            "match": ("与岗位匹配度", "规划与目标职位的匹配程度"),
+            "motivation": ("动机合理性", "选择这个发展方向的动机是否合理"),
+            "knowledge": ("了解程度", "对公司和岗位的了解深度"),
+            "preparation": ("准备充分性", "面试前的准备是否充分"),
+            "sincerity": ("求职诚意", "对这个职位的兴趣和诚意"),
+            "values": ("价值观", "工作价值观是否积极、合理"),
+            "teamwork": ("团队合作", "团队合作意识和能力"),
+            "problem_solving": ("问题解决", "面对问题的态度和解决能力")
+        }
+        self.text_fields = ['overall_comment', 'improvement_suggestions']
+        self.field_aliases = {
+            label: key for key, (label, _) in self.dimension_descriptions.items()
+        }
+        self.field_aliases.update({'总体评价': 'overall_comment', '改进建议': 'improvement_suggestions'})
+        
+        # 系统提示词与单题无关，保持字节稳定以复用服务端的前缀缓存
+        self.system_prompt = self._build_system_prompt()
+    
+    def _get_criteria(self, question_type: str) -> Dict[str, float]:
+        """获取问题类型对应的评估维度权重，未知类型按自我介绍标准评估"""
+        return self.evaluation_criteria.get(question_type, self.evaluation_criteria['self_introduction'])
     
     def evaluate_response(self, user_response: str, question_data: Dict, context: Dict) -> Dict:
         """
@@ -58,142 +93,206 @@ class NonTechnicalEvaluator:
             # AI评估
             ai_evaluation = self._ai_evaluate(user_response, question_data, context)
             
-            # 基础评估
-            basic_evaluation = self._basic_evaluate(user_response, question_type)
-            
-            # 综合评分
-            final_score = self._calculate_final_score(ai_evaluation, basic_evaluation, question_type)
-            
-            return {
-                'score': final_score,
-                'ai_evaluation': ai_evaluation,
-                'basic_metrics': basic_evaluation,
-                'question_type': question_type,
-                'feedback': self._generate_feedback(ai_evaluation, basic_evaluation, question_type),
-                'suggestions': self._generate_suggestions(ai_evaluation, basic_evaluation, question_type)
-            }
+            return self._assemble_evaluation(user_response, question_data, context, ai_evaluation)
             
         except Exception as e:
             print(f"评估过程出错: {e}")
             # 备用评估
-            fallback_score = self._fallback_evaluate(user_response, question_type)
-            return {
-                'score': fallback_score,
-                'ai_evaluation': None,
-                'basic_metrics': None,
-                'question_type': question_type,
-                'feedback': "回答已记录，请继续下一个问题。",
-                'suggestions': []
-            }
+            return self._fallback_result(user_response, question_type)
+    
+    def evaluate_batch(self, items: List[Dict]) -> List[Dict]:
+        """
+        阶段结束时批量评估多条回答（延迟评分模式）
+        
+        评估说明只发送一次，模型按条目输出JSON评分；
+        缺失或无法解析的条目单独走规则评估，不影响其他条目。
+        
+        Args:
+            items: [{'user_response': ..., 'question_data': ..., 'context': ...}, ...]
+            
+        Returns:
+            与输入顺序一致的评估结果列表，格式同 evaluate_response
+        """
+        if not items:
+            return []
+        
+        try:
+            ai_evaluations = self._ai_evaluate_batch(items)
+        except Exception as e:
+            print(f"批量评估过程出错: {e}")
+            ai_evaluations = [None] * len(items)
+        
+        evaluations = []
+        for item, ai_evaluation in zip(items, ai_evaluations):
+            if ai_evaluation is None:
+                question_type = item['question_data'].get('question_type', 'general')
+                evaluations.append(self._fallback_result(item['user_response'], question_type))
+            else:
+                evaluations.append(self._assemble_evaluation(
+                    item['user_response'], item['question_data'], item.get('context', {}), ai_evaluation
+                ))
+        return evaluations
+    
+    def _fallback_result(self, user_response: str, question_type: str) -> Dict:
+        """AI评估不可用时的备用评估结果"""
+        return {
+            'score': self._fallback_evaluate(user_response, question_type),
+            'ai_evaluation': None,
+            'basic_metrics': None,
+            'question_type': question_type,
+            'feedback': "回答已记录，请继续下一个问题。",
+            'suggestions': []
+        }
+    
+    def _assemble_evaluation(self, user_response: str, question_data: Dict, context: Dict,
+                             ai_evaluation: Optional[Dict], rule_metrics: Optional[Dict] = None) -> Dict:
+        """
+        基于AI子评分和规则指标组装评估结果
+        
+        AI子评分可以来自实时调用，也可以来自离线重评分时的缓存，
+        加权融合逻辑只在这里计算一次。
+        rule_metrics 为批量预先计算的基础评估（RuleFeatureBatch.rule_metrics()），缺省时逐条计算。
+        """
+        question_type = question_data.get('question_type', 'general')
+        
+        with tracing.span('evaluate.rules', stage=1, question_type=question_type):
+            # 基础评估
+            basic_evaluation = rule_metrics or self._basic_evaluate(user_response, question_type)
+            
+            # 综合评分
+            final_score = self._calculate_final_score(ai_evaluation, basic_evaluation, question_type)
+        
+        return {
+            'score': final_score,
+            'ai_evaluation': ai_evaluation,
+            'basic_metrics': basic_evaluation,
+            'question_type': question_type,
+            'feedback': self._generate_feedback(ai_evaluation, basic_evaluation, question_type),
+            'suggestions': self._generate_suggestions(ai_evaluation, basic_evaluation, question_type)
+        }
     
     def _ai_evaluate(self, user_response: str, question_data: Dict, context: Dict) -> Dict:
         """AI智能评估"""
         prompt = self._build_evaluation_prompt(user_response, question_data, context)
-        
-        response = ollama.chat(
-            model="Jerrypoi/deepseek-r1-with-tool-calls:latest",
-            messages=[{"role": "user", "content": prompt}]
+        return self._request_ai_evaluation(prompt, question_data)
+    
+    def _request_ai_evaluation(self, prompt: str, question_data: Dict) -> Dict:
+        """调用模型完成评估并解析结果（JSON Schema约束输出）"""
+        dimensions = list(self._get_criteria(question_data.get('question_type', 'general')))
+        response = llm.chat(
+            self._evaluation_messages(prompt),
+            format=self._evaluation_format(question_data),
+            options={"temperature": 0},
+            model=self.model_name,
+            call_site='stage1.evaluate'
         )
         
         evaluation_text = response['message']['content'].strip()
-        return self._parse_ai_evaluation(evaluation_text)
+        return self._parse_ai_evaluation(evaluation_text, dimensions)
+    
+    def _evaluation_messages(self, prompt: str) -> List[Dict]:
+        """固定的系统提示词在前，单题内容在后"""
+        return llm.build_messages(self.system_prompt, prompt)
+    
+    def _evaluation_format(self, question_data: Dict) -> Dict:
+        """单题评估的输出 Schema"""
+        dimensions = list(self._get_criteria(question_data.get('question_type', 'general')))
+        return build_evaluation_schema(dimensions, self.text_fields)
+    
+    def _build_system_prompt(self) -> str:
+        """构建评估系统提示词：角色、各问题类型的评估标准和输出要求"""
+        prompt = """你是一位经验丰富的HR面试官，负责评估候选人在第一阶段非技术问题的回答质量。
+
+## 评估标准
+按问题类型使用对应维度评分（每个维度0-1分），未列出的问题类型按 self_introduction 标准评估：
+"""
+        for question_type, criteria in self.evaluation_criteria.items():
+            prompt += f"\n### {question_type}\n"
+            for dimension in criteria:
+                label, description = self.dimension_descriptions[dimension]
+                prompt += f"- {dimension}（{label}）: {description}\n"
+        
+        prompt += """
+## 输出要求
+只输出一个JSON对象，不要输出思考过程或其他文字，分数取0到1之间的小数。
+维度键和字段以用户消息末尾的输出格式为准。
+请确保评分客观公正，符合非技术面试的评估标准。
+"""
+        return prompt
     
     def _build_evaluation_prompt(self, user_response: str, question_data: Dict, context: Dict) -> str:
-        """构建AI评估提示词"""
+        """构建单题评估内容（系统提示词之后的动态部分）"""
         question_type = question_data.get('question_type', 'general')
         
-        prompt = f"""
-你是一位经验丰富的HR面试官，正在评估候选人在第一阶段非技术问题的回答质量。
-
-## 问题信息
+        # 维度键与 evaluation_criteria 一致
+        dimensions = list(self._get_criteria(question_type))
+        score_example = ", ".join(f'"{dimension}": 0.0' for dimension in dimensions)
+        
+        return f"""## 问题信息
 问题类型: {question_type}
 问题内容: {question_data.get('question', '')}
 
 ## 候选人回答
 {user_response}
 
-## 评估标准
-请从以下维度评估回答质量（每个维度0-1分）：
-
+## 输出格式
+{{"scores": {{{score_example}}}, "overall_comment": "简短的总体评价，50字以内", "improvement_suggestions": "具体的改进建议，100字以内"}}
 """
+    
+    def _ai_evaluate_batch(self, items: List[Dict]) -> List[Optional[Dict]]:
+        """一次调用模型评估多条回答"""
+        item_dimensions = [
+            list(self._get_criteria(item['question_data'].get('question_type', 'general')))
+            for item in items
+        ]
+        all_dimensions = list(dict.fromkeys(d for dims in item_dimensions for d in dims))
         
-        # 根据问题类型添加特定评估标准
-        if question_type == "self_introduction":
-            prompt += """
-1. 表达清晰度 (0-1): 语言表达是否清晰、流畅、有条理
-2. 信息完整性 (0-1): 是否包含教育背景、工作经历、技能等关键信息
-3. 与岗位相关性 (0-1): 介绍内容与目标职位的相关程度
-4. 逻辑结构 (0-1): 介绍是否有清晰的逻辑结构和层次
-"""
-        elif question_type == "career_planning":
-            prompt += """
-1. 目标清晰度 (0-1): 职业目标是否明确、具体
-2. 规划可行性 (0-1): 规划是否现实、可执行
-3. 与岗位匹配度 (0-1): 规划与目标职位的匹配程度
-4. 动机合理性 (0-1): 选择这个发展方向的动机是否合理
-"""
-        elif question_type == "company_position":
-            prompt += """
-1. 了解程度 (0-1): 对公司和岗位的了解深度
-2. 准备充分性 (0-1): 面试前的准备是否充分
-3. 求职诚意 (0-1): 对这个职位的兴趣和诚意
-"""
-        elif question_type == "work_attitude":
-            prompt += """
-1. 价值观 (0-1): 工作价值观是否积极、合理
-2. 团队合作 (0-1): 团队合作意识和能力
-3. 问题解决 (0-1): 面对问题的态度和解决能力
+        response = llm.chat(
+            self._evaluation_messages(self._build_batch_evaluation_prompt(items)),
+            format=build_batch_evaluation_schema(all_dimensions, self.text_fields),
+            options={"temperature": 0},
+            model=self.model_name,
+            call_site='stage1.evaluate_batch'
+        )
+        
+        evaluation_text = response['message']['content'].strip()
+        return parse_batch_evaluation(evaluation_text, item_dimensions, self.text_fields, self.field_aliases)
+    
+    def _build_batch_evaluation_prompt(self, items: List[Dict]) -> str:
+        """构建批量评估内容：回答逐条编号，评估标准已在系统提示词中"""
+        prompt = "## 候选人回答\n本阶段的全部回答如下，请按各自的问题类型逐条评分。\n"
+        for index, item in enumerate(items, 1):
+            question_data = item['question_data']
+            dimensions = ", ".join(self._get_criteria(question_data.get('question_type', 'general')))
+            prompt += f"""
+### 第{index}条
+问题类型: {question_data.get('question_type', 'general')}
+评分维度: {dimensions}
+问题内容: {question_data.get('question', '')}
+候选人回答:
+{item['user_response']}
 """
         
         prompt += """
-
 ## 输出格式
-请按以下格式输出评估结果：
-
-评分:
-- 维度1: 0.X
-- 维度2: 0.X
-- 维度3: 0.X
-- 维度4: 0.X (如果有)
-
-总体评价: [简短的总体评价，50字以内]
-
-改进建议: [具体的改进建议，100字以内]
-
-请确保评分客观公正，符合非技术面试的评估标准。
+每条回答对应 items 中的一项，index 与回答编号一致，scores 只包含该条的评分维度：
+{"items": [{"index": 1, "scores": {"维度键": 0.0}, "overall_comment": "简短的总体评价，50字以内", "improvement_suggestions": "具体的改进建议，100字以内"}]}
 """
-        
         return prompt
     
-    def _parse_ai_evaluation(self, evaluation_text: str) -> Dict:
+    def _parse_ai_evaluation(self, evaluation_text: str, dimensions: List[str]) -> Dict:
         """解析AI评估结果"""
-        result = {
-            'scores': {},
-            'overall_comment': '',
-            'improvement_suggestions': ''
-        }
-        
         try:
-            # 提取评分
-            score_pattern = r'- (.*?): (0\.\d+)'
-            scores = re.findall(score_pattern, evaluation_text)
-            for dimension, score in scores:
-                result['scores'][dimension.strip()] = float(score)
-            
-            # 提取总体评价
-            overall_match = re.search(r'总体评价[:：]\s*([^\n]+)', evaluation_text)
-            if overall_match:
-                result['overall_comment'] = overall_match.group(1).strip()
-            
-            # 提取改进建议
-            suggestion_match = re.search(r'改进建议[:：]\s*([^\n]+)', evaluation_text)
-            if suggestion_match:
-                result['improvement_suggestions'] = suggestion_match.group(1).strip()
-                
-        except Exception as e:
+            return parse_structured_evaluation(
+                evaluation_text, dimensions, self.text_fields, self.field_aliases
+            )
+        except EvaluationParseError as e:
             print(f"解析AI评估结果失败: {e}")
-        
-        return result
+            return {
+                'scores': {},
+                'overall_comment': '',
+                'improvement_suggestions': ''
+            }
     
     def _basic_evaluate(self, user_response: str, question_type: str) -> Dict:
         """基础评估（基于规则）"""
@@ -201,26 +300,18 @@ class NonTechnicalEvaluator:
         word_count = len(user_response.split())
         
         # 长度评分
-        if response_length < 50:
-            length_score = 0.3
-        elif response_length < 200:
-            length_score = 0.6
-        elif response_length < 500:
-            length_score = 0.9
-        else:
-            length_score = 1.0
+        length = length_score(response_length, 'stage1')
         
         # 词汇丰富度
         unique_words = len(set(user_response.split()))
         vocabulary_score = min(unique_words / max(word_count, 1) * 2, 1.0)
         
         # 结构性（是否包含常见结构词）
-        structure_words = ['首先', '其次', '然后', '最后', '另外', '因为', '所以', '但是', '然而']
-        structure_count = sum(1 for word in structure_words if word in user_response)
+        structure_count = STRUCTURE_WORDS.count_distinct(user_response)
         structure_score = min(structure_count / 3, 1.0)
         
         return {
-            'length_score': length_score,
+            'length_score': length,
             'vocabulary_score': vocabulary_score,
             'structure_score': structure_score,
             'response_length': response_length,
@@ -230,9 +321,8 @@ class NonTechnicalEvaluator:
     def _calculate_final_score(self, ai_evaluation: Dict, basic_evaluation: Dict, question_type: str) -> float:
         """计算最终评分"""
         if ai_evaluation and ai_evaluation.get('scores'):
-            # 使用AI评估结果
-            scores = list(ai_evaluation['scores'].values())
-            ai_score = sum(scores) / len(scores) if scores else 0.5
+            # 使用AI评估结果，按评估维度权重加权
+            ai_score = weighted_score(ai_evaluation['scores'], self._get_criteria(question_type))
             
             # 结合基础评估
             basic_score = (
@@ -292,6 +382,7 @@ class NonTechnicalEvaluator:
     
     def _fallback_evaluate(self, user_response: str, question_type: str) -> float:
         """备用评估方法"""
+        metrics.record_fallback('stage1_fallback_evaluate')
         response_length = len(user_response.strip())
         
         if response_length < 20:
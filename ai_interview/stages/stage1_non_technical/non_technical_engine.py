@@ -4,22 +4,54 @@
 
 负责生成和管理非技术类面试问题，包括自我介绍、职业规划、
 公司岗位了解等方面的问题。
+
+第一阶段的问题类型顺序固定，生成提示词只取决于简历和JD，
+因此两份文档解析完成后即可在后台预生成本阶段的全部问题（prepare），
+面试开始和每次作答后直接取用；预生成未在限定时间内完成时改用模板问题。
 """
 
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Dict, List, Optional
+from ... import metrics, tracing
 from .question_generator import NonTechnicalQuestionGenerator
 from .evaluator import NonTechnicalEvaluator
 
 
+# 取用预生成问题时最多等待的秒数，超时改用模板问题
+PREFETCH_TIMEOUT = 15.0
+
+# 各会话共用的预生成线程数（限制同时进行的模型调用）
+PREFETCH_WORKERS = 4
+
+_prefetch_executor = None
+_prefetch_executor_lock = threading.Lock()
+
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        with _prefetch_executor_lock:
+            if _prefetch_executor is None:
+                _prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS,
+                                                        thread_name_prefix='stage1-prefetch')
+    return _prefetch_executor
+
+
 class NonTechnicalQuestionEngine:
     """
     第一阶段非技术问题引擎
     
     负责管理非技术问题的生成、评估和进度跟踪
+    
+    deferred_scoring=True 时为延迟评分模式：问题选择不依赖单题得分，
+    回答先记录，阶段结束时由评估器一次批量评分。
+    
+    prefetched 为本会话的预生成表：{问题类型: (提示词, Future)}，提示词与当前简历和JD一致时才取用。
     """
     
-    def __init__(self):
+    def __init__(self, deferred_scoring: bool = False, prefetch_timeout: float = PREFETCH_TIMEOUT):
         self.question_generator = NonTechnicalQuestionGenerator()
         self.evaluator = NonTechnicalEvaluator()
         
@@ -38,6 +70,36 @@ class NonTechnicalQuestionEngine:
         self.question_responses = []
         self.question_scores = []
         
+        # 延迟评分
+        self.deferred_scoring = deferred_scoring
+        self.pending_evaluations = []
+        self.batch_evaluations = []
+        
+        # 问题预生成
+        self.prefetch_timeout = prefetch_timeout
+        self.prefetched = {}
+        self.resume_data = None
+        self.jd_data = None
+        
+    def prepare(self, resume_data: Dict, jd_data: Dict):
+        """
+        在后台预生成本阶段的全部问题（简历和JD解析完成后调用，立即返回）
+        
+        已有相同提示词的预生成结果时不重复生成；简历或JD变化后旧结果被替换。
+        """
+        executor = _get_prefetch_executor()
+        for index in range(self.max_questions):
+            question_type = self.question_types[index % len(self.question_types)]
+            prompt = self.question_generator._build_ai_prompt(question_type, resume_data, jd_data)
+            existing = self.prefetched.get(question_type)
+            if existing is not None and existing[0] == prompt:
+                continue
+            if existing is not None:
+                existing[1].cancel()
+            future = executor.submit(self.question_generator._generate_ai_question,
+                                     question_type, resume_data, jd_data, prompt)
+            self.prefetched[question_type] = (prompt, future)
+    
     def start_stage(self, resume_data: Dict, jd_data: Dict) -> Dict:
         """
         开始第一阶段面试
@@ -57,6 +119,11 @@ class NonTechnicalQuestionEngine:
         self.asked_questions.clear()
         self.question_responses.clear()
         self.question_scores.clear()
+        self.pending_evaluations.clear()
+        self.batch_evaluations.clear()
+        
+        # 未预生成（或文档已变化）的问题现在开始生成，后续问题在作答期间完成
+        self.prepare(resume_data, jd_data)
         
         # 生成第一个问题
         return self.generate_next_question()
@@ -78,13 +145,16 @@ class NonTechnicalQuestionEngine:
         # 选择问题类型
         question_type = self.question_types[self.current_question_index % len(self.question_types)]
         
-        # 生成问题
-        question_data = self.question_generator.generate_question(
-            question_type=question_type,
-            resume_data=self.resume_data,
-            jd_data=self.jd_data,
-            previous_questions=self.asked_questions
-        )
+        # 生成问题（优先取用预生成结果）
+        with tracing.span('question.select', stage=1, question_type=question_type):
+            question_data = self._take_prefetched(question_type)
+            if question_data is None:
+                question_data = self.question_generator.generate_question(
+                    question_type=question_type,
+                    resume_data=self.resume_data,
+                    jd_data=self.jd_data,
+                    previous_questions=self.asked_questions
+                )
         
         # 更新状态
         question_data['question_number'] = self.current_question_index + 1
@@ -96,6 +166,30 @@ class NonTechnicalQuestionEngine:
         
         return question_data
     
+    def _take_prefetched(self, question_type: str) -> Optional[Dict]:
+        """取出预生成的问题；没有可用的预生成结果时返回 None（按原流程同步生成）"""
+        entry = self.prefetched.pop(question_type, None)
+        if entry is None:
+            return None
+        prompt, future = entry
+        if prompt != self.question_generator._build_ai_prompt(question_type, self.resume_data, self.jd_data):
+            future.cancel()
+            return None
+        
+        metrics.record_cache('stage1_prefetch', future.done())
+        try:
+            ai_question = future.result(timeout=self.prefetch_timeout)
+        except FutureTimeoutError:
+            print(f"预生成问题超时({question_type})，改用模板问题")
+            ai_question = None
+        except Exception as e:
+            print(f"AI问题生成失败: {e}")
+            ai_question = None
+        
+        if ai_question:
+            return self.question_generator.ai_question_data(question_type, ai_question)
+        return self.question_generator.template_question_data(question_type, self.resume_data, self.jd_data)
+    
     def process_answer(self, user_response: str, question_data: Dict) -> Dict:
         """
         处理用户回答
@@ -115,14 +209,25 @@ class NonTechnicalQuestionEngine:
             'question_number': question_data['question_number']
         })
         
+        context = {
+            'resume_data': self.resume_data,
+            'jd_data': self.jd_data
+        }
+        
+        if self.deferred_scoring:
+            # 延迟评分：阶段结束时统一批量评估
+            self.pending_evaluations.append({
+                'user_response': user_response,
+                'question_data': question_data,
+                'context': context
+            })
+            return self._deferred_evaluation(question_data)
+        
         # 评估回答
         evaluation = self.evaluator.evaluate_response(
             user_response=user_response,
             question_data=question_data,
-            context={
-                'resume_data': self.resume_data,
-                'jd_data': self.jd_data
-            }
+            context=context
         )
         
         # 记录评分
@@ -141,6 +246,8 @@ class NonTechnicalQuestionEngine:
         Returns:
             阶段总结数据
         """
+        self._flush_pending_evaluations()
+        
         if not self.question_scores:
             average_score = 0
         else:
@@ -153,10 +260,31 @@ class NonTechnicalQuestionEngine:
             'average_score': round(average_score, 2),
             'question_responses': self.question_responses,
             'detailed_scores': self.question_scores,
+            'batch_evaluations': self.batch_evaluations if self.deferred_scoring else None,
             'stage_completed': self.current_question_index >= self.max_questions,
             'next_stage': '第二阶段：经历类问题' if self.current_question_index >= self.max_questions else None
         }
     
+    def _deferred_evaluation(self, question_data: Dict) -> Dict:
+        """延迟评分模式下的占位评估结果"""
+        return {
+            'score': None,
+            'deferred': True,
+            'question_type': question_data['question_type'],
+            'feedback': "回答已记录，评分将在本阶段结束后统一给出。",
+            'suggestions': []
+        }
+    
+    def _flush_pending_evaluations(self):
+        """批量评估尚未评分的回答（延迟评分模式）"""
+        if not self.pending_evaluations:
+            return
+        
+        evaluations = self.evaluator.evaluate_batch(self.pending_evaluations)
+        self.pending_evaluations.clear()
+        self.batch_evaluations.extend(evaluations)
+        self.question_scores.extend(evaluation['score'] for evaluation in evaluations)
+    
     def get_progress_info(self) -> Dict:
         """获取当前进度信息"""
         return {
@@ -172,5 +300,14 @@ class NonTechnicalQuestionEngine:
         self.asked_questions.clear()
         self.question_responses.clear()
         self.question_scores.clear()
+        self.pending_evaluations.clear()
+        self.batch_evaluations.clear()
         self.resume_data = None
         self.jd_data = None
+        self.clear_prefetched()
+    
+    def clear_prefetched(self):
+        """丢弃本会话的预生成问题（尚未开始的生成任务直接取消）"""
+        for _, future in self.prefetched.values():
+            future.cancel()
+        self.prefetched.clear()
@@ -6,8 +6,8 @@
 """
 
 import random
-import ollama
 from typing import Dict, List, Optional
+from ... import llm, metrics
 
 
 class NonTechnicalQuestionGenerator:
@@ -38,6 +38,56 @@ class NonTechnicalQuestionGenerator:
             ]
         }
         
+        # 系统提示词在会话内不变，候选人和职位信息放在其后的用户消息中
+        self.system_prompt = """你是一位专业的HR面试官，正在进行面试的第一阶段：非技术问题环节。
+请根据候选人的简历信息和目标职位要求，生成一个个性化的非技术问题。
+
+## 面试阶段说明
+第一阶段主要考察：
+1. 基本情况和沟通能力
+2. 职业规划和发展目标
+3. 对公司和岗位的了解程度
+4. 工作态度和价值观
+
+请直接返回问题内容，不需要额外说明。
+"""
+        
+        # 各问题类型的具体要求
+        self.type_prompts = {
+            "self_introduction": """
+## 问题要求
+请生成一个自我介绍类问题，要求候选人介绍个人背景、工作经历和主要技能。
+问题应该：
+- 引导候选人系统性地介绍自己
+- 结合目标职位的相关性
+- 便于后续深入了解
+""",
+            "career_planning": """
+## 问题要求
+请生成一个职业规划类问题，了解候选人的职业发展目标和规划。
+问题应该：
+- 了解候选人的长期职业目标
+- 评估职业规划的合理性
+- 判断与公司发展的匹配度
+""",
+            "company_position": """
+## 问题要求
+请生成一个关于公司和岗位了解的问题，评估候选人的求职诚意和准备程度。
+问题应该：
+- 了解候选人对公司的认知
+- 评估对岗位职责的理解
+- 判断求职动机的真实性
+""",
+            "work_attitude": """
+## 问题要求
+请生成一个工作态度类问题，了解候选人的工作价值观和团队合作能力。
+问题应该：
+- 了解候选人的工作态度
+- 评估团队合作能力
+- 判断价值观匹配度
+"""
+        }
+        
     def generate_question(self, question_type: str, resume_data: Dict, 
                          jd_data: Dict, previous_questions: List = None) -> Dict:
         """
@@ -56,16 +106,25 @@ class NonTechnicalQuestionGenerator:
             # 尝试AI生成个性化问题
             ai_question = self._generate_ai_question(question_type, resume_data, jd_data)
             if ai_question:
-                return {
-                    'question': ai_question,
-                    'question_type': question_type,
-                    'source': 'ai_generated',
-                    'category': self._get_question_category(question_type)
-                }
+                return self.ai_question_data(question_type, ai_question)
         except Exception as e:
             print(f"AI问题生成失败: {e}")
         
         # 备用：使用预定义模板
+        return self.template_question_data(question_type, resume_data, jd_data)
+    
+    def ai_question_data(self, question_type: str, ai_question: str) -> Dict:
+        """AI生成问题的问题数据"""
+        return {
+            'question': ai_question,
+            'question_type': question_type,
+            'source': 'ai_generated',
+            'category': self._get_question_category(question_type)
+        }
+    
+    def template_question_data(self, question_type: str, resume_data: Dict, jd_data: Dict) -> Dict:
+        """模板问题的问题数据（AI不可用时的降级）"""
+        metrics.record_fallback('stage1_template_question')
         template_question = self._get_template_question(question_type, resume_data, jd_data)
         return {
             'question': template_question,
@@ -74,34 +133,21 @@ class NonTechnicalQuestionGenerator:
             'category': self._get_question_category(question_type)
         }
     
-    def _generate_ai_question(self, question_type: str, resume_data: Dict, jd_data: Dict) -> Optional[str]:
-        """使用AI生成个性化问题"""
-        prompt = self._build_ai_prompt(question_type, resume_data, jd_data)
+    def _generate_ai_question(self, question_type: str, resume_data: Dict, jd_data: Dict,
+                              prompt: Optional[str] = None) -> Optional[str]:
+        """使用AI生成个性化问题（prompt 为已构建好的动态提示词）"""
+        if prompt is None:
+            prompt = self._build_ai_prompt(question_type, resume_data, jd_data)
         
         try:
-            response = ollama.chat(
-                model="Jerrypoi/deepseek-r1-with-tool-calls:latest",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return response['message']['content'].strip()
+            response = llm.chat(llm.build_messages(self.system_prompt, prompt), call_site='stage1.question')
+            return llm.clean_question(response['message']['content']) or None
         except Exception:
             return None
     
     def _build_ai_prompt(self, question_type: str, resume_data: Dict, jd_data: Dict) -> str:
-        """构建AI生成问题的提示词"""
-        base_prompt = """
-你是一位专业的HR面试官，正在进行面试的第一阶段：非技术问题环节。
-请根据候选人的简历信息和目标职位要求，生成一个个性化的非技术问题。
-
-## 面试阶段说明
-第一阶段主要考察：
-1. 基本情况和沟通能力
-2. 职业规划和发展目标
-3. 对公司和岗位的了解程度
-4. 工作态度和价值观
-
-## 候选人信息
-"""
+        """构建AI生成问题的提示词（系统提示词之后的动态部分）"""
+        base_prompt = "## 候选人信息\n"
         
         # 添加简历信息
         if resume_data:
@@ -126,43 +172,7 @@ class NonTechnicalQuestionGenerator:
                 base_prompt += f"- 主要要求: {', '.join(jd_data['requirements'][:3])}\n"
         
         # 根据问题类型添加特定要求
-        type_prompts = {
-            "self_introduction": """
-## 问题要求
-请生成一个自我介绍类问题，要求候选人介绍个人背景、工作经历和主要技能。
-问题应该：
-- 引导候选人系统性地介绍自己
-- 结合目标职位的相关性
-- 便于后续深入了解
-""",
-            "career_planning": """
-## 问题要求
-请生成一个职业规划类问题，了解候选人的职业发展目标和规划。
-问题应该：
-- 了解候选人的长期职业目标
-- 评估职业规划的合理性
-- 判断与公司发展的匹配度
-""",
-            "company_position": """
-## 问题要求
-请生成一个关于公司和岗位了解的问题，评估候选人的求职诚意和准备程度。
-问题应该：
-- 了解候选人对公司的认知
-- 评估对岗位职责的理解
-- 判断求职动机的真实性
-""",
-            "work_attitude": """
-## 问题要求
-请生成一个工作态度类问题，了解候选人的工作价值观和团队合作能力。
-问题应该：
-- 了解候选人的工作态度
-- 评估团队合作能力
-- 判断价值观匹配度
-"""
-        }
-        
-        base_prompt += type_prompts.get(question_type, "")
-        base_prompt += "\n请直接返回问题内容，不需要额外说明。"
+        base_prompt += self.type_prompts.get(question_type, "")
         
         return base_prompt
     
@@ -5,12 +5,22 @@
 基于case.docx的深挖提问方式，生成专业的经历追问
 """
 
-import ollama
 import random
 from typing import Dict, List, Optional
+from ... import llm, metrics
+from ...keywords import KeywordMatcher, get_lexicon
 from .case_prompts import CaseBasedPrompts
 
 
+# 问题分类词，按 性能 > 架构 > 业务 > 团队 的优先级判断
+QUESTION_CATEGORY_MATCHER = KeywordMatcher.from_groups({
+    'performance_metrics': ['性能', '指标', '延迟', '吞吐量', '响应时间'],
+    'architecture_design': ['架构', '设计', '系统', '模块'],
+    'business_impact': ['业务', '价值', '效果', 'ROI', '用户'],
+    'team_collaboration': ['团队', '协作', '分工', '管理']
+})
+
+
 class DeepDiveQuestionGenerator:
     """深挖问题生成器"""
     
@@ -18,6 +28,9 @@ class DeepDiveQuestionGenerator:
         self.case_prompts = CaseBasedPrompts()
         self.fallback_questions = self.case_prompts.get_fallback_questions()
         
+        # case.docx 示例很长，作为字节稳定的系统消息只在会话首次调用时计算
+        self.system_prompt = self._build_system_prompt()
+        
     def generate_deep_dive_question(self, user_experience: str, question_history: List[Dict],
                                   technical_keywords: List[str], jd_data: Dict = None,
                                   question_number: int = 2, total_questions: int = 3) -> Dict:
@@ -56,6 +69,7 @@ class DeepDiveQuestionGenerator:
             print(f"AI深挖问题生成失败: {e}")
         
         # 备用方案：使用预定义问题
+        metrics.record_fallback('deep_dive_fallback')
         fallback_question = self._get_fallback_deep_dive_question(
             user_experience, question_history, technical_keywords
         )
@@ -76,23 +90,36 @@ class DeepDiveQuestionGenerator:
         """使用AI生成深挖问题"""
         prompt = self._build_deep_dive_prompt(user_experience, question_history, technical_keywords, jd_data)
         
-        response = ollama.chat(
-            model="Jerrypoi/deepseek-r1-with-tool-calls:latest",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response = llm.chat(llm.build_messages(self.system_prompt, prompt), call_site='stage2.question')
         
-        ai_question = response['message']['content'].strip()
+        ai_question = llm.clean_question(response['message']['content'])
+        if not ai_question:
+            return None
         return self._clean_question_format(ai_question)
     
+    def _build_system_prompt(self) -> str:
+        """构建系统提示词：case.docx的深挖示例和固定的任务要求"""
+        return f"""{self.case_prompts.get_system_prompt()}
+
+## 任务要求
+请根据上述经历深挖提问原则和示例，针对用户消息中的候选人经历生成1个专业的深挖问题。注意：
+
+1. **避免重复**：不要问已经问过的类似问题
+2. **技术深度**：深入技术实现细节、参数选择、架构决策
+3. **具体量化**：询问具体的数据、指标、性能表现
+4. **方案对比**：为什么选择某种技术方案而非其他方案
+5. **实际挑战**：遇到的具体技术难点和解决过程
+6. **业务价值**：技术实现如何产生实际业务价值
+
+参考case.docx中的提问风格，生成一个具体、专业、有深度的追问，问题应该能够有效评估候选人的技术水平和项目经验。
+
+直接返回问题内容，不需要额外说明。
+"""
+    
     def _build_deep_dive_prompt(self, user_experience: str, question_history: List[Dict],
                                technical_keywords: List[str], jd_data: Dict = None) -> str:
-        """构建深挖问题的AI提示词"""
-        # 获取case.docx的系统提示词
-        system_prompt = self.case_prompts.get_system_prompt()
-        
-        prompt = f"""{system_prompt}
-
-## 当前面试情况
+        """构建深挖问题的动态提示词（系统提示词之后的当前面试情况）"""
+        prompt = f"""## 当前面试情况
 候选人刚刚详细介绍了以下项目经历：
 
 {user_experience}
@@ -112,22 +139,6 @@ class DeepDiveQuestionGenerator:
             if jd_data.get('keywords'):
                 prompt += f"- 技术要求: {', '.join(jd_data['keywords'][:5])}\n"
         
-        prompt += """
-## 任务要求
-请根据上述经历深挖提问原则和示例，生成1个专业的深挖问题。注意：
-
-1. **避免重复**：不要问已经问过的类似问题
-2. **技术深度**：深入技术实现细节、参数选择、架构决策
-3. **具体量化**：询问具体的数据、指标、性能表现
-4. **方案对比**：为什么选择某种技术方案而非其他方案
-5. **实际挑战**：遇到的具体技术难点和解决过程
-6. **业务价值**：技术实现如何产生实际业务价值
-
-参考case.docx中的提问风格，生成一个具体、专业、有深度的追问，问题应该能够有效评估候选人的技术水平和项目经验。
-
-直接返回问题内容，不需要额外说明。
-"""
-        
         return prompt
     
     def _format_question_history(self, question_history: List[Dict]) -> str:
@@ -180,9 +191,12 @@ class DeepDiveQuestionGenerator:
         
         # 根据技术关键词和经历内容智能选择问题类别
         if technical_keywords:
-            if any(keyword in ['性能', '优化', '延迟', '吞吐量'] for keyword in technical_keywords):
+            # 按词表类别判断，词表更新后无需改代码
+            lexicon = get_lexicon()
+            keyword_categories = {lexicon.category(keyword) for keyword in technical_keywords}
+            if 'performance' in keyword_categories:
                 category = 'performance_metrics'
-            elif any(keyword in ['架构', '设计', '微服务', '分布式'] for keyword in technical_keywords):
+            elif 'architecture' in keyword_categories:
                 category = 'architecture_design'
             else:
                 category = 'technical_details'
@@ -198,15 +212,8 @@ class DeepDiveQuestionGenerator:
     
     def _categorize_question(self, question: str) -> str:
         """对问题进行分类"""
-        question_lower = question.lower()
-        
-        if any(word in question_lower for word in ['性能', '指标', '延迟', '吞吐量', '响应时间']):
-            return 'performance_metrics'
-        elif any(word in question_lower for word in ['架构', '设计', '系统', '模块']):
-            return 'architecture_design'
-        elif any(word in question_lower for word in ['业务', '价值', '效果', 'roi', '用户']):
-            return 'business_impact'
-        elif any(word in question_lower for word in ['团队', '协作', '分工', '管理']):
-            return 'team_collaboration'
-        else:
-            return 'technical_details'
+        categories = QUESTION_CATEGORY_MATCHER.count_by_group(question)
+        for category in ('performance_metrics', 'architecture_design', 'business_impact', 'team_collaboration'):
+            if category in categories:
+                return category
+        return 'technical_details'
@@ -7,6 +7,8 @@
 """
 
 from typing import Dict, List, Optional
+from ... import tracing
+from ...keywords import get_lexicon
 from .deep_dive_generator import DeepDiveQuestionGenerator
 from .experience_evaluator import ExperienceEvaluator
 
@@ -17,9 +19,12 @@ class ExperienceQuestionEngine:
     
     负责管理经历类问题的生成、评估和进度跟踪
     特点：第一个问题固定为经历介绍请求，后续为深挖追问
+    
+    deferred_scoring=True 时为延迟评分模式：追问只依赖回答内容而不依赖单题得分，
+    回答先记录，阶段结束时由评估器一次批量评分。
     """
     
-    def __init__(self):
+    def __init__(self, deferred_scoring: bool = False):
         self.deep_dive_generator = DeepDiveQuestionGenerator()
         self.evaluator = ExperienceEvaluator()
         
@@ -38,6 +43,11 @@ class ExperienceQuestionEngine:
         self.question_responses = []
         self.question_scores = []
         
+        # 延迟评分
+        self.deferred_scoring = deferred_scoring
+        self.pending_evaluations = []
+        self.batch_evaluations = []
+        
     def start_stage(self, resume_data: Dict, jd_data: Dict) -> Dict:
         """
         开始第二阶段面试
@@ -61,6 +71,8 @@ class ExperienceQuestionEngine:
         self.asked_questions.clear()
         self.question_responses.clear()
         self.question_scores.clear()
+        self.pending_evaluations.clear()
+        self.batch_evaluations.clear()
         
         # 生成第一个固定问题
         return self.generate_initial_experience_question()
@@ -136,14 +148,15 @@ class ExperienceQuestionEngine:
             self.technical_keywords = self._extract_technical_keywords(user_experience_description)
         
         # 生成深挖问题
-        question_data = self.deep_dive_generator.generate_deep_dive_question(
-            user_experience=user_experience_description,
-            question_history=self.asked_questions,
-            technical_keywords=self.technical_keywords,
-            jd_data=self.jd_data,
-            question_number=self.current_question_index + 1,
-            total_questions=self.max_questions
-        )
+        with tracing.span('question.select', stage=2):
+            question_data = self.deep_dive_generator.generate_deep_dive_question(
+                user_experience=user_experience_description,
+                question_history=self.asked_questions,
+                technical_keywords=self.technical_keywords,
+                jd_data=self.jd_data,
+                question_number=self.current_question_index + 1,
+                total_questions=self.max_questions
+            )
         
         self.asked_questions.append(question_data)
         self.current_question_index += 1
@@ -174,16 +187,27 @@ class ExperienceQuestionEngine:
             self.current_experience = user_response
             self.technical_keywords = self._extract_technical_keywords(user_response)
         
+        context = {
+            'resume_data': self.resume_data,
+            'jd_data': self.jd_data,
+            'current_experience': self.current_experience,
+            'technical_keywords': list(self.technical_keywords)
+        }
+        
+        if self.deferred_scoring:
+            # 延迟评分：阶段结束时统一批量评估
+            self.pending_evaluations.append({
+                'user_response': user_response,
+                'question_data': question_data,
+                'context': context
+            })
+            return self._deferred_evaluation(question_data)
+        
         # 评估回答
         evaluation = self.evaluator.evaluate_response(
             user_response=user_response,
             question_data=question_data,
-            context={
-                'resume_data': self.resume_data,
-                'jd_data': self.jd_data,
-                'current_experience': self.current_experience,
-                'technical_keywords': self.technical_keywords
-            }
+            context=context
         )
         
         # 记录评分
@@ -202,6 +226,8 @@ class ExperienceQuestionEngine:
         Returns:
             阶段总结数据
         """
+        self._flush_pending_evaluations()
+        
         if not self.question_scores:
             average_score = 0
         else:
@@ -214,12 +240,33 @@ class ExperienceQuestionEngine:
             'average_score': round(average_score, 2),
             'question_responses': self.question_responses,
             'detailed_scores': self.question_scores,
+            'batch_evaluations': self.batch_evaluations if self.deferred_scoring else None,
             'current_experience_summary': self.current_experience[:200] + "..." if self.current_experience and len(self.current_experience) > 200 else self.current_experience,
             'technical_keywords_discussed': self.technical_keywords,
             'stage_completed': self.current_question_index >= self.max_questions,
             'next_stage': '第三阶段：技术类问题' if self.current_question_index >= self.max_questions else None
         }
     
+    def _deferred_evaluation(self, question_data: Dict) -> Dict:
+        """延迟评分模式下的占位评估结果"""
+        return {
+            'score': None,
+            'deferred': True,
+            'question_type': question_data['question_type'],
+            'feedback': "回答已记录，评分将在本阶段结束后统一给出。",
+            'suggestions': []
+        }
+    
+    def _flush_pending_evaluations(self):
+        """批量评估尚未评分的回答（延迟评分模式）"""
+        if not self.pending_evaluations:
+            return
+        
+        evaluations = self.evaluator.evaluate_batch(self.pending_evaluations)
+        self.pending_evaluations.clear()
+        self.batch_evaluations.extend(evaluations)
+        self.question_scores.extend(evaluation['score'] for evaluation in evaluations)
+    
     def get_progress_info(self) -> Dict:
         """获取当前进度信息"""
         return {
@@ -232,43 +279,8 @@ class ExperienceQuestionEngine:
         }
     
     def _extract_technical_keywords(self, experience_text: str) -> List[str]:
-        """从经历描述中提取技术关键词"""
-        import re
-        
-        # 常见技术关键词模式
-        tech_patterns = [
-            # 编程语言
-            r'\b(Java|Python|JavaScript|TypeScript|C\+\+|C#|Go|Rust|Scala|Kotlin|PHP|Ruby)\b',
-            # 框架和库
-            r'\b(Spring|Django|Flask|React|Vue|Angular|Express|FastAPI|TensorFlow|PyTorch|Spark|Flink)\b',
-            # 数据库
-            r'\b(MySQL|PostgreSQL|MongoDB|Redis|ElasticSearch|Neo4j|Oracle|SQLServer|Cassandra)\b',
-            # 云服务和容器
-            r'\b(Docker|Kubernetes|AWS|Azure|GCP|Alibaba Cloud|Tencent Cloud|Jenkins|GitLab)\b',
-            # 机器学习和AI
-            r'\b(机器学习|深度学习|神经网络|CNN|RNN|LSTM|Transformer|BERT|GPT|LLM|NLP|CV|RAG|微调|Lora)\b',
-            # 架构和模式
-            r'\b(微服务|分布式|负载均衡|缓存|消息队列|API网关|服务网格|Lambda架构)\b',
-            # 大数据和流处理
-            r'\b(Hadoop|Kafka|Storm|Hive|HBase|Flume|Sqoop|Zookeeper)\b',
-            # 其他技术
-            r'\b(区块链|物联网|WebSocket|GraphQL|gRPC|Protobuf)\b'
-        ]
-        
-        keywords = []
-        for pattern in tech_patterns:
-            matches = re.findall(pattern, experience_text, re.IGNORECASE)
-            keywords.extend(matches)
-        
-        # 去重并保持顺序
-        seen = set()
-        unique_keywords = []
-        for keyword in keywords:
-            if keyword.lower() not in seen:
-                seen.add(keyword.lower())
-                unique_keywords.append(keyword)
-        
-        return unique_keywords[:10]  # 限制关键词数量
+        """从经历描述中提取技术关键词（共享词表，去重并保持出现顺序）"""
+        return get_lexicon().find_keywords(experience_text, limit=10)  # 限制关键词数量
     
     def reset(self):
         """重置引擎状态"""
@@ -280,5 +292,7 @@ class ExperienceQuestionEngine:
         self.asked_questions.clear()
         self.question_responses.clear()
         self.question_scores.clear()
+        self.pending_evaluations.clear()
+        self.batch_evaluations.clear()
         self.resume_data = None
         self.jd_data = None
@@ -6,15 +6,24 @@
 项目经验和实际能力的展现。
 """
 
-import ollama
-import re
 from typing import Dict, List, Optional
+from ... import llm, metrics, tracing
+from ...keywords import get_lexicon
+from ..structured_evaluation import (
+    EvaluationParseError, build_batch_evaluation_schema, build_evaluation_schema,
+    parse_batch_evaluation, parse_structured_evaluation, weighted_score
+)
+from ..rule_features import (
+    DETAIL_INDICATORS, EXPERIENCE_INDICATORS, NUMBER_PATTERN, keyword_coverage, length_score,
+    stage2_length_band
+)
 
 
 class ExperienceEvaluator:
     """经历类问题评估器"""
     
     def __init__(self):
+        self.model_name = llm.MODEL_NAME
         self.evaluation_criteria = {
             "initial_experience_request": {
                 "technical_depth": 0.3,      # 技术深度
@@ -30,6 +39,37 @@ class ExperienceEvaluator:
                 "logical_thinking": 0.1      # 逻辑思维
             }
         }
+        
+        # 评估维度的中文名称和评分说明（提示词与解析修复共用）
+        self.dimension_descriptions = {
+            "technical_depth": ("技术深度", "技术描述的深度和专业性"),
+            "project_complexity": ("项目复杂度", "项目的技术复杂度和挑战性"),
+            "personal_contribution": ("个人贡献", "个人在项目中的具体贡献和角色"),
+            "problem_solving": ("问题解决能力", "遇到问题时的分析和解决能力"),
+            "communication": ("表达清晰度", "表达是否清晰、逻辑性强"),
+            "technical_accuracy": ("技术准确性", "技术回答的准确性和专业性"),
+            "detail_richness": ("细节丰富度", "回答中技术细节的丰富程度"),
+            "real_experience": ("真实经验体现", "是否体现出真实的项目经验"),
+            "logical_thinking": ("逻辑思维", "回答的逻辑性和条理性")
+        }
+        self.text_fields = ['technical_highlights', 'improvement_suggestions', 'overall_comment']
+        self.field_aliases = {
+            label: key for key, (label, _) in self.dimension_descriptions.items()
+        }
+        self.field_aliases.update({
+            '技术亮点': 'technical_highlights',
+            '改进建议': 'improvement_suggestions',
+            '整体评价': 'overall_comment'
+        })
+        
+        # 系统提示词与单题无关，保持字节稳定以复用服务端的前缀缓存
+        self.system_prompt = self._build_system_prompt()
+    
+    def _get_criteria(self, question_type: str) -> Dict[str, float]:
+        """获取问题类型对应的评估维度权重，追问（含备用追问）按深挖标准评估"""
+        if question_type == "initial_experience_request":
+            return self.evaluation_criteria["initial_experience_request"]
+        return self.evaluation_criteria["deep_dive"]
     
     def evaluate_response(self, user_response: str, question_data: Dict, context: Dict) -> Dict:
         """
@@ -49,57 +89,168 @@ class ExperienceEvaluator:
             # AI评估
             ai_evaluation = self._ai_evaluate(user_response, question_data, context)
             
-            # 技术关键词分析
-            tech_analysis = self._analyze_technical_content(user_response, context.get('technical_keywords', []))
-            
-            # 项目经验分析
-            experience_analysis = self._analyze_project_experience(user_response, question_type)
-            
-            # 综合评分
-            final_score = self._calculate_final_score(ai_evaluation, tech_analysis, experience_analysis, question_type)
-            
-            return {
-                'score': final_score,
-                'ai_evaluation': ai_evaluation,
-                'technical_analysis': tech_analysis,
-                'experience_analysis': experience_analysis,
-                'question_type': question_type,
-                'feedback': self._generate_feedback(ai_evaluation, tech_analysis, experience_analysis, question_type),
-                'suggestions': self._generate_suggestions(ai_evaluation, tech_analysis, experience_analysis, question_type)
-            }
+            return self._assemble_evaluation(user_response, question_data, context, ai_evaluation)
             
         except Exception as e:
             print(f"评估过程出错: {e}")
             # 备用评估
-            fallback_score = self._fallback_evaluate(user_response, question_type)
-            return {
-                'score': fallback_score,
-                'ai_evaluation': None,
-                'technical_analysis': None,
-                'experience_analysis': None,
-                'question_type': question_type,
-                'feedback': "回答已记录，请继续下一个问题。",
-                'suggestions': []
-            }
+            return self._fallback_result(user_response, question_type)
+    
+    def evaluate_batch(self, items: List[Dict]) -> List[Dict]:
+        """
+        阶段结束时批量评估多条回答（延迟评分模式）
+        
+        评估说明只发送一次，模型按条目输出JSON评分；
+        缺失或无法解析的条目单独走备用评估，不影响其他条目。
+        
+        Args:
+            items: [{'user_response': ..., 'question_data': ..., 'context': ...}, ...]
+            
+        Returns:
+            与输入顺序一致的评估结果列表，格式同 evaluate_response
+        """
+        if not items:
+            return []
+        
+        try:
+            ai_evaluations = self._ai_evaluate_batch(items)
+        except Exception as e:
+            print(f"批量评估过程出错: {e}")
+            ai_evaluations = [None] * len(items)
+        
+        evaluations = []
+        for item, ai_evaluation in zip(items, ai_evaluations):
+            if ai_evaluation is None:
+                question_type = item['question_data'].get('question_type', 'general')
+                evaluations.append(self._fallback_result(item['user_response'], question_type))
+            else:
+                evaluations.append(self._assemble_evaluation(
+                    item['user_response'], item['question_data'], item.get('context', {}), ai_evaluation
+                ))
+        return evaluations
+    
+    def _fallback_result(self, user_response: str, question_type: str) -> Dict:
+        """AI评估不可用时的备用评估结果"""
+        return {
+            'score': self._fallback_evaluate(user_response, question_type),
+            'ai_evaluation': None,
+            'technical_analysis': None,
+            'experience_analysis': None,
+            'question_type': question_type,
+            'feedback': "回答已记录，请继续下一个问题。",
+            'suggestions': []
+        }
+    
+    def _assemble_evaluation(self, user_response: str, question_data: Dict, context: Dict,
+                             ai_evaluation: Optional[Dict], rule_metrics: Optional[Dict] = None) -> Dict:
+        """
+        基于AI子评分和规则分析组装评估结果
+        
+        AI子评分可以来自实时调用，也可以来自离线重评分时的缓存。
+        rule_metrics 为批量预先计算的 {'technical_analysis', 'experience_analysis'}，缺省时逐条计算。
+        """
+        question_type = question_data.get('question_type', 'general')
+        
+        with tracing.span('evaluate.rules', stage=2, question_type=question_type):
+            if rule_metrics:
+                tech_analysis = rule_metrics['technical_analysis']
+                experience_analysis = rule_metrics['experience_analysis']
+            else:
+                # 技术关键词分析
+                tech_analysis = self._analyze_technical_content(user_response, context.get('technical_keywords', []))
+                
+                # 项目经验分析
+                experience_analysis = self._analyze_project_experience(user_response, question_type)
+            
+            # 综合评分
+            final_score = self._calculate_final_score(ai_evaluation, tech_analysis, experience_analysis, question_type)
+        
+        return {
+            'score': final_score,
+            'ai_evaluation': ai_evaluation,
+            'technical_analysis': tech_analysis,
+            'experience_analysis': experience_analysis,
+            'question_type': question_type,
+            'feedback': self._generate_feedback(ai_evaluation, tech_analysis, experience_analysis, question_type),
+            'suggestions': self._generate_suggestions(ai_evaluation, tech_analysis, experience_analysis, question_type)
+        }
     
     def _ai_evaluate(self, user_response: str, question_data: Dict, context: Dict) -> Dict:
         """AI智能评估"""
         prompt = self._build_evaluation_prompt(user_response, question_data, context)
-        
-        response = ollama.chat(
-            model="Jerrypoi/deepseek-r1-with-tool-calls:latest",
-            messages=[{"role": "user", "content": prompt}]
+        return self._request_ai_evaluation(prompt, question_data)
+    
+    def _request_ai_evaluation(self, prompt: str, question_data: Dict) -> Dict:
+        """调用模型完成评估并解析结果（JSON Schema约束输出）"""
+        dimensions = list(self._get_criteria(question_data.get('question_type', 'general')))
+        response = llm.chat(
+            self._evaluation_messages(prompt),
+            format=self._evaluation_format(question_data),
+            options={"temperature": 0},
+            model=self.model_name,
+            call_site='stage2.evaluate'
         )
         
         evaluation_text = response['message']['content'].strip()
-        return self._parse_ai_evaluation(evaluation_text)
+        return self._parse_ai_evaluation(evaluation_text, dimensions)
+    
+    def _evaluation_messages(self, prompt: str) -> List[Dict]:
+        """固定的系统提示词在前，单题内容在后"""
+        return llm.build_messages(self.system_prompt, prompt)
+    
+    def _evaluation_format(self, question_data: Dict) -> Dict:
+        """单题评估的输出 Schema"""
+        dimensions = list(self._get_criteria(question_data.get('question_type', 'general')))
+        return build_evaluation_schema(dimensions, self.text_fields)
+    
+    def _build_system_prompt(self) -> str:
+        """构建评估系统提示词：角色、评估标准、关注点和输出要求"""
+        prompt = """你是一位资深的技术面试官，负责评估候选人在第二阶段经历类问题的回答质量。
+第二阶段的第一个问题请候选人介绍一段项目经历（initial_experience_request），后续问题均为针对该经历的深挖追问。
+
+## 评估标准
+按问题类型使用对应维度评分（每个维度0-1分），所有追问按 deep_dive 标准评估：
+"""
+        for question_type, criteria in self.evaluation_criteria.items():
+            prompt += f"\n### {question_type}\n"
+            for dimension in criteria:
+                label, description = self.dimension_descriptions[dimension]
+                prompt += f"- {dimension}（{label}）: {description}\n"
+        
+        prompt += """
+## 特别关注点
+- 技术实现的具体细节
+- 数据和指标的准确性
+- 架构设计的合理性
+- 问题解决的思路和方法
+- 团队协作和个人贡献
+
+## 输出要求
+只输出一个JSON对象，不要输出思考过程或其他文字，分数取0到1之间的小数。
+维度键和字段以用户消息末尾的输出格式为准。
+请确保评分客观公正，重点关注技术能力和项目经验的真实性。
+"""
+        return prompt
+    
+    def _format_context(self, context: Dict) -> str:
+        """格式化评估背景"""
+        lines = []
+        if context.get('jd_data') and context['jd_data'].get('position'):
+            lines.append(f"目标职位: {context['jd_data']['position']}")
+        if context.get('technical_keywords'):
+            lines.append(f"识别的技术关键词: {', '.join(context['technical_keywords'])}")
+        return "\n".join(lines) if lines else "无"
     
     def _build_evaluation_prompt(self, user_response: str, question_data: Dict, context: Dict) -> str:
-        """构建AI评估提示词"""
+        """构建单题评估内容（系统提示词之后的动态部分）"""
         question_type = question_data.get('question_type', 'general')
         
-        prompt = f"""
-你是一位资深的技术面试官，正在评估候选人在第二阶段经历类问题的回答质量。
+        # 维度键与 evaluation_criteria 一致
+        dimensions = list(self._get_criteria(question_type))
+        score_example = ", ".join(f'"{dimension}": 0.0' for dimension in dimensions)
+        
+        return f"""## 评估背景
+{self._format_context(context)}
 
 ## 问题信息
 问题类型: {question_type}
@@ -108,126 +259,91 @@ class ExperienceEvaluator:
 ## 候选人回答
 {user_response}
 
-## 评估背景
+## 输出格式
+{{"scores": {{{score_example}}}, "technical_highlights": "回答中的技术亮点，50字以内", "improvement_suggestions": "具体的改进建议，100字以内", "overall_comment": "对回答的整体评价，80字以内"}}
 """
+    
+    def _ai_evaluate_batch(self, items: List[Dict]) -> List[Optional[Dict]]:
+        """一次调用模型评估多条回答"""
+        item_dimensions = [
+            list(self._get_criteria(item['question_data'].get('question_type', 'general')))
+            for item in items
+        ]
+        all_dimensions = list(dict.fromkeys(d for dims in item_dimensions for d in dims))
+        
+        response = llm.chat(
+            self._evaluation_messages(self._build_batch_evaluation_prompt(items)),
+            format=build_batch_evaluation_schema(all_dimensions, self.text_fields),
+            options={"temperature": 0},
+            model=self.model_name,
+            call_site='stage2.evaluate_batch'
+        )
         
-        if context.get('technical_keywords'):
-            prompt += f"识别的技术关键词: {', '.join(context['technical_keywords'])}\n"
-        
-        if context.get('jd_data') and context['jd_data'].get('position'):
-            prompt += f"目标职位: {context['jd_data']['position']}\n"
-        
-        prompt += """
-## 评估标准
-请从以下维度评估回答质量（每个维度0-1分）：
+        evaluation_text = response['message']['content'].strip()
+        return parse_batch_evaluation(evaluation_text, item_dimensions, self.text_fields, self.field_aliases)
+    
+    def _build_batch_evaluation_prompt(self, items: List[Dict]) -> str:
+        """构建批量评估内容：回答逐条编号，评估标准已在系统提示词中"""
+        prompt = f"""## 评估背景
+{self._format_context({'jd_data': items[-1].get('context', {}).get('jd_data')})}
 
+## 候选人回答
+本阶段的全部回答如下，请按各自的问题类型逐条评分。
 """
-        
-        if question_type == "initial_experience_request":
-            prompt += """
-1. 技术深度 (0-1): 技术描述的深度和专业性
-2. 项目复杂度 (0-1): 项目的技术复杂度和挑战性
-3. 个人贡献 (0-1): 个人在项目中的具体贡献和角色
-4. 问题解决能力 (0-1): 遇到问题时的分析和解决能力
-5. 表达清晰度 (0-1): 表达是否清晰、逻辑性强
-"""
-        else:  # deep_dive
-            prompt += """
-1. 技术准确性 (0-1): 技术回答的准确性和专业性
-2. 细节丰富度 (0-1): 回答中技术细节的丰富程度
-3. 真实经验体现 (0-1): 是否体现出真实的项目经验
-4. 逻辑思维 (0-1): 回答的逻辑性和条理性
+        for index, item in enumerate(items, 1):
+            question_data = item['question_data']
+            item_context = item.get('context', {})
+            dimensions = ", ".join(self._get_criteria(question_data.get('question_type', 'general')))
+            prompt += f"""
+### 第{index}条
+问题类型: {question_data.get('question_type', 'general')}
+评分维度: {dimensions}
+问题内容: {question_data.get('question', '')}
 """
+            if item_context.get('technical_keywords'):
+                prompt += f"识别的技术关键词: {', '.join(item_context['technical_keywords'])}\n"
+            prompt += f"候选人回答:\n{item['user_response']}\n"
         
         prompt += """
-
-## 特别关注点
-- 技术实现的具体细节
-- 数据和指标的准确性
-- 架构设计的合理性
-- 问题解决的思路和方法
-- 团队协作和个人贡献
-
 ## 输出格式
-请按以下格式输出评估结果：
-
-评分:
-- 维度1: 0.X
-- 维度2: 0.X
-- 维度3: 0.X
-- 维度4: 0.X
-- 维度5: 0.X (如果有)
-
-技术亮点: [回答中的技术亮点，50字以内]
-
-改进建议: [具体的改进建议，100字以内]
-
-整体评价: [对回答的整体评价，80字以内]
-
-请确保评分客观公正，重点关注技术能力和项目经验的真实性。
+每条回答对应 items 中的一项，index 与回答编号一致，scores 只包含该条的评分维度：
+{"items": [{"index": 1, "scores": {"维度键": 0.0}, "technical_highlights": "回答中的技术亮点，50字以内", "improvement_suggestions": "具体的改进建议，100字以内", "overall_comment": "对回答的整体评价，80字以内"}]}
 """
-        
         return prompt
     
-    def _parse_ai_evaluation(self, evaluation_text: str) -> Dict:
+    def _parse_ai_evaluation(self, evaluation_text: str, dimensions: List[str]) -> Dict:
         """解析AI评估结果"""
-        result = {
-            'scores': {},
-            'technical_highlights': '',
-            'improvement_suggestions': '',
-            'overall_comment': ''
-        }
-        
         try:
-            # 提取评分
-            score_pattern = r'- (.*?): (0\.\d+)'
-            scores = re.findall(score_pattern, evaluation_text)
-            for dimension, score in scores:
-                result['scores'][dimension.strip()] = float(score)
-            
-            # 提取技术亮点
-            highlight_match = re.search(r'技术亮点[:：]\s*([^\n]+)', evaluation_text)
-            if highlight_match:
-                result['technical_highlights'] = highlight_match.group(1).strip()
-            
-            # 提取改进建议
-            suggestion_match = re.search(r'改进建议[:：]\s*([^\n]+)', evaluation_text)
-            if suggestion_match:
-                result['improvement_suggestions'] = suggestion_match.group(1).strip()
-            
-            # 提取整体评价
-            overall_match = re.search(r'整体评价[:：]\s*([^\n]+)', evaluation_text)
-            if overall_match:
-                result['overall_comment'] = overall_match.group(1).strip()
-                
-        except Exception as e:
+            return parse_structured_evaluation(
+                evaluation_text, dimensions, self.text_fields, self.field_aliases
+            )
+        except EvaluationParseError as e:
             print(f"解析AI评估结果失败: {e}")
-        
-        return result
+            return {
+                'scores': {},
+                'technical_highlights': '',
+                'improvement_suggestions': '',
+                'overall_comment': ''
+            }
     
     def _analyze_technical_content(self, user_response: str, technical_keywords: List[str]) -> Dict:
         """分析技术内容"""
-        response_lower = user_response.lower()
-        
-        # 技术关键词覆盖度
-        mentioned_keywords = [kw for kw in technical_keywords if kw.lower() in response_lower]
-        keyword_coverage = len(mentioned_keywords) / max(len(technical_keywords), 1)
+        # 技术关键词覆盖度（按词表权重加权；词表内的词可以用别名命中，如 k8s → Kubernetes）
+        lexicon = get_lexicon()
+        keyword_coverage_score, mentioned_keywords = keyword_coverage(
+            user_response, set(lexicon.find(user_response)), technical_keywords, lexicon
+        )
         
         # 技术细节指标
-        detail_indicators = [
-            '具体', '实现', '优化', '性能', '架构', '设计', '算法', '数据结构',
-            '并发', '分布式', '缓存', '数据库', '接口', 'API', '框架', '库'
-        ]
-        detail_count = sum(1 for indicator in detail_indicators if indicator in response_lower)
+        detail_count = DETAIL_INDICATORS.count_distinct(user_response)
         detail_score = min(detail_count / 8, 1.0)
         
         # 数量指标（具体数字）
-        import re
-        numbers = re.findall(r'\d+(?:\.\d+)?(?:%|万|千|亿|MB|GB|TB|ms|s|分钟|小时|天)?', user_response)
+        numbers = NUMBER_PATTERN.findall(user_response)
         number_score = min(len(numbers) / 5, 1.0)
         
         return {
-            'keyword_coverage': keyword_coverage,
+            'keyword_coverage': keyword_coverage_score,
             'mentioned_keywords': mentioned_keywords,
             'detail_score': detail_score,
             'number_score': number_score,
@@ -238,50 +354,22 @@ class ExperienceEvaluator:
         """分析项目经验"""
         response_length = len(user_response.strip())
         
-        # 经验指标词
-        experience_indicators = [
-            '负责', '主导', '设计', '开发', '实现', '优化', '解决', '处理',
-            '团队', '合作', '协调', '管理', '维护', '部署', '测试'
-        ]
+        # 经验指标词与项目规模指标
+        indicator_counts = EXPERIENCE_INDICATORS.count_by_group(user_response)
         
-        experience_count = sum(1 for indicator in experience_indicators if indicator in user_response)
+        experience_count = indicator_counts.get('experience', 0)
         experience_score = min(experience_count / 6, 1.0)
         
-        # 项目规模指标
-        scale_indicators = [
-            '用户', '数据', '请求', '并发', '集群', '节点', '服务器',
-            '万', '千', '亿', '千万', '百万'
-        ]
-        
-        scale_count = sum(1 for indicator in scale_indicators if indicator in user_response)
+        scale_count = indicator_counts.get('scale', 0)
         scale_score = min(scale_count / 3, 1.0)
         
-        # 长度评分
-        if question_type == "initial_experience_request":
-            # 第一个问题期望更详细的回答
-            if response_length < 200:
-                length_score = 0.3
-            elif response_length < 500:
-                length_score = 0.7
-            elif response_length < 1000:
-                length_score = 1.0
-            else:
-                length_score = 0.9  # 过长扣分
-        else:
-            # 深挖问题可以相对简短但要有深度
-            if response_length < 50:
-                length_score = 0.2
-            elif response_length < 200:
-                length_score = 0.8
-            elif response_length < 500:
-                length_score = 1.0
-            else:
-                length_score = 0.9
+        # 长度评分（第一个问题期望更详细的回答，深挖问题可以相对简短但要有深度）
+        length = length_score(response_length, stage2_length_band(question_type))
         
         return {
             'experience_score': experience_score,
             'scale_score': scale_score,
-            'length_score': length_score,
+            'length_score': length,
             'response_length': response_length
         }
     
@@ -292,8 +380,7 @@ class ExperienceEvaluator:
         
         # AI评估权重
         if ai_evaluation and ai_evaluation.get('scores'):
-            ai_scores = list(ai_evaluation['scores'].values())
-            ai_score = sum(ai_scores) / len(ai_scores) if ai_scores else 0.5
+            ai_score = weighted_score(ai_evaluation['scores'], self._get_criteria(question_type))
             scores.append(('ai', ai_score, 0.5))
         
         # 技术分析权重
@@ -380,6 +467,7 @@ class ExperienceEvaluator:
     
     def _fallback_evaluate(self, user_response: str, question_type: str) -> float:
         """备用评估方法"""
+        metrics.record_fallback('stage2_fallback_evaluate')
         response_length = len(user_response.strip())
         
         if question_type == "initial_experience_request":
@@ -11,16 +11,25 @@
 - 结合JD要求的个性化技术问题
 - 智能评分和详细反馈
 - 完整的难度调整轨迹记录
+- 可选的IRT难度引擎（能力估计、最大信息量选题、达到精度提前结束）
+- 题目作答统计（按信息量加权抽题、检查疑似错标的题目）
+- 按JD离线预生成的定制问题（面试时直接取用）
 """
 
 from .technical_engine import TechnicalQuestionEngine
 from .adaptive_difficulty import AdaptiveDifficultyManager
+from .irt_difficulty import IRTDifficultyEngine
 from .question_bank import TechnicalQuestionBank
+from .question_stats import QuestionStatsStore
+from .question_variants import QuestionVariantStore
 from .technical_evaluator import TechnicalEvaluator
 
 __all__ = [
     'TechnicalQuestionEngine',
     'AdaptiveDifficultyManager',
+    'IRTDifficultyEngine',
     'TechnicalQuestionBank',
+    'QuestionStatsStore',
+    'QuestionVariantStore',
     'TechnicalEvaluator'
 ]
@@ -56,7 +56,8 @@ class AdaptiveDifficultyManager:
         }
     
     def adjust_difficulty(self, score: float, question_context: Dict = None, 
-                         response_analysis: Dict = None) -> Dict:
+                         response_analysis: Dict = None, target_difficulty: str = None,
+                         target_reason: str = "") -> Dict:
         """
         根据回答质量动态调整难度
         
@@ -64,6 +65,8 @@ class AdaptiveDifficultyManager:
             score: 用户回答得分 (0-1)
             question_context: 问题上下文
             response_analysis: 回答分析结果
+            target_difficulty: 由外部模型（如IRT能力估计）直接给出的新难度，不再按阈值逐级调整
+            target_reason: 外部模型给出的调整原因
             
         Returns:
             难度调整结果
@@ -72,7 +75,11 @@ class AdaptiveDifficultyManager:
         adjustment_reason = ""
         
         # 执行难度调整逻辑
-        if score >= self.adjustment_thresholds["increase"]:
+        if target_difficulty in self.difficulty_levels:
+            new_difficulty = target_difficulty
+            adjustment_reason = f"{target_reason}(得分{score:.2f})，难度：{previous_difficulty}→{new_difficulty}"
+            
+        elif score >= self.adjustment_thresholds["increase"]:
             # 回答优秀，提升难度
             new_difficulty = self._increase_difficulty()
             if new_difficulty != previous_difficulty:
@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+项目反应理论（IRT）难度引擎
+
+AdaptiveDifficultyManager 按固定阈值在 B1/B2/B3 间逐级移动，3-5 道题往往还没走到候选人的真实水平。
+这里为每位候选人维护能力估计 θ，为每道题维护离线标定的参数（区分度 a、难度 b）：
+- 期望得分 p = 1 / (1 + exp(-a(θ - b)))，实际得分 = p + 噪声（标准差 σ），得分保持 0-1 连续值
+- 能力估计在 θ 网格上做贝叶斯更新（先验由第二阶段表现/简历匹配度给出的初始难度决定），
+  同时得到估计的标准误
+- 题目信息量 (a·p(1-p))² / σ² 在 θ = b 处最大：题目按 b 排序建立索引，
+  二分查找当前 θ 附近的题目，在窗口内选信息量最大的一道
+- 标准误达到目标精度即可提前结束，相同精度需要的题目更少，模型出题和评估调用也更少
+
+题目参数保存在 Data/irt_items.json，由归档得分离线标定：
+    python -m ai_interview.stages.stage3_technical.irt_difficulty calibrate archive.jsonl
+归档记录为 JSON Lines，每行包含 session_id（或 candidate_id）、question_id（或题目原文）、score，
+未标定的题目使用所属难度级别的默认参数。
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .question_bank import TechnicalQuestionBank
+
+
+DEFAULT_ITEM_PARAMETERS_PATH = 'Data/irt_items.json'
+
+# 各难度级别的默认题目难度 b，也作为对应初始难度的能力先验均值
+LEVEL_DIFFICULTY = {'B1': -1.0, 'B2': 0.0, 'B3': 1.0}
+DEFAULT_DISCRIMINATION = 1.0
+DEFAULT_NOISE = 0.15          # 得分噪声标准差 σ（标定时按残差更新）
+
+ABILITY_GRID = np.linspace(-4.0, 4.0, 161)
+PRIOR_STD = 1.0
+
+# 提前结束：至少回答 MIN_QUESTIONS 题且能力估计标准误不超过 TARGET_STANDARD_ERROR
+MIN_QUESTIONS = 2
+TARGET_STANDARD_ERROR = 0.3
+
+# 选题时在 θ 附近按难度排序的候选窗口大小（两侧各取）
+SELECTION_WINDOW = 32
+
+
+def expected_score(theta, a, b):
+    """期望得分 p(θ)"""
+    return 1.0 / (1.0 + np.exp(-a * (theta - b)))
+
+
+def item_information(theta, a, b, noise: float = DEFAULT_NOISE):
+    """题目在 θ 处的信息量"""
+    p = expected_score(theta, a, b)
+    return (a * p * (1.0 - p)) ** 2 / noise ** 2
+
+
+def level_for_ability(theta: float) -> str:
+    """能力估计对应的难度级别（默认难度最接近的级别）"""
+    return min(LEVEL_DIFFICULTY, key=lambda level: abs(LEVEL_DIFFICULTY[level] - theta))
+
+
+class ItemIndex:
+    """按难度排序的题目参数索引"""
+
+    def __init__(self, items: Dict[str, Dict], noise: float = DEFAULT_NOISE):
+        """
+        Args:
+            items: {题目编号: {'a', 'b', 'level'}}
+            noise: 得分噪声标准差
+        """
+        order = sorted(items, key=lambda item_id: items[item_id]['b'])
+        self.ids = order
+        self.positions = {item_id: position for position, item_id in enumerate(order)}
+        self.a = np.array([items[item_id]['a'] for item_id in order], dtype=np.float64)
+        self.b = np.array([items[item_id]['b'] for item_id in order], dtype=np.float64)
+        self.levels = [items[item_id].get('level') for item_id in order]
+        self.noise = noise
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def parameters(self, item_id: Optional[str], level: Optional[str] = None) -> Tuple[float, float]:
+        """题目参数 (a, b)，索引中没有的题目按难度级别取默认值"""
+        position = self.positions.get(item_id)
+        if position is not None:
+            return float(self.a[position]), float(self.b[position])
+        return DEFAULT_DISCRIMINATION, LEVEL_DIFFICULTY.get(level, 0.0)
+
+    def most_informative(self, theta: float, exclude: Iterable[str] = (),
+                         window: int = SELECTION_WINDOW) -> Optional[str]:
+        """θ 处信息量最大的未使用题目"""
+        if not self.ids:
+            return None
+        exclude = set(exclude)
+        center = int(np.searchsorted(self.b, theta))
+        while True:
+            start, end = max(0, center - window), min(len(self.ids), center + window)
+            candidates = [position for position in range(start, end) if self.ids[position] not in exclude]
+            if candidates:
+                positions = np.array(candidates)
+                information = item_information(theta, self.a[positions], self.b[positions], self.noise)
+                # 信息量相同的题目（如未标定、同级别默认参数的题目）随机选一道，避免总是抽到同一题
+                best = positions[np.isclose(information, information.max())]
+                return self.ids[int(random.choice(best))]
+            if start == 0 and end == len(self.ids):
+                return None
+            window *= 2
+
+    @classmethod
+    def load(cls, question_pool: Dict[str, List[Dict]],
+             path: str = DEFAULT_ITEM_PARAMETERS_PATH) -> 'ItemIndex':
+        """
+        由题库和标定文件构建索引
+
+        Args:
+            question_pool: TechnicalQuestionBank.question_pool（{级别: [{'id', ...}]}）
+            path: 标定参数文件，不存在时全部使用默认参数
+        """
+        calibrated, noise = {}, DEFAULT_NOISE
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                calibrated = data.get('items', {})
+                noise = float(data.get('noise', DEFAULT_NOISE))
+            except Exception as e:
+                print(f"加载题目参数失败: {e}")
+
+        items = {}
+        for level, questions in question_pool.items():
+            for question in questions:
+                params = calibrated.get(question['id'], {})
+                items[question['id']] = {
+                    'a': float(params.get('a', DEFAULT_DISCRIMINATION)),
+                    'b': float(params.get('b', LEVEL_DIFFICULTY.get(level, 0.0))),
+                    'level': level
+                }
+        return cls(items, noise)
+
+
+_index_cache = {}
+
+
+def get_item_index(question_pool: Dict[str, List[Dict]],
+                   path: str = DEFAULT_ITEM_PARAMETERS_PATH) -> ItemIndex:
+    """共享的题目索引（题库与标定文件不变时各会话复用）"""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    key = (path, mtime, tuple((level, len(questions)) for level, questions in sorted(question_pool.items())))
+    index = _index_cache.get(key)
+    if index is None:
+        index = ItemIndex.load(question_pool, path)
+        _index_cache.clear()
+        _index_cache[key] = index
+    return index
+
+
+class IRTDifficultyEngine:
+    """
+    单个候选人的能力估计与选题
+
+    用法：
+        engine = IRTDifficultyEngine(get_item_index(bank.question_pool))
+        engine.start('B2')
+        question_id = engine.select_question(exclude=bank.used_questions)
+        engine.update(question_id, score)
+        engine.is_converged()
+    """
+
+    def __init__(self, index: ItemIndex, target_standard_error: float = TARGET_STANDARD_ERROR,
+                 min_questions: int = MIN_QUESTIONS):
+        self.index = index
+        self.target_standard_error = target_standard_error
+        self.min_questions = min_questions
+        self.start()
+
+    def start(self, initial_difficulty: str = 'B2'):
+        """以初始难度对应的能力为先验均值重新开始"""
+        prior_mean = LEVEL_DIFFICULTY.get(initial_difficulty, 0.0)
+        self.log_posterior = -0.5 * ((ABILITY_GRID - prior_mean) / PRIOR_STD) ** 2
+        self.responses = []
+        self._summarize()
+
+    def _summarize(self):
+        weights = np.exp(self.log_posterior - self.log_posterior.max())
+        weights /= weights.sum()
+        self.ability = float(np.dot(weights, ABILITY_GRID))
+        self.standard_error = float(np.sqrt(np.dot(weights, (ABILITY_GRID - self.ability) ** 2)))
+
+    def update(self, question_id: Optional[str], score: float, level: Optional[str] = None) -> Dict:
+        """
+        记录一次作答并更新能力估计
+
+        Args:
+            question_id: 题目编号（题库外的题目按 level 取默认参数）
+            score: 得分 (0-1)
+            level: 题目难度级别
+        """
+        a, b = self.index.parameters(question_id, level)
+        predicted = expected_score(ABILITY_GRID, a, b)
+        self.log_posterior = self.log_posterior - 0.5 * ((score - predicted) / self.index.noise) ** 2
+        previous = self.ability
+        self._summarize()
+        self.responses.append({'question_id': question_id, 'score': score, 'a': a, 'b': b})
+        return {
+            'previous_ability': round(previous, 3),
+            'ability': round(self.ability, 3),
+            'standard_error': round(self.standard_error, 3),
+            'level': self.level()
+        }
+
+    def select_question(self, exclude: Iterable[str] = ()) -> Optional[str]:
+        """当前能力估计下信息量最大的题目"""
+        return self.index.most_informative(self.ability, exclude)
+
+    def level(self) -> str:
+        return level_for_ability(self.ability)
+
+    def is_converged(self) -> bool:
+        """能力估计是否已达到目标精度"""
+        return len(self.responses) >= self.min_questions and self.standard_error <= self.target_standard_error
+
+    def summary(self) -> Dict:
+        return {
+            'ability': round(self.ability, 3),
+            'standard_error': round(self.standard_error, 3),
+            'level': self.level(),
+            'questions_answered': len(self.responses),
+            'converged': self.is_converged()
+        }
+
+
+def calibrate(responses: Sequence[Tuple[str, str, float]], item_levels: Dict[str, str],
+              iterations: int = 30, prior_weight: float = 2.0) -> Dict:
+    """
+    由归档得分标定题目参数
+
+    交替估计：固定题目参数求各会话的能力后验均值，再固定能力用带先验的 Gauss-Newton 更新
+    每道题的 (a, b)；作答少的题目参数靠近所属级别的默认值。
+
+    Args:
+        responses: (会话编号, 题目编号, 得分) 序列
+        item_levels: {题目编号: 难度级别}
+        iterations: 交替迭代次数
+        prior_weight: 参数先验（级别默认值）的权重
+
+    Returns:
+        {'noise', 'items': {题目编号: {'a', 'b', 'level', 'responses'}}}
+    """
+    sessions = sorted({session for session, _, _ in responses})
+    items = sorted({item for _, item, _ in responses})
+    session_index = {session: index for index, session in enumerate(sessions)}
+    item_index = {item: index for index, item in enumerate(items)}
+    rows = np.array([session_index[session] for session, _, _ in responses], dtype=np.int64)
+    columns = np.array([item_index[item] for _, item, _ in responses], dtype=np.int64)
+    scores = np.clip(np.array([score for _, _, score in responses], dtype=np.float64), 0.0, 1.0)
+
+    b_prior = np.array([LEVEL_DIFFICULTY.get(item_levels.get(item), 0.0) for item in items])
+    a = np.full(len(items), DEFAULT_DISCRIMINATION)
+    b = b_prior.copy()
+    noise = DEFAULT_NOISE
+    theta = np.zeros(len(sessions))
+
+    for _ in range(iterations):
+        # 能力：每个会话在网格上的后验均值（标准正态先验）
+        predicted = expected_score(ABILITY_GRID[None, :], a[columns, None], b[columns, None])
+        log_likelihood = -0.5 * ((scores[:, None] - predicted) / noise) ** 2
+        log_posterior = np.zeros((len(sessions), len(ABILITY_GRID)))
+        np.add.at(log_posterior, rows, log_likelihood)
+        log_posterior -= 0.5 * ABILITY_GRID[None, :] ** 2
+        weights = np.exp(log_posterior - log_posterior.max(axis=1, keepdims=True))
+        weights /= weights.sum(axis=1, keepdims=True)
+        theta = weights @ ABILITY_GRID
+
+        # 题目参数：Gauss-Newton 一步，先验拉向 a=1、b=级别默认值
+        t = theta[rows]
+        p = expected_score(t, a[columns], b[columns])
+        slope = p * (1.0 - p)
+        residual = scores - p
+        grad_a = (t - b[columns]) * slope
+        grad_b = -a[columns] * slope
+        n_items = len(items)
+        h_aa = np.bincount(columns, grad_a * grad_a, n_items) + prior_weight
+        h_bb = np.bincount(columns, grad_b * grad_b, n_items) + prior_weight
+        h_ab = np.bincount(columns, grad_a * grad_b, n_items)
+        g_a = np.bincount(columns, grad_a * residual, n_items) - prior_weight * (a - DEFAULT_DISCRIMINATION)
+        g_b = np.bincount(columns, grad_b * residual, n_items) - prior_weight * (b - b_prior)
+        determinant = h_aa * h_bb - h_ab ** 2
+        a = np.clip(a + (h_bb * g_a - h_ab * g_b) / determinant, 0.2, 4.0)
+        b = np.clip(b + (h_aa * g_b - h_ab * g_a) / determinant, -4.0, 4.0)
+
+        p = expected_score(theta[rows], a[columns], b[columns])
+        noise = max(float(np.sqrt(np.mean((scores - p) ** 2))), 0.05)
+
+    counts = np.bincount(columns, minlength=len(items))
+    return {
+        'noise': round(noise, 4),
+        'items': {
+            item: {
+                'a': round(float(a[index]), 4),
+                'b': round(float(b[index]), 4),
+                'level': item_levels.get(item),
+                'responses': int(counts[index])
+            }
+            for index, item in enumerate(items)
+        }
+    }
+
+
+def load_archived_responses(path: str, question_pool: Dict[str, List[Dict]]) -> List[Tuple[str, str, float]]:
+    """
+    读取归档的第三阶段得分
+
+    题目可以用 question_id 或题目原文标识，题库外的题目（备用题、模型生成题）跳过。
+    """
+    ids_by_text = {
+        question['question']: question['id'] for questions in question_pool.values() for question in questions
+    }
+    known_ids = set(ids_by_text.values())
+    responses = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"第{line_number}行解析失败，已跳过: {e}")
+                continue
+            if str(record.get('stage', 3)).lower().replace('stage', '').strip() != '3':
+                continue
+            session = record.get('session_id') or record.get('candidate_id')
+            question = record.get('question')
+            question_text = question.get('question') if isinstance(question, dict) else question
+            question_id = record.get('question_id') or ids_by_text.get(question_text)
+            score = record.get('score')
+            if session is None or question_id not in known_ids or not isinstance(score, (int, float)):
+                continue
+            responses.append((str(session), question_id, float(score)))
+    return responses
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="第三阶段题目参数离线标定")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    calibrate_parser = subparsers.add_parser('calibrate', help="由归档得分标定题目参数")
+    calibrate_parser.add_argument('archive', help="归档记录（JSON Lines）")
+    calibrate_parser.add_argument('--output', default=DEFAULT_ITEM_PARAMETERS_PATH, help="题目参数文件")
+    calibrate_parser.add_argument('--iterations', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    question_pool = TechnicalQuestionBank().question_pool
+    responses = load_archived_responses(args.archive, question_pool)
+    if not responses:
+        print("没有可用于标定的第三阶段得分")
+        return 1
+
+    item_levels = {question['id']: level for level, questions in question_pool.items() for question in questions}
+    started = time.time()
+    result = calibrate(responses, item_levels, iterations=args.iterations)
+    result['calibrated_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    result['sessions'] = len({session for session, _, _ in responses})
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps({
+        'responses': len(responses),
+        'sessions': result['sessions'],
+        'items': len(result['items']),
+        'noise': result['noise'],
+        'elapsed_seconds': round(time.time() - started, 2),
+        'output': args.output
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
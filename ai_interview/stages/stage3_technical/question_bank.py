@@ -3,19 +3,46 @@
 技术问题库管理器
 
 管理技术类问题的获取、筛选和生成，支持B1/B2/B3难度级别。
+同一难度内按题目作答统计加权抽题（见 question_stats）；
+JD有离线预生成的定制问题时（见 question_variants），优先抽取并以定制版本出题。
+
+题目编号由等级和题目内容（问题、岗位、能力项）的哈希组成，题库增删或调整其他行时不变，
+作答统计和IRT参数等按编号保存的数据不会对应到别的题目；完全相同的行按出现顺序加序号区分。
 """
 
+import hashlib
 import pandas as pd
 import random
 import ollama
 from typing import Dict, List, Optional
+from ... import metrics
+from .question_stats import QuestionStatsStore
+from .question_variants import QuestionVariantStore, get_variant_store, question_hash
+
+
+def make_question_id(level: str, question: str, position: str, capability: str) -> str:
+    """按题目内容生成稳定的题目编号，如 B2_3f9a1c07d2"""
+    content = '\x1f'.join(str(value) for value in (question, position, capability))
+    return f"{level}_{hashlib.sha1(content.encode('utf-8')).hexdigest()[:10]}"
 
 
 class TechnicalQuestionBank:
     """技术问题库管理器"""
     
-    def __init__(self):
+    def __init__(self, stats: Optional[QuestionStatsStore] = None,
+                 variants: Optional[QuestionVariantStore] = None):
+        """
+        Args:
+            stats: 题目作答统计，默认为本题库自己的内存统计（不持久化）
+            variants: JD定制问题存储，默认使用共享存储（尚未预生成时不使用）
+        """
+        self.stats = stats or QuestionStatsStore(None)
+        self.variants = variants or get_variant_store()
+        self._jd_variants = {}
         self.question_pool = self._load_question_pool()
+        self.questions_by_id = {
+            question['id']: question for questions in self.question_pool.values() for question in questions
+        }
         self.used_questions = set()
     
     def _load_question_pool(self):
@@ -23,16 +50,22 @@ class TechnicalQuestionBank:
         try:
             df = pd.read_csv('Data/data.csv', encoding='utf-8')
             question_pool = {'B1': [], 'B2': [], 'B3': []}
+            id_counts = {}
             
             for _, row in df.iterrows():
                 level = row['建议等级']
                 if level in question_pool:
+                    question_id = make_question_id(level, row['问题（GPT风格，合成）'], row['岗位'], row['能力项'])
+                    # 完全相同的行按出现顺序编号
+                    id_counts[question_id] = id_counts.get(question_id, 0) + 1
+                    if id_counts[question_id] > 1:
+                        question_id = f"{question_id}_{id_counts[question_id]}"
                     question_data = {
                         'question': row['问题（GPT风格，合成）'],
                         'position': row['岗位'],
                         'capability': row['能力项'],
                         'level': level,
-                        'id': f"{level}_{len(question_pool[level])}"
+                        'id': question_id
                     }
                     question_pool[level].append(question_data)
             
@@ -49,6 +82,7 @@ class TechnicalQuestionBank:
         # 尝试从题库选择
         pool_question = self._select_from_pool(difficulty, jd_data, asked_questions)
         if pool_question:
+            metrics.QUESTION_BANK_DRAWS.inc(difficulty=difficulty, source='question_pool')
             return {
                 **pool_question,
                 'question_number': question_number,
@@ -57,6 +91,8 @@ class TechnicalQuestionBank:
             }
         
         # 备用：生成简单问题
+        metrics.QUESTION_BANK_DRAWS.inc(difficulty=difficulty, source='fallback')
+        metrics.record_fallback('stage3_fallback_question')
         fallback_question = self._get_fallback_question(difficulty)
         return {
             'question': fallback_question,
@@ -69,6 +105,21 @@ class TechnicalQuestionBank:
             'category': '技术能力'
         }
     
+    def get_question_by_id(self, question_id: str, question_number: int = 1,
+                           total_questions: int = 3, jd_data: Dict = None) -> Optional[Dict]:
+        """按编号取题库中的问题（IRT选题使用）"""
+        selected = self.questions_by_id.get(question_id)
+        if selected is None:
+            return None
+        self.used_questions.add(question_id)
+        metrics.QUESTION_BANK_DRAWS.inc(difficulty=selected['level'], source='question_pool')
+        return {
+            **self._format_question(selected, jd_data),
+            'question_number': question_number,
+            'total_questions': total_questions,
+            'stage': '第三阶段：技术类问题'
+        }
+    
     def _select_from_pool(self, difficulty: str, jd_data: Dict = None, 
                          asked_questions: List = None) -> Optional[Dict]:
         """从题库中选择问题"""
@@ -80,17 +131,59 @@ class TechnicalQuestionBank:
         if not available_questions:
             return None
         
-        selected = random.choice(available_questions)
+        # 该JD有定制版本的题目优先（已按相关度离线选出）
+        variants = self._variants_for(jd_data)
+        if variants:
+            personalized = [q for q in available_questions if self._variant_text(q, variants)]
+            if personalized:
+                available_questions = personalized
+        
+        # 信息量高的题目多抽，曝光不足的题目保持探索，疑似错标的题目降权
+        weights = self.stats.sampling_weights(
+            [q['id'] for q in available_questions],
+            [q['id'] for q in self.question_pool[difficulty]]
+        )
+        selected = random.choices(available_questions, weights=weights)[0]
         self.used_questions.add(selected['id'])
         
-        return {
+        return self._format_question(selected, jd_data)
+    
+    def _variants_for(self, jd_data: Dict = None) -> Dict:
+        """该JD的预生成定制问题（每个JD只查询一次）"""
+        if self.variants is None or not jd_data or not jd_data.get('jd_id'):
+            return {}
+        jd_id = jd_data['jd_id']
+        if jd_id not in self._jd_variants:
+            try:
+                self._jd_variants[jd_id] = self.variants.get_for_jd(jd_id)
+            except Exception as e:
+                print(f"读取定制问题失败: {e}")
+                self._jd_variants[jd_id] = {}
+        return self._jd_variants[jd_id]
+    
+    def _variant_text(self, selected: Dict, variants: Dict) -> Optional[str]:
+        """题目的有效定制版本（原题修改后的旧改写不使用）"""
+        variant = variants.get(selected['id'])
+        if variant is None or variant[0] != question_hash(selected['question']):
+            return None
+        return variant[1]
+    
+    def _format_question(self, selected: Dict, jd_data: Dict = None) -> Dict:
+        question = {
             'question': selected['question'],
-            'difficulty': difficulty,
+            'question_id': selected['id'],
+            'difficulty': selected['level'],
             'question_type': 'technical',
             'source': 'question_pool',
             'category': selected['capability'],
             'position_type': selected['position']
         }
+        variant_text = self._variant_text(selected, self._variants_for(jd_data))
+        if variant_text:
+            question['question'] = variant_text
+            question['base_question'] = selected['question']
+            question['personalized'] = True
+        return question
     
     def _get_fallback_question(self, difficulty: str) -> str:
         """获取备用问题"""
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+题目作答统计
+
+题库在同一难度内均匀随机抽题，但部分题目对其“建议等级”来说一贯偏难或偏易。
+这里为每道题在线维护作答统计，每次评分后增量更新（Welford 算法，O(1)）：
+- 曝光次数、平均得分、得分方差
+- 区分度估计：该题得分与候选人此前各题平均分（能力代理）的相关系数
+
+抽题时（TechnicalQuestionBank._select_from_pool）按统计加权：
+- 曝光不足 MIN_EXPOSURES 的题目权重为 1（继续探索）
+- 其余题目权重与信息量 (区分度² × p(1-p)) 成正比，区分度低、几乎人人答对/答错的题目少抽
+- 平均分显著偏离同级题目（疑似等级标注错误）的题目降权，并可通过 mislabelled() 列出
+
+统计按题目编号分片，每个分片一把锁，并发会话更新不同题目时互不等待；读取不加锁。
+QuestionStatsStore 默认只在内存中统计；桌面界面通过 get_question_stats() 显式使用持久化的共享统计
+（Data/question_stats.json，进程退出时保存），压测和离线工具不会写入该文件。也可以从事件日志重建：
+    python -m ai_interview.stages.stage3_technical.question_stats rebuild --log-dir Data/interview_events
+    python -m ai_interview.stages.stage3_technical.question_stats report
+"""
+
+import argparse
+import atexit
+import json
+import math
+import os
+import sys
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+
+DEFAULT_QUESTION_STATS_PATH = 'Data/question_stats.json'
+SHARD_COUNT = 16
+
+# 曝光不足时不参与加权和错标判断
+MIN_EXPOSURES = 20
+
+# 信息量权重：以典型区分度为 1，限制在 [MIN_WEIGHT, MAX_WEIGHT]
+TYPICAL_DISCRIMINATION = 0.3
+MIN_WEIGHT = 0.05
+MAX_WEIGHT = 4.0
+
+# 平均分与同级题目相差超过 MISLABEL_MARGIN 且超过 MISLABEL_Z 个标准误时视为疑似错标
+MISLABEL_MARGIN = 0.1
+MISLABEL_Z = 3.0
+MISLABEL_WEIGHT = 0.2
+
+LEVELS = ('B1', 'B2', 'B3')
+
+
+class QuestionStat:
+    """单道题的在线统计"""
+
+    __slots__ = ('n', 'mean', 'm2', 'pairs', 'pair_score_mean', 'pair_ability_mean',
+                 'pair_score_m2', 'pair_ability_m2', 'comoment')
+
+    def __init__(self, values: Optional[List[float]] = None):
+        (self.n, self.mean, self.m2, self.pairs, self.pair_score_mean, self.pair_ability_mean,
+         self.pair_score_m2, self.pair_ability_m2, self.comoment) = values or (0, 0.0, 0.0, 0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    def update(self, score: float, ability: Optional[float] = None):
+        self.n += 1
+        delta = score - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (score - self.mean)
+        if ability is None:
+            return
+        self.pairs += 1
+        delta_score = score - self.pair_score_mean
+        delta_ability = ability - self.pair_ability_mean
+        self.pair_score_mean += delta_score / self.pairs
+        self.pair_ability_mean += delta_ability / self.pairs
+        self.pair_score_m2 += delta_score * (score - self.pair_score_mean)
+        self.pair_ability_m2 += delta_ability * (ability - self.pair_ability_mean)
+        self.comoment += delta_score * (ability - self.pair_ability_mean)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def discrimination(self) -> Optional[float]:
+        """得分与能力代理的相关系数（样本不足或无方差时为 None）"""
+        denominator = math.sqrt(self.pair_score_m2 * self.pair_ability_m2)
+        if self.pairs < 3 or denominator <= 1e-12:
+            return None
+        return self.comoment / denominator
+
+    def to_list(self) -> List[float]:
+        return [getattr(self, name) for name in self.__slots__]
+
+
+class QuestionStatsStore:
+    """按题目编号分片的作答统计"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_QUESTION_STATS_PATH, shards: int = SHARD_COUNT):
+        """
+        Args:
+            path: 统计文件，为 None 时只在内存中统计
+            shards: 分片数
+        """
+        self.path = path
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._shards = [{} for _ in range(shards)]
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def _shard(self, question_id: str) -> int:
+        return zlib.crc32(question_id.encode('utf-8')) % len(self._shards)
+
+    def update(self, question_id: str, score: float, ability: Optional[float] = None):
+        """
+        记录一次作答
+
+        Args:
+            question_id: 题目编号
+            score: 得分（0-1）
+            ability: 候选人能力代理（此前各题平均分），没有时只更新得分统计
+        """
+        index = self._shard(question_id)
+        with self._locks[index]:
+            stat = self._shards[index].get(question_id)
+            if stat is None:
+                stat = self._shards[index][question_id] = QuestionStat()
+            stat.update(float(score), None if ability is None else float(ability))
+
+    def get(self, question_id: str) -> Optional[QuestionStat]:
+        return self._shards[self._shard(question_id)].get(question_id)
+
+    def summary(self, question_id: str) -> Dict:
+        """{'exposures', 'mean_score', 'variance', 'discrimination'}"""
+        stat = self.get(question_id)
+        if stat is None:
+            return {'exposures': 0, 'mean_score': None, 'variance': None, 'discrimination': None}
+        return {'exposures': stat.n, 'mean_score': stat.mean, 'variance': stat.variance,
+                'discrimination': stat.discrimination}
+
+    def level_mean(self, question_ids: Iterable[str]) -> Optional[float]:
+        """一组题目（同一等级）按曝光加权的平均得分"""
+        total, count = 0.0, 0
+        for question_id in question_ids:
+            stat = self.get(question_id)
+            if stat is not None and stat.n:
+                total += stat.mean * stat.n
+                count += stat.n
+        return total / count if count else None
+
+    def mislabel_direction(self, question_id: str, level_mean: Optional[float]) -> Optional[str]:
+        """疑似错标时返回 'too_hard' 或 'too_easy'"""
+        stat = self.get(question_id)
+        if stat is None or level_mean is None or stat.n < MIN_EXPOSURES:
+            return None
+        gap = stat.mean - level_mean
+        standard_error = math.sqrt(stat.variance / stat.n) if stat.variance > 0 else 0.0
+        if abs(gap) < MISLABEL_MARGIN or abs(gap) < MISLABEL_Z * standard_error:
+            return None
+        return 'too_easy' if gap > 0 else 'too_hard'
+
+    def sampling_weights(self, question_ids: List[str], level_question_ids: Iterable[str]) -> List[float]:
+        """
+        抽题权重
+
+        Args:
+            question_ids: 候选题目
+            level_question_ids: 该等级的全部题目（用于计算同级平均分）
+        """
+        level_mean = self.level_mean(level_question_ids)
+        weights = []
+        for question_id in question_ids:
+            stat = self.get(question_id)
+            if stat is None or stat.n < MIN_EXPOSURES:
+                weights.append(1.0)
+                continue
+            discrimination = max(stat.discrimination or 0.0, MIN_WEIGHT)
+            spread = 4 * stat.mean * (1 - stat.mean) if 0 < stat.mean < 1 else 0.0
+            weight = (discrimination / TYPICAL_DISCRIMINATION) ** 2 * spread
+            weight = min(max(weight, MIN_WEIGHT), MAX_WEIGHT)
+            if self.mislabel_direction(question_id, level_mean):
+                weight *= MISLABEL_WEIGHT
+            weights.append(weight)
+        return weights
+
+    def mislabelled(self, question_pool: Dict[str, List[Dict]]) -> List[Dict]:
+        """
+        疑似等级标注错误的题目
+
+        Returns:
+            [{'question_id', 'question', 'level', 'suggested_level', 'exposures', 'mean_score',
+              'level_mean', 'discrimination'}, ...]，按偏离程度降序
+        """
+        flagged = []
+        for level, questions in question_pool.items():
+            level_mean = self.level_mean(question['id'] for question in questions)
+            for question in questions:
+                direction = self.mislabel_direction(question['id'], level_mean)
+                if direction is None:
+                    continue
+                stat = self.get(question['id'])
+                position = LEVELS.index(level) if level in LEVELS else 1
+                position = position - 1 if direction == 'too_easy' else position + 1
+                flagged.append({
+                    'question_id': question['id'],
+                    'question': question.get('question'),
+                    'level': level,
+                    'suggested_level': LEVELS[min(max(position, 0), len(LEVELS) - 1)],
+                    'exposures': stat.n,
+                    'mean_score': round(stat.mean, 3),
+                    'level_mean': round(level_mean, 3),
+                    'discrimination': None if stat.discrimination is None else round(stat.discrimination, 3)
+                })
+        flagged.sort(key=lambda item: abs(item['mean_score'] - item['level_mean']), reverse=True)
+        return flagged
+
+    def load(self, path: str):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"加载题目统计失败: {e}")
+            return
+        for question_id, values in data.get('questions', {}).items():
+            index = self._shard(question_id)
+            with self._locks[index]:
+                self._shards[index][question_id] = QuestionStat(values)
+
+    def save(self, path: Optional[str] = None):
+        """保存统计（先写临时文件再替换）"""
+        path = path or self.path
+        if not path:
+            return
+        questions = {}
+        for lock, shard in zip(self._locks, self._shards):
+            with lock:
+                questions.update((question_id, stat.to_list()) for question_id, stat in shard.items())
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'fields': list(QuestionStat.__slots__), 'questions': questions}, f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            print(f"保存题目统计失败: {e}")
+
+    def clear(self):
+        for lock, shard in zip(self._locks, self._shards):
+            with lock:
+                shard.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_question_stats(path: str = DEFAULT_QUESTION_STATS_PATH) -> QuestionStatsStore:
+    """进程内共享的持久化题目统计（首次使用时加载，进程退出时保存），由界面显式传给面试管理器"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = QuestionStatsStore(path)
+                atexit.register(_store.save)
+    return _store
+
+
+def ability_proxy(previous_scores: List[float]) -> Optional[float]:
+    """候选人能力代理：此前各题的平均分"""
+    return sum(previous_scores) / len(previous_scores) if previous_scores else None
+
+
+def rebuild_from_event_log(store: QuestionStatsStore, event_log) -> int:
+    """按事件日志中的作答记录重建统计，返回计入的作答数"""
+    store.clear()
+    count = 0
+    for interview in event_log.interviews():
+        data = event_log.interview_data(interview['interview_id'])
+        if not data:
+            continue
+        previous = [data['stage_summaries'].get('stage2', {}).get('average_score')]
+        previous = [score for score in previous if isinstance(score, (int, float))]
+        for turn in data['turns']:
+            if turn['stage'] != 3 or not isinstance(turn.get('score'), (int, float)):
+                continue
+            if turn.get('question_id'):
+                store.update(turn['question_id'], turn['score'], ability_proxy(previous))
+                count += 1
+            previous.append(turn['score'])
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="题目作答统计")
+    parser.add_argument('--stats', default=DEFAULT_QUESTION_STATS_PATH, help="统计文件")
+    commands = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = commands.add_parser('rebuild', help="从事件日志重建统计")
+    rebuild_parser.add_argument('--log-dir', default='Data/interview_events')
+    commands.add_parser('report', help="列出疑似等级标注错误的题目")
+    args = parser.parse_args(argv)
+
+    store = QuestionStatsStore(args.stats)
+    if args.command == 'rebuild':
+        from ...event_log import InterviewEventLog
+        log = InterviewEventLog(args.log_dir)
+        try:
+            count = rebuild_from_event_log(store, log)
+        finally:
+            log.close()
+        store.save()
+        print(f"已计入 {count} 次作答")
+    elif args.command == 'report':
+        from .question_bank import TechnicalQuestionBank
+        flagged = store.mislabelled(TechnicalQuestionBank(stats=store).question_pool)
+        width = max((len(item['question_id']) for item in flagged), default=0)
+        for item in flagged:
+            print(f"{item['question_id']:<{width}} {item['level']} -> {item['suggested_level']}  "
+                  f"平均分 {item['mean_score']:.2f}（同级 {item['level_mean']:.2f}，{item['exposures']}次）  "
+                  f"{(item['question'] or '')[:40]}")
+        print(f"共 {len(flagged)} 道疑似错标")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+题库问题的JD定制改写（离线预生成）
+
+题库中是通用的合成问题（如“遇到需要处理「X」的真实场景时……”），第一、二阶段的问题在面试时由模型实时定制。
+这里在低峰时段按JD批量预生成第三阶段问题的定制版本：
+- 按岗位和技术关键词从题库中选出与JD相关的问题（每个难度若干道）
+- 用模型把通用问题改写为贴合该JD场景的问题，保留原题的能力项和难度
+- 结果按 (JD编号, 题目编号) 存入 SQLite，同时记录原题哈希和提示词版本，原题或提示词变化后需要重新生成
+
+面试时 TechnicalQuestionBank 在会话内一次读出该JD的全部改写结果，之后每题只是一次字典查找：
+有改写的题目优先抽取并以定制版本出题，题目编号不变（作答统计和IRT参数沿用原题）。
+
+用法：
+    python -m ai_interview.stages.stage3_technical.question_variants generate --jd-store jd_store.sqlite --workers 4
+    python -m ai_interview.stages.stage3_technical.question_variants generate --jd 3f2a9c0d1e4b5a6c --per-level 8
+    python -m ai_interview.stages.stage3_technical.question_variants show 3f2a9c0d1e4b5a6c
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ... import llm
+
+
+DEFAULT_VARIANTS_PATH = 'Data/question_variants.sqlite'
+
+# 改写提示词变化时递增，已有结果视为过期
+PROMPT_VERSION = 1
+
+# 每个JD每个难度预生成的题目数
+QUESTIONS_PER_LEVEL = 12
+
+# 改写结果的长度范围（字符）
+MIN_VARIANT_CHARS = 10
+MAX_VARIANT_CHARS = 200
+
+SYSTEM_PROMPT = """你是一名资深技术面试官，负责把题库中的通用面试题改写为贴合具体岗位的问题。
+
+## 改写要求
+1. **保留考察点**：原题考察的能力项和难度等级不变，不要把问题改得更简单或更难
+2. **结合岗位**：用JD中的职位、技术栈和职责，把原题中泛化的“某个场景”替换为该岗位真实会遇到的具体场景
+3. **单一问题**：只问一个问题，不超过120字，不给出提示或参考答案
+
+直接返回改写后的问题，不需要额外说明。
+"""
+
+_PREFIXES = ("改写后的问题：", "改写后：", "问题：", "Q:", "Question:")
+
+
+def question_hash(question_text: str) -> str:
+    """原题哈希（原题修改后已有的改写失效）"""
+    return hashlib.sha256(question_text.encode('utf-8')).hexdigest()[:16]
+
+
+def relevance(question: Dict, jd_data: Dict, jd_keywords: Iterable[str]) -> float:
+    """
+    题目与JD的相关度
+
+    所属岗位与JD职位一致 +2，通用题 +0.5；题目和能力项文本命中的JD技术关键词每个 +1。
+    """
+    position = jd_data.get('position') or ''
+    question_position = question.get('position') or ''
+    score = 0.0
+    if question_position and question_position != '通用' and (question_position in position or position in question_position):
+        score += 2.0
+    elif question_position == '通用':
+        score += 0.5
+    text = f"{question.get('question', '')} {question.get('capability', '')}".lower()
+    score += sum(1.0 for keyword in jd_keywords if keyword.lower() in text)
+    return score
+
+
+def select_relevant_questions(jd_data: Dict, question_pool: Dict[str, List[Dict]],
+                              per_level: int = QUESTIONS_PER_LEVEL) -> List[Dict]:
+    """按相关度为每个难度选出 per_level 道题（相关度为0的题目不选）"""
+    jd_keywords = set(jd_data.get('keywords') or [])
+    jd_keywords.update(jd_data.get('skills') or [])
+    selected = []
+    for level in sorted(question_pool):
+        scored = [(relevance(question, jd_data, jd_keywords), index, question)
+                  for index, question in enumerate(question_pool[level])]
+        scored = [item for item in scored if item[0] > 0]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        selected.extend(question for _, _, question in scored[:per_level])
+    return selected
+
+
+def build_variant_prompt(question: Dict, jd_data: Dict) -> str:
+    """改写的动态提示词（系统提示词之后的JD与原题）"""
+    requirements = '\n'.join(f"- {item}" for item in (jd_data.get('requirements') or [])[:6]) or "- 无"
+    responsibilities = '\n'.join(f"- {item}" for item in (jd_data.get('responsibilities') or [])[:6]) or "- 无"
+    return f"""## 岗位信息
+职位: {jd_data.get('position') or '未知'}
+技术关键词: {', '.join((jd_data.get('keywords') or [])[:12]) or '无'}
+岗位职责:
+{responsibilities}
+任职要求:
+{requirements}
+
+## 原题
+能力项: {question.get('capability', '')}
+难度等级: {question.get('level', '')}
+问题: {question['question']}
+
+请改写这道题。"""
+
+
+def clean_variant(text: str) -> Optional[str]:
+    """清理模型输出，不合格时返回 None"""
+    text = llm.clean_question(text).lstrip('*-# ').strip('"“”*')
+    for prefix in _PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):].strip()
+    text = text.splitlines()[0].strip() if text else ''
+    if not MIN_VARIANT_CHARS <= len(text) <= MAX_VARIANT_CHARS:
+        return None
+    if not text.endswith(('？', '?', '。')):
+        text += '？'
+    return text
+
+
+def rewrite_question(question: Dict, jd_data: Dict) -> Optional[str]:
+    """调用模型改写一道题"""
+    response = llm.chat(
+        llm.build_messages(SYSTEM_PROMPT, build_variant_prompt(question, jd_data)),
+        options={'temperature': 0.7},
+        call_site='stage3.variant'
+    )
+    return clean_variant(response['message']['content'])
+
+
+class QuestionVariantStore:
+    """JD定制问题存储（SQLite）"""
+
+    def __init__(self, db_path: str = DEFAULT_VARIANTS_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS variants ("
+            "jd_id TEXT, question_id TEXT, base_hash TEXT, prompt_version INTEGER, question TEXT, "
+            "model TEXT, created_at REAL, PRIMARY KEY (jd_id, question_id));"
+        )
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+    def get_for_jd(self, jd_id: str) -> Dict[str, Tuple[str, str]]:
+        """某JD当前提示词版本下的全部改写：{题目编号: (原题哈希, 定制问题)}"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT question_id, base_hash, question FROM variants WHERE jd_id = ? AND prompt_version = ?",
+                (jd_id, PROMPT_VERSION)
+            ).fetchall()
+        return {question_id: (base_hash, text) for question_id, base_hash, text in rows}
+
+    def put_many(self, rows: List[Tuple[str, str, str, str]]):
+        """保存改写结果：[(JD编号, 题目编号, 原题, 定制问题), ...]"""
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO variants "
+                "(jd_id, question_id, base_hash, prompt_version, question, model, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(jd_id, question_id, question_hash(base), PROMPT_VERSION, text, llm.MODEL_NAME, now)
+                 for jd_id, question_id, base, text in rows]
+            )
+            self.conn.commit()
+
+    def missing(self, jd_id: str, questions: List[Dict]) -> List[Dict]:
+        """尚无有效改写的题目（没有改写、原题已修改或提示词版本已变化）"""
+        existing = self.get_for_jd(jd_id)
+        return [
+            question for question in questions
+            if existing.get(question['id'], (None,))[0] != question_hash(question['question'])
+        ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM variants").fetchone()[0]
+
+    def pregenerate(self, jds: Iterable[Tuple[str, Dict]], question_pool: Dict[str, List[Dict]],
+                    per_level: int = QUESTIONS_PER_LEVEL, workers: int = 4,
+                    max_calls: Optional[int] = None) -> Dict:
+        """
+        为一批JD预生成定制问题
+
+        Args:
+            jds: (JD编号, JD解析结果) 序列
+            question_pool: 题库（TechnicalQuestionBank.question_pool）
+            per_level: 每个难度选题数
+            workers: 并发的模型调用数
+            max_calls: 本次最多调用模型的次数（低峰时段的时间窗口有限时使用）
+
+        Returns:
+            {'jds', 'selected', 'cached', 'generated', 'rejected', 'failed', 'elapsed_seconds'}
+        """
+        started = time.time()
+        stats = {'jds': 0, 'selected': 0, 'cached': 0, 'generated': 0, 'rejected': 0, 'failed': 0}
+        calls = 0
+        pending = set()
+        futures = {}
+        completed = []
+
+        def collect(done):
+            for future in done:
+                jd_id, question = futures.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    stats['failed'] += 1
+                    print(f"问题改写失败({jd_id}/{question['id']}): {e}")
+                    continue
+                if text is None:
+                    stats['rejected'] += 1
+                    continue
+                completed.append((jd_id, question['id'], question['question'], text))
+                stats['generated'] += 1
+            if len(completed) >= 64:
+                self.put_many(completed)
+                completed.clear()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='question-variant') as pool:
+            for jd_id, jd_data in jds:
+                stats['jds'] += 1
+                selected = select_relevant_questions(jd_data, question_pool, per_level)
+                todo = self.missing(jd_id, selected)
+                stats['selected'] += len(selected)
+                stats['cached'] += len(selected) - len(todo)
+                for question in todo:
+                    if max_calls is not None and calls >= max_calls:
+                        break
+                    # 有界提交：在途请求不超过 workers 的两倍
+                    while len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    future = pool.submit(rewrite_question, question, jd_data)
+                    futures[future] = (jd_id, question)
+                    pending.add(future)
+                    calls += 1
+                if max_calls is not None and calls >= max_calls:
+                    break
+            done, pending = wait(pending)
+            collect(done)
+        if completed:
+            self.put_many(completed)
+        stats['elapsed_seconds'] = round(time.time() - started, 2)
+        return stats
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_variant_store(path: str = DEFAULT_VARIANTS_PATH) -> Optional[QuestionVariantStore]:
+    """进程内共享的定制问题存储；尚未预生成过（文件不存在）时返回 None"""
+    global _store
+    if _store is None:
+        if not os.path.exists(path):
+            return None
+        with _store_lock:
+            if _store is None:
+                _store = QuestionVariantStore(path)
+    return _store
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="题库问题的JD定制改写")
+    parser.add_argument('--variants', default=DEFAULT_VARIANTS_PATH, help="定制问题存储")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = commands.add_parser('generate', help="为JD存储中的JD预生成定制问题")
+    generate_parser.add_argument('--jd-store', default='jd_store.sqlite', help="JD存储")
+    generate_parser.add_argument('--jd', action='append', help="JD编号（可重复，缺省为全部JD）")
+    generate_parser.add_argument('--position', help="只处理职位包含该文字的JD")
+    generate_parser.add_argument('--limit', type=int, default=1000, help="最多处理的JD数")
+    generate_parser.add_argument('--per-level', type=int, default=QUESTIONS_PER_LEVEL)
+    generate_parser.add_argument('--workers', type=int, default=4, help="并发的模型调用数")
+    generate_parser.add_argument('--max-calls', type=int, help="本次最多调用模型的次数")
+
+    show_parser = commands.add_parser('show', help="显示某JD的定制问题")
+    show_parser.add_argument('jd_id')
+    args = parser.parse_args(argv)
+
+    store = QuestionVariantStore(args.variants)
+    if args.command == 'show':
+        variants = sorted(store.get_for_jd(args.jd_id).items())
+        width = max((len(question_id) for question_id, _ in variants), default=0)
+        for question_id, (_, text) in variants:
+            print(f"{question_id:<{width}} {text}")
+        return 0
+
+    from ...jd_store import JDStore
+    from .question_bank import TechnicalQuestionBank
+    jd_store = JDStore(args.jd_store)
+    jd_ids = args.jd or [item['jd_id'] for item in jd_store.search(position=args.position, limit=args.limit)]
+    jds = ((jd_id, jd_store.get(jd_id)) for jd_id in jd_ids)
+    stats = store.pregenerate(
+        ((jd_id, jd_data) for jd_id, jd_data in jds if jd_data is not None),
+        TechnicalQuestionBank().question_pool,
+        per_level=args.per_level, workers=args.workers, max_calls=args.max_calls
+    )
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,8 +7,12 @@
 """
 
 from typing import Dict, List, Optional
+from ... import tracing
+from ...matching import match_resume_to_jd
 from .adaptive_difficulty import AdaptiveDifficultyManager
+from .irt_difficulty import DEFAULT_ITEM_PARAMETERS_PATH, IRTDifficultyEngine, get_item_index
 from .question_bank import TechnicalQuestionBank
+from .question_stats import ability_proxy
 from .technical_evaluator import TechnicalEvaluator
 
 
@@ -17,12 +21,25 @@ class TechnicalQuestionEngine:
     第三阶段技术类问题引擎
     
     实现B1 < B2 < B3动态难度调整系统
+    
+    irt=True 时改用IRT难度引擎：按能力估计选信息量最大的题目，
+    能力估计达到目标精度后提前结束（题数以 max_questions 为上限）。
     """
     
-    def __init__(self):
+    # 第二阶段平均分达到 STAGE2_STRONG_SCORE 时加题、提高初始难度，低于 STAGE2_WEAK_SCORE 时减题、降低初始难度
+    STAGE2_STRONG_SCORE = 0.75
+    STAGE2_WEAK_SCORE = 0.5
+    QUESTION_LIMITS = (2, 5)
+    
+    def __init__(self, irt: bool = False, item_parameters_path: str = DEFAULT_ITEM_PARAMETERS_PATH,
+                 question_stats=None):
         self.difficulty_manager = AdaptiveDifficultyManager()
-        self.question_bank = TechnicalQuestionBank()
+        self.question_bank = TechnicalQuestionBank(stats=question_stats)
         self.evaluator = TechnicalEvaluator()
+        self.irt_engine = (
+            IRTDifficultyEngine(get_item_index(self.question_bank.question_pool, item_parameters_path))
+            if irt else None
+        )
         
         # 状态跟踪
         self.current_question_index = 0
@@ -34,6 +51,8 @@ class TechnicalQuestionEngine:
         self.question_responses = []
         self.question_scores = []
         self.difficulty_progression = []
+        self.resume_match = None
+        self._stage2_scores = []
         
     def start_stage(self, jd_data: Dict, resume_data: Dict = None, 
                    stage2_summary: Dict = None) -> Dict:
@@ -59,8 +78,17 @@ class TechnicalQuestionEngine:
         self.question_scores.clear()
         self.difficulty_progression.clear()
         
+        stage2_average = (stage2_summary or {}).get('average_score')
+        self._stage2_scores = [stage2_average] if isinstance(stage2_average, (int, float)) else []
+        
+        # 简历与JD的技术关键词匹配分决定基础难度（不调用模型）
+        self.resume_match = match_resume_to_jd(resume_data, jd_data) if resume_data and jd_data else None
+        
         # 根据第二阶段表现调整题数和初始难度
         self._adjust_based_on_stage2(stage2_summary)
+        if self.irt_engine:
+            # 初始难度作为能力估计的先验
+            self.irt_engine.start(self.difficulty_manager.get_current_difficulty())
         
         # 生成第一个技术问题
         return self.generate_next_question()
@@ -72,7 +100,7 @@ class TechnicalQuestionEngine:
         Returns:
             技术问题数据
         """
-        if self.current_question_index >= self.max_questions:
+        if not self.should_continue():
             return {
                 'question': None,
                 'stage_completed': True,
@@ -84,13 +112,17 @@ class TechnicalQuestionEngine:
         current_difficulty = self.difficulty_manager.get_current_difficulty()
         
         # 从题库选择问题或AI生成
-        question_data = self.question_bank.get_question(
-            difficulty=current_difficulty,
-            jd_data=self.jd_data,
-            asked_questions=self.asked_questions,
-            question_number=self.current_question_index + 1,
-            total_questions=self.max_questions
-        )
+        with tracing.span('question.select', stage=3, difficulty=current_difficulty):
+            question_data = self._select_irt_question() if self.irt_engine else None
+            if question_data is None:
+                question_data = self.question_bank.get_question(
+                    difficulty=current_difficulty,
+                    jd_data=self.jd_data,
+                    asked_questions=self.asked_questions,
+                    question_number=self.current_question_index + 1,
+                    total_questions=self.max_questions
+                )
+            current_difficulty = question_data.get('difficulty', current_difficulty)
         
         # 记录难度信息
         self.difficulty_progression.append({
@@ -104,6 +136,18 @@ class TechnicalQuestionEngine:
         
         return question_data
     
+    def _select_irt_question(self) -> Optional[Dict]:
+        """按当前能力估计选信息量最大的题库题目"""
+        question_id = self.irt_engine.select_question(exclude=self.question_bank.used_questions)
+        if question_id is None:
+            return None
+        return self.question_bank.get_question_by_id(
+            question_id,
+            question_number=self.current_question_index + 1,
+            total_questions=self.max_questions,
+            jd_data=self.jd_data
+        )
+    
     def process_answer(self, user_response: str, question_data: Dict) -> Dict:
         """
         处理用户回答并动态调整难度
@@ -134,14 +178,30 @@ class TechnicalQuestionEngine:
             }
         )
         
+        # 更新题目作答统计（能力代理为第二阶段平均分和本阶段此前各题得分的平均）
+        if question_data.get('question_id'):
+            previous_scores = self.question_scores + self._stage2_scores
+            self.question_bank.stats.update(
+                question_data['question_id'], evaluation['score'], ability_proxy(previous_scores)
+            )
+        
         # 记录评分
         self.question_scores.append(evaluation['score'])
         
         # 动态调整难度
+        target_difficulty, target_reason = None, ""
+        if self.irt_engine:
+            ability_update = self.irt_engine.update(
+                question_data.get('question_id'), evaluation['score'], question_data.get('difficulty')
+            )
+            target_difficulty = ability_update['level']
+            target_reason = f"能力估计{ability_update['ability']:+.2f}±{ability_update['standard_error']:.2f}"
         difficulty_adjustment = self.difficulty_manager.adjust_difficulty(
             score=evaluation['score'],
             question_context=question_data,
-            response_analysis=evaluation
+            response_analysis=evaluation,
+            target_difficulty=target_difficulty,
+            target_reason=target_reason
         )
         
         # 更新评估结果，包含难度调整信息
@@ -149,11 +209,16 @@ class TechnicalQuestionEngine:
             'difficulty_adjustment': difficulty_adjustment,
             'next_difficulty': self.difficulty_manager.get_current_difficulty()
         })
+        if self.irt_engine:
+            evaluation['ability_estimate'] = self.irt_engine.summary()
         
         return evaluation
     
     def should_continue(self) -> bool:
         """检查是否应该继续提问"""
+        if self.irt_engine and self.irt_engine.is_converged():
+            # 能力估计已达到目标精度，提前结束
+            return False
         return self.current_question_index < self.max_questions
     
     def get_stage_summary(self) -> Dict:
@@ -184,7 +249,9 @@ class TechnicalQuestionEngine:
             'difficulty_progression': self.difficulty_progression,
             'difficulty_distribution': difficulty_stats,
             'final_difficulty': self.difficulty_manager.get_current_difficulty(),
-            'stage_completed': self.current_question_index >= self.max_questions,
+            'resume_match': self.resume_match,
+            'ability_estimate': self.irt_engine.summary() if self.irt_engine else None,
+            'stage_completed': not self.should_continue(),
             'technical_assessment': self._generate_technical_assessment()
         }
     
@@ -200,25 +267,28 @@ class TechnicalQuestionEngine:
         }
     
     def _adjust_based_on_stage2(self, stage2_summary: Dict):
-        """根据第二阶段表现调整第三阶段配置"""
+        """根据简历匹配度和第二阶段表现调整第三阶段配置"""
+        match_difficulty = self.resume_match['starting_difficulty'] if self.resume_match else 'B2'
         if not stage2_summary:
+            self.difficulty_manager.set_initial_difficulty(match_difficulty)
             return
         
         stage2_avg_score = stage2_summary.get('average_score', 0.6)
         
         # 根据第二阶段表现调整题数
-        if stage2_avg_score >= 0.75:
+        min_questions, max_questions = self.QUESTION_LIMITS
+        if stage2_avg_score >= self.STAGE2_STRONG_SCORE:
             # 表现优秀，增加技术问题数量
-            self.max_questions = min(5, self.max_questions + 1)
-            # 提高初始难度
-            self.difficulty_manager.set_initial_difficulty('B2')
-        elif stage2_avg_score < 0.5:
+            self.max_questions = min(max_questions, self.max_questions + 1)
+            # 提高初始难度，简历高度匹配时直接从B3开始
+            self.difficulty_manager.set_initial_difficulty('B3' if match_difficulty == 'B3' else 'B2')
+        elif stage2_avg_score < self.STAGE2_WEAK_SCORE:
             # 表现不佳，减少技术问题，降低初始难度
-            self.max_questions = max(2, self.max_questions - 1)
+            self.max_questions = max(min_questions, self.max_questions - 1)
             self.difficulty_manager.set_initial_difficulty('B1')
         else:
-            # 表现一般，保持默认配置
-            self.difficulty_manager.set_initial_difficulty('B2')
+            # 表现一般，按简历匹配度确定初始难度
+            self.difficulty_manager.set_initial_difficulty(match_difficulty)
     
     def _generate_technical_assessment(self) -> Dict:
         """生成技术能力评估"""
@@ -308,5 +378,9 @@ class TechnicalQuestionEngine:
         self.question_scores.clear()
         self.difficulty_progression.clear()
         self.difficulty_manager.reset()
+        if self.irt_engine:
+            self.irt_engine.start()
+        self.resume_match = None
+        self._stage2_scores = []
         self.jd_data = None
         self.resume_data = None
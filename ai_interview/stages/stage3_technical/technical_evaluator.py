@@ -5,21 +5,42 @@
 负责评估技术类问题的回答质量，支持多维度评估和智能反馈。
 """
 
-import ollama
-import re
 from typing import Dict, List, Optional
+from ... import llm, metrics, tracing
+from ...keywords import get_lexicon
+from ..structured_evaluation import (
+    EvaluationParseError, build_evaluation_schema, parse_structured_evaluation, weighted_score
+)
+from ..rule_features import TECH_WORD_CATEGORIES, length_score
 
 
 class TechnicalEvaluator:
     """技术问题评估器"""
     
     def __init__(self):
+        self.model_name = llm.MODEL_NAME
         self.evaluation_criteria = {
             'technical_accuracy': 0.4,    # 技术准确性
             'depth_understanding': 0.3,   # 深度理解
             'practical_experience': 0.2,  # 实践经验
             'clarity': 0.1                # 表达清晰度
         }
+        
+        # 评估维度的中文名称和评分说明（提示词与解析修复共用）
+        self.dimension_descriptions = {
+            'technical_accuracy': ('技术准确性', '回答的技术正确性'),
+            'depth_understanding': ('深度理解', '对技术原理的理解深度'),
+            'practical_experience': ('实践经验', '是否体现实际项目经验'),
+            'clarity': ('表达清晰度', '回答的逻辑性和清晰度')
+        }
+        self.text_fields = ['feedback']
+        self.field_aliases = {
+            label: key for key, (label, _) in self.dimension_descriptions.items()
+        }
+        self.field_aliases['反馈'] = 'feedback'
+        
+        # 系统提示词与单题无关，保持字节稳定以复用服务端的前缀缓存
+        self.system_prompt = self._build_system_prompt()
     
     def evaluate_response(self, user_response: str, question_data: Dict, 
                          context: Dict) -> Dict:
@@ -38,81 +59,102 @@ class TechnicalEvaluator:
             # AI评估
             ai_evaluation = self._ai_evaluate(user_response, question_data, context)
             
-            # 基础评估
-            basic_evaluation = self._basic_evaluate(user_response, question_data)
-            
-            # 综合评分
-            final_score = self._calculate_final_score(ai_evaluation, basic_evaluation)
-            
-            return {
-                'score': final_score,
-                'ai_evaluation': ai_evaluation,
-                'basic_metrics': basic_evaluation,
-                'feedback': self._generate_feedback(ai_evaluation, basic_evaluation),
-                'suggestions': self._generate_suggestions(ai_evaluation, basic_evaluation)
-            }
+            return self._assemble_evaluation(user_response, question_data, context, ai_evaluation)
             
         except Exception as e:
             print(f"评估出错: {e}")
             return self._fallback_evaluate(user_response, question_data)
     
+    def _assemble_evaluation(self, user_response: str, question_data: Dict,
+                             context: Dict, ai_evaluation: Optional[Dict],
+                             rule_metrics: Optional[Dict] = None) -> Dict:
+        """
+        基于AI子评分和规则指标组装评估结果
+        
+        AI子评分可以来自实时调用，也可以来自离线重评分时的缓存。
+        rule_metrics 为批量预先计算的基础评估，缺省时逐条计算。
+        """
+        with tracing.span('evaluate.rules', stage=3, difficulty=question_data.get('difficulty')):
+            # 基础评估
+            basic_evaluation = rule_metrics or self._basic_evaluate(user_response, question_data)
+            
+            # 综合评分
+            final_score = self._calculate_final_score(ai_evaluation, basic_evaluation)
+        
+        return {
+            'score': final_score,
+            'ai_evaluation': ai_evaluation,
+            'basic_metrics': basic_evaluation,
+            'feedback': self._generate_feedback(ai_evaluation, basic_evaluation),
+            'suggestions': self._generate_suggestions(ai_evaluation, basic_evaluation)
+        }
+    
     def _ai_evaluate(self, user_response: str, question_data: Dict, 
                     context: Dict) -> Dict:
         """AI智能评估"""
         try:
-            prompt = f"""
-你是一位资深的技术面试官，请评估候选人对技术问题的回答质量。
-
-问题: {question_data.get('question', '')}
-难度: {question_data.get('difficulty', 'B2')}
-候选人回答: {user_response}
+            prompt = self._build_evaluation_prompt(user_response, question_data, context)
+            return self._request_ai_evaluation(prompt, question_data)
+            
+        except Exception:
+            # AI子评分缺失时只按规则指标评分
+            metrics.record_fallback('stage3_rule_only_evaluate')
+            return {}
+    
+    def _build_system_prompt(self) -> str:
+        """构建评估系统提示词：角色、评估维度和输出格式"""
+        dimension_lines = "\n".join(
+            f"- {dimension}（{label}）: {description}"
+            for dimension, (label, description) in self.dimension_descriptions.items()
+        )
+        score_example = ", ".join(f'"{dimension}": 0.0' for dimension in self.evaluation_criteria)
+        
+        return f"""你是一位资深的技术面试官，请评估候选人对技术问题的回答质量。
 
 请从以下维度评估（0-1分）：
-1. 技术准确性 (0-1): 回答的技术正确性
-2. 深度理解 (0-1): 对技术原理的理解深度
-3. 实践经验 (0-1): 是否体现实际项目经验
-4. 表达清晰度 (0-1): 回答的逻辑性和清晰度
+{dimension_lines}
 
 输出格式：
-评分:
-- 技术准确性: 0.X
-- 深度理解: 0.X
-- 实践经验: 0.X
-- 表达清晰度: 0.X
-
-反馈: [简短反馈，50字以内]
+只输出一个JSON对象，不要输出思考过程或其他文字，分数取0到1之间的小数：
+{{"scores": {{{score_example}}}, "feedback": "简短反馈，50字以内"}}
 """
-            
-            response = ollama.chat(
-                model="Jerrypoi/deepseek-r1-with-tool-calls:latest",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            return self._parse_ai_evaluation(response['message']['content'])
-            
-        except Exception:
-            return {}
+    
+    def _build_evaluation_prompt(self, user_response: str, question_data: Dict,
+                                 context: Dict) -> str:
+        """构建单题评估内容（系统提示词之后的动态部分）"""
+        return f"""问题: {question_data.get('question', '')}
+难度: {question_data.get('difficulty', 'B2')}
+候选人回答: {user_response}
+"""
+    
+    def _evaluation_messages(self, prompt: str) -> List[Dict]:
+        """固定的系统提示词在前，单题内容在后"""
+        return llm.build_messages(self.system_prompt, prompt)
+    
+    def _evaluation_format(self, question_data: Dict) -> Dict:
+        """单题评估的输出 Schema"""
+        return build_evaluation_schema(list(self.evaluation_criteria), self.text_fields)
+    
+    def _request_ai_evaluation(self, prompt: str, question_data: Dict) -> Dict:
+        """调用模型完成评估并解析结果（JSON Schema约束输出）"""
+        response = llm.chat(
+            self._evaluation_messages(prompt),
+            format=self._evaluation_format(question_data),
+            options={"temperature": 0},
+            model=self.model_name,
+            call_site='stage3.evaluate'
+        )
+        
+        return self._parse_ai_evaluation(response['message']['content'])
     
     def _parse_ai_evaluation(self, evaluation_text: str) -> Dict:
         """解析AI评估结果"""
-        result = {'scores': {}, 'feedback': ''}
-        
         try:
-            # 提取评分
-            score_pattern = r'- (.*?): (0\.\d+)'
-            scores = re.findall(score_pattern, evaluation_text)
-            for dimension, score in scores:
-                result['scores'][dimension.strip()] = float(score)
-            
-            # 提取反馈
-            feedback_match = re.search(r'反馈[:：]\s*([^\n]+)', evaluation_text)
-            if feedback_match:
-                result['feedback'] = feedback_match.group(1).strip()
-                
-        except Exception:
-            pass
-        
-        return result
+            return parse_structured_evaluation(
+                evaluation_text, list(self.evaluation_criteria), self.text_fields, self.field_aliases
+            )
+        except EvaluationParseError:
+            return {'scores': {}, 'feedback': ''}
     
     def _basic_evaluate(self, user_response: str, question_data: Dict) -> Dict:
         """基础评估"""
@@ -120,22 +162,14 @@ class TechnicalEvaluator:
         word_count = len(user_response.split())
         
         # 长度评分
-        if response_length < 50:
-            length_score = 0.3
-        elif response_length < 200:
-            length_score = 0.7
-        elif response_length < 500:
-            length_score = 1.0
-        else:
-            length_score = 0.9
+        length = length_score(response_length, 'stage3')
         
         # 技术词汇评分
-        tech_words = ['系统', '架构', '算法', '数据库', '网络', '安全', '优化', '设计']
-        tech_count = sum(1 for word in tech_words if word in user_response)
+        tech_count = len(get_lexicon().find(user_response, categories=TECH_WORD_CATEGORIES))
         tech_score = min(tech_count / 3, 1.0)
         
         return {
-            'length_score': length_score,
+            'length_score': length,
             'tech_score': tech_score,
             'response_length': response_length,
             'word_count': word_count
@@ -144,8 +178,7 @@ class TechnicalEvaluator:
     def _calculate_final_score(self, ai_evaluation: Dict, basic_evaluation: Dict) -> float:
         """计算最终评分"""
         if ai_evaluation and ai_evaluation.get('scores'):
-            scores = list(ai_evaluation['scores'].values())
-            ai_score = sum(scores) / len(scores) if scores else 0.5
+            ai_score = weighted_score(ai_evaluation['scores'], self.evaluation_criteria)
             
             basic_score = (
                 basic_evaluation['length_score'] * 0.4 +
@@ -187,6 +220,7 @@ class TechnicalEvaluator:
     
     def _fallback_evaluate(self, user_response: str, question_data: Dict) -> Dict:
         """备用评估"""
+        metrics.record_fallback('stage3_fallback_evaluate')
         response_length = len(user_response.strip())
         
         if response_length < 30:
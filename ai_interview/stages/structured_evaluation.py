@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+结构化评估输出
+
+三个阶段的评估器共用的JSON输出约定：
+- 根据评估维度生成 Ollama format 参数使用的 JSON Schema，让模型直接输出结构化结果
+- 单次 json.loads 严格解析并校验维度评分，无需正则抓取
+- 解析失败时走低成本修复路径（去除思考过程/代码块、截取JSON对象、去掉尾逗号、
+  兼容旧版“- 维度: 0.X”文本格式），不需要重新请求模型
+- 按 evaluation_criteria 中的权重计算AI综合分
+- 支持阶段结束时一次性评估多条回答的批量格式 {"items": [...]}
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+_THINK_PATTERN = re.compile(r'<think>.*?</think>', re.DOTALL)
+_FENCE_PATTERN = re.compile(r'```(?:json)?', re.IGNORECASE)
+_TRAILING_COMMA_PATTERN = re.compile(r',\s*([}\]])')
+_LEGACY_SCORE_PATTERN = re.compile(r'^\s*[-*]?\s*(.+?)\s*[:：]\s*(\d+(?:\.\d+)?)\s*$', re.MULTILINE)
+
+# 略高于1的分数（模型输出的轻微越界）按0-1分制截断为1，超过该值才可能是10分制或百分制
+SCORE_CLAMP_LIMIT = 1.1
+
+
+class EvaluationParseError(ValueError):
+    """模型输出无法解析为有效的评估结果"""
+
+
+def build_evaluation_schema(dimensions: List[str], text_fields: List[str]) -> Dict:
+    """
+    构建评估结果的 JSON Schema
+
+    Args:
+        dimensions: 评分维度键（与 evaluation_criteria 的键一致）
+        text_fields: 文本字段（如 overall_comment、improvement_suggestions）
+
+    Returns:
+        可直接传给 ollama.chat(format=...) 的 Schema
+    """
+    score_properties = {
+        dimension: {'type': 'number', 'minimum': 0, 'maximum': 1}
+        for dimension in dimensions
+    }
+    properties = {
+        'scores': {
+            'type': 'object',
+            'properties': score_properties,
+            'required': list(dimensions)
+        }
+    }
+    for field in text_fields:
+        properties[field] = {'type': 'string'}
+
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': ['scores'] + list(text_fields)
+    }
+
+
+def parse_structured_evaluation(text: str, dimensions: List[str], text_fields: List[str],
+                                aliases: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    解析模型返回的结构化评估结果
+
+    Args:
+        text: 模型原始输出
+        dimensions: 期望的评分维度键
+        text_fields: 期望的文本字段
+        aliases: 中文名称到维度键/文本字段的映射，用于修复路径
+
+    Returns:
+        {'scores': {维度: 分数}, 文本字段: 内容, ...}
+
+    Raises:
+        EvaluationParseError: 无法得到任何有效维度评分
+    """
+    aliases = aliases or {}
+
+    # 快速路径：模型按 Schema 输出，单次解析即可
+    try:
+        payload = json.loads(text)
+    except (TypeError, ValueError):
+        payload = _repair_json(text)
+
+    if isinstance(payload, dict):
+        result = _validate_payload(payload, dimensions, text_fields, aliases)
+        if result['scores']:
+            return result
+
+    # 兼容旧版“- 维度: 0.X”文本格式
+    result = _parse_legacy_text(text or '', dimensions, text_fields, aliases)
+    if result['scores']:
+        return result
+
+    raise EvaluationParseError("模型输出中没有可用的维度评分")
+
+
+def build_batch_evaluation_schema(dimensions: List[str], text_fields: List[str]) -> Dict:
+    """
+    构建批量评估结果的 JSON Schema
+
+    各条回答的维度可能不同，因此 scores 只声明所有维度的并集，
+    每条结果的维度完整性在解析时按该条自己的维度校验。
+    """
+    item_schema = build_evaluation_schema(dimensions, text_fields)
+    item_schema['properties']['index'] = {'type': 'integer'}
+    item_schema['properties']['scores'].pop('required', None)
+    item_schema['required'] = ['index'] + item_schema['required']
+
+    return {
+        'type': 'object',
+        'properties': {
+            'items': {'type': 'array', 'items': item_schema}
+        },
+        'required': ['items']
+    }
+
+
+def parse_batch_evaluation(text: str, item_dimensions: List[List[str]], text_fields: List[str],
+                           aliases: Optional[Dict[str, str]] = None) -> List[Optional[Dict]]:
+    """
+    解析批量评估结果
+
+    Args:
+        text: 模型原始输出
+        item_dimensions: 按回答顺序排列的各条维度键
+        text_fields: 期望的文本字段
+        aliases: 中文名称到维度键/文本字段的映射
+
+    Returns:
+        与输入顺序一致的结果列表；缺失或无有效评分的条目为 None
+    """
+    aliases = aliases or {}
+    results = [None] * len(item_dimensions)
+
+    try:
+        payload = json.loads(text)
+    except (TypeError, ValueError):
+        payload = _repair_json(text)
+
+    items = payload.get('items') if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        return results
+
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        # index 从1开始编号；缺失或越界时按出现顺序对齐
+        index = item.get('index')
+        slot = index - 1 if isinstance(index, int) and 1 <= index <= len(results) else position
+        if slot >= len(results) or results[slot] is not None:
+            continue
+        parsed = _validate_payload(item, item_dimensions[slot], text_fields, aliases)
+        if parsed['scores']:
+            results[slot] = parsed
+
+    return results
+
+
+def weighted_score(scores: Dict[str, float], weights: Dict[str, float]) -> Optional[float]:
+    """
+    按评估维度权重计算AI综合分
+
+    只对同时出现在评分和权重中的维度加权；没有可对齐的维度时退化为简单平均。
+    """
+    if not scores:
+        return None
+
+    matched = [(scores[key], weight) for key, weight in weights.items() if key in scores]
+    total_weight = sum(weight for _, weight in matched)
+    if matched and total_weight > 0:
+        return sum(score * weight for score, weight in matched) / total_weight
+
+    values = list(scores.values())
+    return sum(values) / len(values)
+
+
+def _score_value(value) -> Optional[Tuple[float, bool]]:
+    """解析单个分数，返回 (数值, 是否带百分号)；无法解析或为负时返回 None"""
+    if isinstance(value, bool):
+        return None
+    percent = False
+    if isinstance(value, str):
+        text = value.strip()
+        percent = text.endswith('%')
+        try:
+            value = float(text.rstrip('%'))
+        except ValueError:
+            return None
+    if not isinstance(value, (int, float)):
+        return None
+    value = float(value)
+    if value != value or value < 0:
+        return None
+    return value, percent
+
+
+def _normalize_scores(raw_scores: Dict[str, object]) -> Dict[str, float]:
+    """
+    将一次评估的各维度分数规范到0-1区间
+
+    Schema 约定为0-1分制：不超过 SCORE_CLAMP_LIMIT 的分数按0-1读取（略高于1的截断为1）。
+    更大的分数只有在能确定分制时才换算——带百分号、为整数，或该次评估所有维度都在同一更大分制上；
+    其余分数（如1.5）无法判断分制，丢弃该维度，不参与加权，全部丢弃时走规则评分的降级路径。
+    """
+    parsed = {key: _score_value(value) for key, value in raw_scores.items()}
+    parsed = {key: item for key, item in parsed.items() if item is not None}
+    if not parsed:
+        return {}
+
+    values = [value for value, _ in parsed.values()]
+    largest = max(values)
+    scale = 10.0 if largest <= 10 else 100.0
+    # 多个维度都明显超出0-1（如 7.5、8、6.5），或全为整数且有超出0-1的（如 1、8、9），视为整体使用10分制或百分制
+    whole_scale = largest > SCORE_CLAMP_LIMIT and (
+        (len(values) > 1 and all(value > SCORE_CLAMP_LIMIT for value in values))
+        or all(value.is_integer() for value in values)
+    )
+
+    scores = {}
+    for key, (value, percent) in parsed.items():
+        if percent:
+            value /= 100
+        elif value <= SCORE_CLAMP_LIMIT and not whole_scale:
+            value = min(value, 1.0)
+        elif whole_scale or value.is_integer():
+            value /= scale
+        else:
+            continue
+        if value <= 1:
+            scores[key] = round(value, 4)
+    return scores
+
+
+def _resolve_dimension(name: str, dimensions: List[str], aliases: Dict[str, str]) -> Optional[str]:
+    """将模型给出的维度名映射为维度键"""
+    name = name.strip()
+    if name in dimensions:
+        return name
+    if aliases.get(name) in dimensions:
+        return aliases[name]
+    # 兼容“communication（表达清晰度）”“表达清晰度 (0-1)”等写法
+    for alias, key in aliases.items():
+        if alias in name and key in dimensions:
+            return key
+    for key in dimensions:
+        if key in name:
+            return key
+    return None
+
+
+def _validate_payload(payload: Dict, dimensions: List[str], text_fields: List[str],
+                      aliases: Dict[str, str]) -> Dict:
+    """校验解析后的对象，只保留合法的维度评分和文本字段"""
+    result = {'scores': {}}
+    raw_scores = payload.get('scores')
+    if not isinstance(raw_scores, dict):
+        # 修复路径：模型把维度直接平铺在顶层
+        raw_scores = {k: v for k, v in payload.items() if k not in text_fields}
+
+    resolved = {}
+    for name, value in raw_scores.items():
+        key = _resolve_dimension(str(name), dimensions, aliases)
+        if key is not None:
+            resolved[key] = value
+    result['scores'] = _normalize_scores(resolved)
+
+    for field in text_fields:
+        value = payload.get(field, '')
+        result[field] = value.strip() if isinstance(value, str) else ''
+
+    return result
+
+
+def _repair_json(text: str) -> Optional[Dict]:
+    """低成本修复：去除思考过程和代码块，截取最外层JSON对象，去掉尾逗号"""
+    if not text:
+        return None
+
+    cleaned = _THINK_PATTERN.sub('', text)
+    cleaned = _FENCE_PATTERN.sub('', cleaned)
+    start = cleaned.find('{')
+    end = cleaned.rfind('}')
+    if start == -1 or end <= start:
+        return None
+
+    candidate = _TRAILING_COMMA_PATTERN.sub(r'\1', cleaned[start:end + 1])
+    try:
+        payload = json.loads(candidate)
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _parse_legacy_text(text: str, dimensions: List[str], text_fields: List[str],
+                       aliases: Dict[str, str]) -> Dict:
+    """解析旧版“- 维度: 0.X”文本格式（分数支持 0、1、1.0 等写法）"""
+    text = _THINK_PATTERN.sub('', text)
+    result = {'scores': {}}
+
+    resolved = {}
+    for name, value in _LEGACY_SCORE_PATTERN.findall(text):
+        key = _resolve_dimension(name, dimensions, aliases)
+        if key is not None and key not in resolved:
+            resolved[key] = value
+    result['scores'] = _normalize_scores(resolved)
+
+    for field in text_fields:
+        result[field] = ''
+    for alias, field in aliases.items():
+        if field in text_fields and not result[field]:
+            match = re.search(rf'{re.escape(alias)}[:：]\s*([^\n]+)', text)
+            if match:
+                result[field] = match.group(1).strip()
+
+    return result
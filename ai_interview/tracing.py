@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+轻量级延迟追踪
+
+把一轮面试（语音转写 → 模型生成 → 评估 → 语音播报）拆成带嵌套关系的 span：
+- 未启用时 span() 返回空操作对象，几乎没有开销
+- 同一线程内的 span 自动形成父子关系；new_turn() 为之后的 span 标记轮次编号，便于跨线程归并
+- 结束的 span 立即追加写入文件：.jsonl 为每行一个 span，.json 为 Chrome trace
+  （chrome://tracing 或 Perfetto 可直接打开，数组结尾的 ] 可以省略，进程异常退出也能读取）
+
+启用方式：
+    from ai_interview import tracing
+    tracing.configure('trace.jsonl')        # 或 'trace.json' 导出 Chrome trace
+也可以设置环境变量 AI_INTERVIEW_TRACE=trace.jsonl 后启动程序。
+
+汇总：
+    python -m ai_interview.tracing trace.jsonl
+"""
+
+import atexit
+import functools
+import itertools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class Span:
+    """一个计时区间"""
+
+    __slots__ = ('name', 'attributes', 'span_id', 'parent_id', 'turn',
+                 'start', 'end', 'wall_start', 'thread_id', 'thread_name')
+
+    def __init__(self, name: str, attributes: Dict, span_id: int, parent_id: Optional[int], turn: int):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.turn = turn
+        self.start = time.perf_counter()
+        self.end = None
+        self.wall_start = time.time()
+        current = threading.current_thread()
+        self.thread_id = current.ident
+        self.thread_name = current.name
+
+    def set(self, **attributes):
+        """补充属性（如模型返回的token数）"""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+
+class _NoopSpan:
+    """追踪未启用时使用的空操作 span"""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """span 收集与导出"""
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.format = 'jsonl'
+        self._file = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._turn = 0
+        self._origin = time.perf_counter()
+
+    def configure(self, path: str, format: Optional[str] = None):
+        """
+        启用追踪并指定输出文件
+
+        Args:
+            path: 输出路径
+            format: 'jsonl' 或 'chrome'，缺省按扩展名判断（.json 为 Chrome trace）
+        """
+        self.close()
+        self.format = format or ('chrome' if path.endswith('.json') else 'jsonl')
+        with self._lock:
+            self.path = path
+            if self.format == 'chrome':
+                self._file = open(path, 'w', encoding='utf-8')
+                self._file.write('[\n')
+            else:
+                self._file = open(path, 'a', encoding='utf-8')
+            self.enabled = True
+
+    def close(self):
+        """停止追踪并关闭文件"""
+        with self._lock:
+            self.enabled = False
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def new_turn(self) -> int:
+        """开始新的一轮，之后创建的 span 都标记该轮次编号"""
+        with self._lock:
+            self._turn += 1
+            return self._turn
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        记录一个计时区间
+
+        用法：
+            with tracer.span('llm.chat', call_site='stage3.evaluate') as span:
+                ...
+                span.set(eval_count=120)
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        stack = self._stack()
+        span = Span(name, attributes, next(self._ids),
+                    stack[-1].span_id if stack else None, self._turn)
+        stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+            self._export(span)
+
+    def traced(self, name: str):
+        """把函数调用记录为 span 的装饰器"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _export(self, span: Span):
+        if self.format == 'chrome':
+            record = {
+                'name': span.name,
+                'cat': span.name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': round((span.start - self._origin) * 1e6, 1),
+                'dur': round((span.end - span.start) * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': span.thread_id,
+                'args': dict(span.attributes, turn=span.turn, thread=span.thread_name)
+            }
+            line = json.dumps(record, ensure_ascii=False, default=str) + ',\n'
+        else:
+            record = {
+                'name': span.name,
+                'span_id': span.span_id,
+                'parent_id': span.parent_id,
+                'turn': span.turn,
+                'start': round(span.wall_start, 6),
+                'duration_ms': round(span.duration_ms, 3),
+                'thread': span.thread_name,
+                'attributes': span.attributes
+            }
+            line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+
+
+_tracer = Tracer()
+
+configure = _tracer.configure
+close = _tracer.close
+new_turn = _tracer.new_turn
+span = _tracer.span
+traced = _tracer.traced
+
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器"""
+    return _tracer
+
+
+def response_timings(response) -> Dict:
+    """从 Ollama 响应中提取 token 数和耗时（纳秒字段换算为毫秒）"""
+    timings = {}
+    for key in ('prompt_eval_count', 'eval_count'):
+        value = _response_field(response, key)
+        if value is not None:
+            timings[key] = value
+    for key in ('load_duration', 'prompt_eval_duration', 'eval_duration', 'total_duration'):
+        value = _response_field(response, key)
+        if value is not None:
+            timings[key.replace('_duration', '_ms')] = round(value / 1e6, 3)
+    return timings
+
+
+def _response_field(response, key: str):
+    try:
+        return response[key]
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+
+def summarize(path: str) -> Dict:
+    """按 span 名称汇总 JSONL 追踪文件的耗时分布"""
+    durations = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            durations.setdefault(record['name'], []).append(record['duration_ms'])
+
+    summary = {}
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+        summary[name] = {
+            'count': len(values),
+            'total_ms': round(sum(values), 1),
+            'mean_ms': round(statistics.fmean(values), 1),
+            'p95_ms': round(values[min(int(len(values) * 0.95), len(values) - 1)], 1),
+            'max_ms': round(values[-1], 1)
+        }
+    return summary
+
+
+if os.environ.get('AI_INTERVIEW_TRACE'):
+    configure(os.environ['AI_INTERVIEW_TRACE'])
+
+atexit.register(close)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("用法: python -m ai_interview.tracing trace.jsonl")
+        sys.exit(1)
+    print(json.dumps(summarize(sys.argv[1]), ensure_ascii=False, indent=2))
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+有界的对话记录控件
+
+长时间练习时对话区域会不断变长，每次写入都越来越慢。TranscriptView 只在控件中保留最近的记录：
+- 样式标签在创建时配置一次，写入时只插入文本
+- 超过条数或字符预算时，把最早的记录从控件中移出并追加到磁盘上的记录文件（JSON Lines）
+- “加载更早的记录”按需从记录文件读回一页，插入到控件顶部
+每条写入的开销与会话已进行的时长无关。
+
+用法：
+    view = TranscriptView(parent, font=custom_font)
+    view.append(["> 请介绍一下你自己", "候选人: 我是……"])
+"""
+
+import json
+import os
+import time
+from collections import deque
+from typing import List, Tuple
+
+import tkinter as tk
+from tkinter import scrolledtext, ttk
+
+
+DEFAULT_TRANSCRIPT_DIR = 'Data/transcripts'
+
+# 控件中保留的记录上限；超出后一次移出到低水位，避免每条写入都删除
+MAX_MESSAGES = 400
+MAX_CHARS = 100000
+LOW_WATER_RATIO = 0.8
+
+# “加载更早的记录”每次读回的条数
+LOAD_PAGE_SIZE = 50
+
+
+def tag_for(text: str) -> Tuple[str, str]:
+    """按文本前缀确定样式标签和结尾换行"""
+    if text.startswith("候选人:"):
+        return 'candidate', "\n\n"
+    if text.startswith(">"):
+        return 'interviewer', "\n\n"
+    if text.startswith("错误:") or text.startswith("面试评估:"):
+        return 'error', "\n"
+    return 'plain', "\n"
+
+
+class TranscriptView:
+    """
+    对话记录控件（“加载更早的记录”按钮 + 只读文本区域）
+
+    控件中的每条记录对应 entries 中的 [记录文件中的序号或 None, 行数, 字符数, 文本]；
+    序号为 None 表示该条尚未写入记录文件。控件顶部之前的记录都在记录文件中，
+    shown_from 为控件第一条记录在记录文件中的序号。
+    """
+
+    def __init__(self, parent: tk.Misc, font=None, family: str = "Helvetica",
+                 transcript_dir: str = DEFAULT_TRANSCRIPT_DIR, max_messages: int = MAX_MESSAGES,
+                 max_chars: int = MAX_CHARS, **text_options):
+        """
+        Args:
+            parent: 父容器
+            font: 文本字体
+            family: 样式标签使用的字体族
+            transcript_dir: 记录文件目录
+            max_messages: 控件中保留的最大记录条数
+            max_chars: 控件中保留的最大字符数
+            text_options: 传给 ScrolledText 的其他参数（颜色、边距等）
+        """
+        self.transcript_dir = transcript_dir
+        self.max_messages = max_messages
+        self.max_chars = max_chars
+        self.transcript_path = None
+        self._log = None
+        self._offsets = []          # 记录文件中每条记录的起始字节位置
+        self.entries = deque()
+        self.total_chars = 0
+        self.shown_from = 0
+
+        self.load_button = ttk.Button(parent, text="加载更早的记录", command=self.load_earlier)
+        self.text = scrolledtext.ScrolledText(parent, wrap=tk.WORD, state='disabled', font=font, **text_options)
+        self.text.pack(fill=tk.BOTH, expand=True)
+
+        # 样式标签只配置一次
+        self.text.tag_configure('candidate', foreground="#2980b9", font=(family, 14, "bold"))
+        self.text.tag_configure('interviewer', foreground="#27ae60", font=(family, 14))
+        self.text.tag_configure('error', foreground="#e74c3c", font=(family, 14))
+
+    def append(self, texts: List[str]):
+        """在末尾写入一批记录（一次插入，一次滚动）"""
+        if not texts:
+            return
+        follow = self.text.yview()[1] >= 0.999
+        chunks = []
+        for text in texts:
+            tag, ending = tag_for(text)
+            chunk = text + ending
+            chunks.extend((chunk, tag))
+            self.entries.append([None, chunk.count("\n"), len(chunk), text])
+            self.total_chars += len(chunk)
+
+        self.text.config(state='normal')
+        self.text.insert(tk.END, *chunks)
+        if len(self.entries) > self.max_messages or self.total_chars > self.max_chars:
+            self._trim()
+        self.text.config(state='disabled')
+        if follow:
+            # 用户正在查看较早的内容时不强制滚动到底部
+            self.text.see(tk.END)
+
+    def load_earlier(self, count: int = LOAD_PAGE_SIZE):
+        """从记录文件读回控件顶部之前的一页记录"""
+        if self.shown_from <= 0 or self._log is None:
+            return
+        start = max(0, self.shown_from - count)
+        self._log.flush()
+        end = self._offsets[self.shown_from] if self.shown_from < len(self._offsets) else self._log.tell()
+        with open(self.transcript_path, 'rb') as f:
+            f.seek(self._offsets[start])
+            # 按字节换行切分：记录正文可能含 U+2028 等字符，str.splitlines 会把它们也当作换行
+            lines = f.read(end - self._offsets[start]).split(b"\n")
+
+        chunks, loaded = [], []
+        for index, line in zip(range(start, self.shown_from), lines):
+            record = json.loads(line.decode('utf-8'))
+            tag, ending = tag_for(record['text'])
+            chunk = record['text'] + ending
+            chunks.extend((chunk, tag))
+            loaded.append([index, chunk.count("\n"), len(chunk), record['text']])
+
+        self.text.config(state='normal')
+        self.text.insert('1.0', *chunks)
+        self.text.config(state='disabled')
+        self.entries.extendleft(reversed(loaded))
+        self.total_chars += sum(entry[2] for entry in loaded)
+        self.shown_from = start
+        self._update_load_button()
+        self.text.see('1.0')
+
+    def _trim(self):
+        """把最早的记录移出控件，直到低于低水位；未归档的写入记录文件"""
+        message_target = int(self.max_messages * LOW_WATER_RATIO)
+        char_target = int(self.max_chars * LOW_WATER_RATIO)
+        lines, archived = 0, []
+        while self.entries and (len(self.entries) > message_target or self.total_chars > char_target):
+            index, entry_lines, chars, text = self.entries.popleft()
+            if index is None:
+                archived.append(text)
+                index = len(self._offsets) + len(archived) - 1
+            lines += entry_lines
+            self.total_chars -= chars
+            self.shown_from = index + 1
+        if archived:
+            self._archive(archived)
+            # 写入失败的记录无法再读回
+            self.shown_from = min(self.shown_from, len(self._offsets))
+        self.text.delete('1.0', f"{lines + 1}.0")
+        self._update_load_button()
+
+    def _archive(self, texts: List[str]):
+        """追加到记录文件，记录每条的字节位置供按页读回"""
+        try:
+            if self._log is None:
+                os.makedirs(self.transcript_dir, exist_ok=True)
+                self.transcript_path = os.path.join(
+                    self.transcript_dir, time.strftime('transcript-%Y%m%d-%H%M%S') + f'-{os.getpid()}.jsonl')
+                self._log = open(self.transcript_path, 'ab')
+            for text in texts:
+                self._offsets.append(self._log.tell())
+                self._log.write((json.dumps({'time': time.time(), 'text': text}, ensure_ascii=False) + "\n").encode('utf-8'))
+            self._log.flush()
+        except OSError as e:
+            print(f"对话记录写入失败: {e}")
+
+    def _update_load_button(self):
+        if self.shown_from > 0 and self._log is not None:
+            if not self.load_button.winfo_manager():
+                self.load_button.pack(side=tk.TOP, fill=tk.X, before=self.text.frame)
+        elif self.load_button.winfo_manager():
+            self.load_button.pack_forget()
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
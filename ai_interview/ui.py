@@ -3,21 +3,21 @@
 import time
 import json
 import math
-import threading
-import queue
 import os
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import scrolledtext, font, ttk, filedialog, messagebox
-import ollama
 
-from .scoring import ScoreAndDifficultyManager
+from . import report, tracing
+from .event_log import InterviewEventLog
 from .questions import QuestionBankManager
-from .stages import ThreeStageInterviewManager
 from .jd import JDAnalyzer
-from .review import InterviewReviewManager
 from .resume import ResumeParser
-from .prompting import DynamicPromptAdjuster
 from .knowledge import AbilityPyramid, JobKnowledgeGraphBuilder
+from .stages.stage3_technical.question_stats import get_question_stats
+from .ui_adapter import InterviewSessionAdapter
+from .ui_dispatcher import UIDispatcher
+from .transcript_view import TranscriptView
 
 
 class InteractiveTextApp:
@@ -55,17 +55,17 @@ class InteractiveTextApp:
         }
         # 全局ttk样式实例
         self.style = ttk.Style()
-        self.dynamic_prompt_adjuster = None
-        self.conversation_context = []
-        self.score_manager = ScoreAndDifficultyManager()
+        # 出题、评分、难度调整和阶段切换全部由三阶段引擎完成，调用在后台线程执行；
+        # 每题的问答与评分记入事件日志，退出后仍可复盘和分析；题目作答统计跨会话累积并在退出时保存
+        self.event_log = InterviewEventLog()
+        self.session = InterviewSessionAdapter(event_log=self.event_log, question_stats=get_question_stats())
         self.question_bank_manager = QuestionBankManager()
-        self.stage_manager = ThreeStageInterviewManager()
         self.jd_analyzer = JDAnalyzer()
-        self.review_manager = InterviewReviewManager()
+        self.report_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report')
+        self._report_blocks = None
         self.parser = ResumeParser()
         self.ability_pyramid = None
         self.job_graph_builder = None
-        self.last_question = ""
         self.selected_track = None
         self.jd_data = None
         self.resume_data = None
@@ -161,8 +161,9 @@ class InteractiveTextApp:
 
         text_frame = tk.Frame(main_frame, bg="#ffffff", bd=2, relief=tk.GROOVE)
         text_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
-        self.text_area = scrolledtext.ScrolledText(text_frame, wrap=tk.WORD, width=70, height=18, state='disabled', font=self.custom_font, bg="#ffffff", fg="#333333", padx=15, pady=15)
-        self.text_area.pack(fill=tk.BOTH, expand=True)
+        # 对话区域只保留最近的记录，更早的移入磁盘记录文件，可按需加载
+        self.transcript = TranscriptView(text_frame, font=self.custom_font, family=self.default_family, width=70, height=18, bg="#ffffff", fg="#333333", padx=15, pady=15)
+        self.text_area = self.transcript.text
         self.display_text("欢迎使用AI面试智能官！\n请按以下步骤操作：\n1. 上传简历\n2. 上传JD职位描述\n3. 选择面试赛道\n4. 开始面试\n\n面试过程中系统会智能分析您的回答，请放心作答。")
 
         control_frame = tk.Frame(main_frame, bg="#f0f0f0")
@@ -184,11 +185,8 @@ class InteractiveTextApp:
         self.root.bind("<KeyRelease-space>", self.stop_recording)
         self.root.focus_set()
 
-        self.message_queue = queue.Queue()
-        self.input_queue = queue.Queue()
-        self.start_queue_listener()
-        self.model_thread = threading.Thread(target=self.process_model_responses, daemon=True)
-        self.model_thread.start()
+        # 后台线程的界面更新统一经分发器交给主线程，有事件时才唤醒
+        self.dispatcher = UIDispatcher(self.root, self.display_messages)
         self.check_interview_ready()
         self.recording_start_time = 0
         self.progress_active = False
@@ -196,11 +194,7 @@ class InteractiveTextApp:
         self.interview_active = False
         self.resume_data = None
         self.parser = ResumeParser()
-        self.conversation_history = []
-        self.initial_prompt_set = False
         self.question_count = 0
-        self.first_question_asked = False
-        self.key_topics = []
 
         # 记录主题相关容器以便统一美化
         self._containers = {
@@ -352,6 +346,7 @@ class InteractiveTextApp:
                 graph_summary = self.job_graph_builder.summarize(limit=6) if self.job_graph_builder else ""
                 self.display_text(f"JD解析完成！\n{jd_summary}\n{ability_summary}\n{graph_summary}")
                 self.check_interview_ready()
+                self._prepare_interview()
                 jd_window.destroy()
             else:
                 tk.messagebox.showerror("错误", "请输入JD内容")
@@ -375,20 +370,23 @@ class InteractiveTextApp:
                 info_text += f"技能: {len(self.resume_data['skills'])}项"
                 self.info_label.config(text=info_text)
                 self.display_text("简历解析完成！")
-                self.resume_data = self.resume_data
-                self.dynamic_prompt_adjuster = DynamicPromptAdjuster(self.resume_data)
                 entities = self.parser.extract_entities(file_path)
                 if entities:
-                    self.dynamic_prompt_adjuster.key_entities = entities
                     self.display_text(f"已提取关键实体: {', '.join(entities[:5])}...")
                 else:
                     self.display_text("未提取到关键实体。")
                 # 如果JD已存在，构建知识图谱
                 if self.jd_data:
                     self.job_graph_builder = JobKnowledgeGraphBuilder(self.resume_data, self.jd_data)
+                self._prepare_interview()
             else:
                 self.display_text(f"简历解析失败: {self.resume_data}")
 
+    def _prepare_interview(self):
+        """简历和JD都已解析后，在后台预生成第一阶段问题，点击开始面试时第一题可直接显示"""
+        if isinstance(self.resume_data, dict) and self.jd_data and not self.interview_active:
+            self.session.prepare(self.resume_data, self.jd_data)
+
     def start_interview(self):
         if not self.resume_data:
             self.display_text("请先上传简历！")
@@ -400,134 +398,145 @@ class InteractiveTextApp:
             self.display_text("请先上传JD！")
             return
         self.interview_active = True
+        self.is_processing = True
         self.question_count = 0
-        self.first_question_asked = False
-        self.score_manager = ScoreAndDifficultyManager()
-        self.stage_manager = ThreeStageInterviewManager()
-        self.review_manager = InterviewReviewManager()
-        self.update_status_display()
-        current_stage = self.stage_manager.get_current_stage()
-        self.stage_info_label.config(text=f"当前阶段: {current_stage} (第1题)")
+        self._report_blocks = None
+        self.stage_info_label.config(text="当前阶段: 准备中")
+        self.status_label.config(text="正在生成第一个问题...", fg="#f39c12")
         self.display_text("面试已开始！请准备回答面试官的问题。")
-        self.display_text(f"📍 当前阶段: {current_stage}")
         self.end_interview_btn.config(state=tk.NORMAL)
         self.start_interview_btn.config(state=tk.DISABLED)
         self.review_btn.config(state=tk.DISABLED)
         self.export_pdf_btn.config(state=tk.DISABLED)
-        self.conversation_history = []
-        self.initial_prompt_set = False
-        self.input_queue.put("start_interview")
+        tracing.new_turn()
+        self._run_in_session(self.session.start(self.resume_data, self.jd_data), self._apply_turn)
 
     def end_interview(self):
+        if not self.interview_active:
+            return
         self.interview_active = False
-        self.display_text("面试已结束！感谢参与。")
-        score_summary = self.score_manager.get_score_summary()
-        difficulty_progression = self.score_manager.get_difficulty_progression()
-        self.display_text("\n" + "="*50)
-        self.display_text("📊 面试评分总结")
-        self.display_text("="*50)
-        self.display_text(score_summary)
-        self.display_text(difficulty_progression)
-        self.display_text("="*50)
         self.end_interview_btn.config(state=tk.DISABLED)
+        self.status_label.config(text="正在生成面试评估...", fg="#f39c12")
+        tracing.new_turn()
+        self._run_in_session(self.session.finish(), self._show_final_assessment)
+
+    def _run_in_session(self, future, on_result):
+        """面试引擎在后台线程执行，完成后经分发器回到主线程处理结果"""
+        future.add_done_callback(lambda done: self.dispatcher.call(self._on_session_result, done, on_result))
+
+    def _on_session_result(self, future, on_result):
+        self.is_processing = False
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"面试处理失败: {e}")
+            self.display_text(f"错误: {str(e)}")
+            self.solution.use_pyttsx3("抱歉，处理您的请求时出错了")
+            self.status_label.config(text="准备就绪", fg="#2ecc71")
+            return
+        on_result(result)
+
+    def _apply_turn(self, turn):
+        """显示引擎返回的下一题；阶段切换和面试完成时同步更新状态"""
+        if turn['stage_transition']:
+            self.display_text(f"📍 进入下一阶段: {turn['stage_name']}")
+        if turn['completed']:
+            self.interview_active = False
+            self.end_interview_btn.config(state=tk.DISABLED)
+            self.display_text("📍 所有阶段已完成")
+            self._show_final_assessment(turn['final_assessment'])
+            return
+        if not turn['question']:
+            self.display_text("错误: 未能生成下一个问题，请结束面试")
+            return
+        self.question_count += 1
+        self.display_text(f"> {turn['question']}")
+        self.solution.use_pyttsx3(turn['question'])
+        self.update_status_display(turn)
+        self.status_label.config(text="回答中...", fg="#9b59b6")
+
+    def _show_final_assessment(self, assessment):
+        self._report_blocks = None
+        summary = ["面试已结束！感谢参与。", "\n" + "="*50, "📊 面试评分总结", "="*50]
+        if assessment and 'error' not in assessment:
+            summary.append(f"综合得分: {assessment['overall_score']:.2f}（{assessment['overall_rating']}）")
+            summary.append(f"评估建议: {assessment['recommendation']}")
+            for stage_key, performance in assessment['stage_performance'].items():
+                summary.append(f"{self._stage_title(stage_key)}: {performance['questions_count']}题，"
+                               f"平均分 {performance['average_score']:.2f}")
+        else:
+            summary.append("暂无评分数据")
+        summary.append("="*50)
+        self.display_messages(summary)
+        self.stage_info_label.config(text="当前阶段: 面试完成")
         self.start_interview_btn.config(state=tk.NORMAL)
-        self.input_queue.put("end_interview")
         self.review_btn.config(state=tk.NORMAL)
         self.export_pdf_btn.config(state=tk.NORMAL)
+        self.status_label.config(text="准备就绪", fg="#2ecc71")
+        self.display_text("面试已结束,请点击查看复盘按钮查看详细评估，或导出PDF报告查看完整分析。")
+        self.solution.use_pyttsx3("面试评估已完成")
+
+    def _stage_title(self, stage_key):
+        """阶段键（stage1/stage2/stage3）对应的阶段名称"""
+        return self.session.manager.stage_names[int(stage_key[-1])]
+
+    def _report_layout(self):
+        """复盘窗口和 PDF 共用的报告版面，每场面试只整理一次"""
+        if self._report_blocks is None:
+            candidate_name = self.resume_data.get('name', '候选人') if self.resume_data else '候选人'
+            self._report_blocks = report.build_report(self.session.records, self.session.final_assessment,
+                                                      candidate_name=candidate_name, track_name=self.selected_track or '')
+        return self._report_blocks
+
+    def _has_report(self):
+        assessment = self.session.final_assessment
+        return bool(self.session.records) and bool(assessment) and 'error' not in assessment
 
     def show_interview_review(self):
-        if not self.review_manager.interview_records:
+        if not self._has_report():
             tk.messagebox.showinfo("提示", "暂无面试记录")
             return
-        if hasattr(self, 'full_evaluation'):
-            assessment = self.full_evaluation
-        else:
-            assessment = self.review_manager.generate_overall_assessment(self.stage_manager, self.score_manager)
         review_window = tk.Toplevel(self.root)
         review_window.title("面试复盘分析")
         review_window.geometry("800x600")
         review_window.configure(bg="#f0f0f0")
         review_text = scrolledtext.ScrolledText(review_window, wrap=tk.WORD, width=90, height=35, font=("Helvetica", 10), bg="#ffffff", fg="#333333")
         review_text.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        review_content = f"""
-🎯 面试复盘报告
-{'='*60}
-
-📅 面试日期: {assessment['interview_date']}
-📊 总题数: {assessment['total_questions']}题
-🎯 综合得分: {assessment['overall_score']:.2f}/1.00
-
-{'='*60}
-📈 各阶段表现分析
-{'='*60}
-"""
-        for stage, performance in assessment['stage_performance'].items():
-            review_content += f"""
-🔸 {stage}:
-   - 题目数量: {performance['questions']}题
-   - 平均得分: {performance['avg_score']:.2f}/1.00
-   - 表现评价: {'优秀' if performance['avg_score'] >= 0.75 else '良好' if performance['avg_score'] >= 0.6 else '一般' if performance['avg_score'] >= 0.5 else '需改进'}
-"""
-        review_content += f"""
-{'='*60}
-✅ 优势表现
-{'='*60}
-"""
-        for strength in assessment['strengths']:
-            review_content += f"• {strength}\n"
-        if not assessment['strengths']:
-            review_content += "建议在各个方面继续努力\n"
-        review_content += f"""
-{'='*60}
-⚠️ 待改进方面
-{'='*60}
-"""
-        for weakness in assessment['weaknesses']:
-            review_content += f"• {weakness}\n"
-        if not assessment['weaknesses']:
-            review_content += "整体表现良好\n"
-        review_content += f"""
-{'='*60}
-💡 改进建议
-{'='*60}
-"""
-        for suggestion in assessment['improvement_suggestions']:
-            review_content += f"• {suggestion}\n"
-        review_content += f"""
-{'='*60}
-📝 详细问答记录
-{'='*60}
-"""
-        for i, record in enumerate(self.review_manager.interview_records):
-            review_content += f"""
-第{i+1}题 [{record['stage']}] - {record['timestamp']}
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-❓ 问题: {record['question']}
-
-💬 回答: {record['answer']}
-
-📊 得分: {record['score']:.2f}/1.00
-
-💭 反馈: {record['feedback']}
-
-"""
-        review_text.insert(tk.END, review_content)
+        review_text.insert(tk.END, "".join(report.render_text(self._report_layout())))
         review_text.config(state='disabled')
 
     def export_interview_pdf(self):
-        if not self.review_manager.interview_records:
+        if not self._has_report():
             tk.messagebox.showinfo("提示", "暂无面试记录")
             return
         filename = filedialog.asksaveasfilename(title="保存面试报告", defaultextension=".pdf", filetypes=[("PDF文件", "*.pdf"), ("所有文件", "*.*")])
-        if filename:
-            self.review_manager.generate_overall_assessment(self.stage_manager, self.score_manager)
-            candidate_name = self.resume_data.get('name', '候选人') if self.resume_data else '候选人'
-            track_name = self.selected_track or '未知赛道'
-            success = self.review_manager.export_to_pdf(filename, candidate_name, track_name)
-            if success:
-                tk.messagebox.showinfo("成功", f"面试报告已导出至:\n{filename}")
-            else:
-                tk.messagebox.showerror("失败", "PDF导出失败，请检查权限和路径")
+        if not filename:
+            return
+        candidate_name = self.resume_data.get('name', '候选人') if self.resume_data else '候选人'
+        # 排版在后台线程执行，每排完一页回报一次进度
+        self.export_pdf_btn.config(state=tk.DISABLED)
+        self.status_label.config(text="正在导出PDF...", fg="#f39c12")
+        future = self.report_executor.submit(
+            report.render_pdf, self._report_layout(), filename, f"{candidate_name} 面试复盘报告",
+            lambda pages, done, total: self.dispatcher.call(self._show_export_progress, pages, done, total)
+        )
+        future.add_done_callback(lambda done: self.dispatcher.call(self._on_pdf_exported, done, filename))
+
+    def _show_export_progress(self, pages, done, total):
+        self.progress_var.set(done / total * 100 if total else 100)
+        self.status_label.config(text=f"正在导出PDF... 第{pages}页", fg="#f39c12")
+
+    def _on_pdf_exported(self, future, filename):
+        self.export_pdf_btn.config(state=tk.NORMAL)
+        self.status_label.config(text="准备就绪", fg="#2ecc71")
+        self.reset_progress()
+        try:
+            future.result()
+        except Exception as e:
+            print(f"PDF导出失败: {e}")
+            tk.messagebox.showerror("失败", "PDF导出失败，请检查权限和路径")
+            return
+        tk.messagebox.showinfo("成功", f"面试报告已导出至:\n{filename}")
 
     # 录音与处理
     def start_recording(self, event):
@@ -557,278 +566,33 @@ class InteractiveTextApp:
         self.progress_active = False
         self.is_processing = True
         self.status_label.config(text="处理中...", fg="#f39c12")
+        # 每次回答是一轮：转写、评分、出题和播报的 span 都归入该轮
+        tracing.new_turn()
         user_input = self.solution.recorder.stop_recording()
         if user_input:
-            self.message_queue.put(f"候选人: {user_input}")
+            self.display_text(f"候选人: {user_input}")
             self.last_answer = user_input
-            self.conversation_history.append({"role": "user", "content": user_input})
-            self.analyze_response(user_input)
-            self.input_queue.put("candidate_response")
+            # 评估本题并生成下一题：各阶段引擎各调用一次模型
+            self._run_in_session(self.session.answer(user_input), self._apply_turn)
+        else:
+            self.is_processing = False
+            self.status_label.config(text="回答中...", fg="#9b59b6")
         self.root.after(100, self.reset_progress)
 
-    def analyze_response(self, response):
-        if self.dynamic_prompt_adjuster and hasattr(self, 'last_model_output'):
-            self.dynamic_prompt_adjuster.update_conversation_context(response, self.last_model_output)
-        self.conversation_context.append(f"候选人: {response}")
-        if len(self.conversation_context) > 6:
-            self.conversation_context = self.conversation_context[-6:]
-
-        if (hasattr(self, 'last_question') and self.last_question and hasattr(self, 'question_count') and self.question_count > 0 and self.interview_active):
-            def score_response():
-                try:
-                    score = self.score_manager.evaluate_response(response, self.last_question)
-                    new_difficulty = self.score_manager.adjust_difficulty(score)
-                    self.root.after(0, lambda: self._update_after_scoring_silent(score, new_difficulty))
-                except Exception as e:
-                    print(f"评分过程出错: {e}")
-            threading.Thread(target=score_response, daemon=True).start()
-
-    def _update_after_scoring_silent(self, score, new_difficulty):
-        if hasattr(self, 'last_question') and hasattr(self, 'last_answer'):
-            feedback = self.review_manager.generate_detailed_feedback(self.last_answer, self.last_question, score)
-        else:
-            feedback = f"得分: {score:.2f}/1.0"
-        current_stage = self.stage_manager.get_current_stage()
-        self.review_manager.add_qa_record(self.last_question, self.last_answer, score, feedback, current_stage)
-        self.stage_manager.add_score_to_stage(score)
-        if self.stage_manager.should_advance_stage():
-            if self.stage_manager.advance_to_next_stage():
-                new_stage = self.stage_manager.get_current_stage()
-                self.stage_info_label.config(text=f"当前阶段: {new_stage} (第{self.stage_manager.current_stage_question_count + 1}题)")
-            else:
-                self.stage_info_label.config(text="当前阶段: 面试完成")
-        else:
-            current_stage = self.stage_manager.get_current_stage()
-            self.stage_info_label.config(text=f"当前阶段: {current_stage} (第{self.stage_manager.current_stage_question_count + 1}题)")
-        self.stage_manager.adjust_stage_questions(self.score_manager.score_history)
-        self.update_status_display_silent()
-
-    def _update_after_scoring(self, score, new_difficulty):
-        if hasattr(self, 'last_question') and hasattr(self, 'last_answer'):
-            feedback = self.review_manager.generate_detailed_feedback(self.last_answer, self.last_question, score)
+    def update_status_display(self, turn):
+        self.stage_info_label.config(text=f"当前阶段: {turn['stage_name']} (第{turn['question_number'] or 1}题)")
+        if turn['difficulty']:
+            self.difficulty_label.config(text=f"当前难度: {turn['difficulty']}")
         else:
-            feedback = f"得分: {score:.2f}/1.0"
-        current_stage = self.stage_manager.get_current_stage()
-        self.review_manager.add_qa_record(self.last_question, self.last_answer, score, feedback, current_stage)
-        score_text = f"本题评分: {score:.2f}"
-        if score > 0.8:
-            score_text += " (优秀)"
-        elif score > 0.6:
-            score_text += " (良好)"
-        elif score > 0.4:
-            score_text += " (及格)"
-        else:
-            score_text += " (需改进)"
-        self.display_text(score_text)
-        self.display_text(f"反馈: {feedback}")
-        self.stage_manager.add_score_to_stage(score)
-        if self.stage_manager.should_advance_stage():
-            if self.stage_manager.advance_to_next_stage():
-                new_stage = self.stage_manager.get_current_stage()
-                self.display_text(f"📍 进入下一阶段: {new_stage}")
-                self.stage_info_label.config(text=f"当前阶段: {new_stage} (第{self.stage_manager.current_stage_question_count + 1}题)")
-            else:
-                self.display_text("📍 所有阶段已完成，可以结束面试")
-                self.stage_info_label.config(text="当前阶段: 面试完成")
-        else:
-            current_stage = self.stage_manager.get_current_stage()
-            self.stage_info_label.config(text=f"当前阶段: {current_stage} (第{self.stage_manager.current_stage_question_count + 1}题)")
-        self.stage_manager.adjust_stage_questions(self.score_manager.score_history)
-        if new_difficulty != self.score_manager.difficulty_history[-1]["previous_difficulty"]:
-            self.display_text(f"难度调整: {self.score_manager.difficulty_history[-1]['previous_difficulty']} → {new_difficulty}")
-        self.update_status_display()
-
-    def update_status_display_silent(self):
-        if hasattr(self, 'question_count'):
-            self.question_count_label.config(text=f"问题数: {self.question_count}")
+            self.difficulty_label.config(text="系统智能调节中")
         self.latest_score_label.config(text="面试进行中...")
         self.avg_score_label.config(text="实时分析中...")
-
-    def update_status_display(self):
-        self.difficulty_label.config(text=f"当前难度: {self.score_manager.current_difficulty}")
-        if self.score_manager.score_history:
-            latest_score = self.score_manager.score_history[-1]
-            self.latest_score_label.config(text=f"最新评分: {latest_score:.2f}")
-            avg_score = sum(self.score_manager.score_history) / len(self.score_manager.score_history)
-            self.avg_score_label.config(text=f"平均分: {avg_score:.2f}")
-        else:
-            self.latest_score_label.config(text="最新评分: --")
-            self.avg_score_label.config(text="平均分: --")
-        self.question_count_label.config(text=f"问题数: {len(self.score_manager.score_history)}")
+        self.question_count_label.config(text=f"问题数: {self.question_count}")
 
     def reset_progress(self):
         self.progress_var.set(0)
         self.time_label.config(text="0.0s")
 
-    def extract_question(self, model_output):
-        while "<think>" in model_output and "</think>" in model_output:
-            think_start = model_output.find("<think>")
-            think_end = model_output.find("</think>") + len("</think>")
-            model_output = model_output[:think_start] + model_output[think_end:]
-        arrow_index = model_output.find(">")
-        if arrow_index != -1:
-            question_text = model_output[arrow_index + 1:].strip()
-            end_marks = ['.', '?', '！', '。', '？']
-            end_indices = [question_text.find(mark) for mark in end_marks if mark in question_text]
-            if end_indices:
-                valid_indices = [i for i in end_indices if i != -1]
-                if valid_indices:
-                    first_end = min(valid_indices) + 1
-                    question_text = question_text[:first_end].strip()
-            return question_text
-        return model_output.strip()
-
-    def build_dynamic_prompt(self):
-        stage_prompt = self.stage_manager.get_stage_prompt(self.jd_data, self.resume_data)
-        difficulty_prompt = self.score_manager.get_difficulty_prompt()
-        # 结合能力金字塔建议层级
-        focus_level = None
-        if self.ability_pyramid:
-            focus_level = self.ability_pyramid.suggest_focus_level(self.score_manager.score_history)
-        reference_questions = []
-        if self.selected_track:
-            ref_questions = self.question_bank_manager.get_reference_questions(difficulty=self.score_manager.current_difficulty, num_questions=3)
-            reference_questions = [q["question"] for q in ref_questions]
-        instruction = (
-            f"你是一个专业的{self.selected_track}面试官，具备三阶段面试和动态难度调整能力。"
-            f"当前正在进行第{self.stage_manager.current_stage + 1}阶段面试。\n\n"
-            f"{stage_prompt}\n\n"
-            f"{difficulty_prompt}\n\n"
-        )
-        if focus_level:
-            instruction += f"基于能力金字塔，当前建议关注层级: {focus_level}。\n\n"
-        if self.jd_data and self.jd_data.get('keywords'):
-            instruction += f"### JD关键技术要求:\n{', '.join(self.jd_data['keywords'])}\n\n"
-        if reference_questions:
-            instruction += "### 参考题库示例:\n"
-            for i, q in enumerate(reference_questions, 1):
-                instruction += f"{i}. {q}\n"
-            instruction += "\n请参考以上题库内容和当前阶段要求，生成相应的问题。\n\n"
-        instruction += (
-            "你必须严格遵守以下规则：\n"
-            "1. 直接输出问题，不要输出思考过程\n"
-            "2. 在问题前添加'>'符号作为前缀\n"
-            "3. 只输出问题内容，不要添加任何前缀（如'面试官：'）\n"
-            "4. 每次只提一个问题\n"
-            "5. 问题应该简洁明了，不超过2句话\n"
-            "6. 问题难度必须与当前设定的难度级别匹配\n"
-            f"7. 问题必须符合当前{self.stage_manager.get_current_stage()}阶段要求\n"
-            f"8. 问题必须符合{self.selected_track}赛道的专业要求\n"
-            "9. 面试结束时只评价候选人表现，不要评价问题质量\n"
-        )
-        history_details = "### 对话历史摘要:\n"
-        if self.conversation_context:
-            history_details += "\n".join(self.conversation_context[-3:])
-        else:
-            history_details += "暂无历史对话"
-        evidence_details = "### 证据细节:\n"
-        if self.dynamic_prompt_adjuster:
-            triplets = self.dynamic_prompt_adjuster.triplet_filter()
-            if triplets:
-                evidence_details += "知识三元组:\n"
-                for head, rel, tail in triplets:
-                    evidence_details += f"- {head} -- {rel} --> {tail}\n"
-            if self.dynamic_prompt_adjuster.historical_entities:
-                evidence_details += "\n历史实体:\n"
-                evidence_details += ", ".join(set(self.dynamic_prompt_adjuster.historical_entities[-5:]))
-            if self.dynamic_prompt_adjuster.current_entities:
-                evidence_details += "\n当前相关实体:\n"
-                evidence_details += ", ".join(self.dynamic_prompt_adjuster.current_entities)
-        # 合并岗位知识图谱摘要（占位）
-        if self.job_graph_builder:
-            evidence_details += "\n\n"
-            evidence_details += self.job_graph_builder.summarize(limit=6)
-        demonstration = "### 相关演示:\n"
-        if self.dynamic_prompt_adjuster:
-            demo = self.dynamic_prompt_adjuster.demo_selector()
-            demonstration += demo
-        prompt = f"""
-        {instruction}
-
-        {history_details}
-
-        {evidence_details}
-
-        {demonstration}
-        """
-        return prompt
-
-    def process_model_responses(self):
-        while True:
-            action = self.input_queue.get()
-            if not self.interview_active and action != "start_interview":
-                continue
-            try:
-                dynamic_prompt = self.build_dynamic_prompt()
-                if not self.initial_prompt_set:
-                    self.conversation_history = [{"role": "system", "content": dynamic_prompt}]
-                    self.initial_prompt_set = True
-                else:
-                    self.conversation_history[0] = {"role": "system", "content": dynamic_prompt}
-                if action == "start_interview":
-                    self.conversation_history.append({"role": "user", "content": "请基于候选人的简历提出第一个面试问题"})
-                    self.question_count = 0
-                    self.first_question_asked = False
-                elif action == "end_interview":
-                    score_info = self.score_manager.get_score_summary()
-                    difficulty_info = self.score_manager.get_difficulty_progression()
-                    evaluation_content = """面试结束，请根据整个面试过程给出候选人综合评估。
-请从以下几个方面进行评价：
-
-1. 技术掌握程度
-2. 项目经验深度
-3. 解决问题能力
-4. 沟通表达能力
-5. 学习成长潜力
-
-注意：
-- 只评价候选人的表现，不要评价问题的质量
-- 不要显示具体分数，用定性描述替代
-- 重点关注候选人的优势和可提升空间
-- 给出明确的是否通过面试的结论"""
-                    self.conversation_history.append({"role": "user", "content": evaluation_content})
-                elif action == "candidate_response":
-                    pass
-                output = ollama.chat(model="Jerrypoi/deepseek-r1-with-tool-calls:latest", messages=self.conversation_history)
-                model_output = output['message']['content']
-                self.last_model_output = model_output
-                self.conversation_history.append({"role": "assistant", "content": model_output})
-                if action == "end_interview":
-                    self.full_evaluation = model_output
-                    self.message_queue.put("面试已结束,请点击查看复盘按钮查看详细评估，或导出PDF报告查看完整分析。")
-                    self.solution.use_pyttsx3("面试评估已完成")
-                    continue
-                question_text = self.extract_question(model_output)
-                self.last_question = question_text
-                self.message_queue.put(f"> {question_text}")
-                self.solution.use_pyttsx3(question_text)
-                self.status_label.config(text="回答中...", fg="#9b59b6")
-                self.question_count += 1
-                if not self.first_question_asked and self.question_count >= 1:
-                    self.first_question_asked = True
-                    self.display_text("面试进入深入追问阶段...")
-            except Exception as e:
-                error_msg = f"错误: {str(e)}"
-                self.message_queue.put(error_msg)
-                self.solution.use_pyttsx3("抱歉，处理您的请求时出错了")
-            finally:
-                self.is_processing = False
-                if self.interview_active:
-                    self.status_label.config(text="准备提问...", fg="#2ecc71")
-                else:
-                    self.status_label.config(text="准备就绪", fg="#2ecc71")
-
-    def start_queue_listener(self):
-        def check_queue():
-            try:
-                while True:
-                    message = self.message_queue.get_nowait()
-                    self.display_text(message)
-            except queue.Empty:
-                pass
-            self.root.after(100, check_queue)
-        check_queue()
-
     def check_interview_ready(self):
         remaining = []
         if not self.resume_data:
@@ -848,20 +612,11 @@ class InteractiveTextApp:
                 self.display_text(f"⏳ 请{remaining[0]}后开始面试")
 
     def display_text(self, text):
-        self.text_area.config(state='normal')
-        if text.startswith("候选人:"):
-            self.text_area.tag_configure("candidate", foreground="#2980b9", font=(self.default_family, 14, "bold"))
-            self.text_area.insert(tk.END, text + "\n\n", "candidate")
-        elif text.startswith(">"):
-            self.text_area.tag_configure("interviewer", foreground="#27ae60", font=(self.default_family, 14))
-            self.text_area.insert(tk.END, text + "\n\n", "interviewer")
-        elif text.startswith("错误:") or text.startswith("面试评估:"):
-            self.text_area.tag_configure("error", foreground="#e74c3c", font=(self.default_family, 14))
-            self.text_area.insert(tk.END, text + "\n", "error")
-        else:
-            self.text_area.insert(tk.END, text + "\n")
-        self.text_area.config(state='disabled')
-        self.text_area.yview(tk.END)
+        self.display_messages([text])
+
+    def display_messages(self, texts):
+        """一批文本在一次文本控件操作中写入（只插入一次、滚动一次）"""
+        self.transcript.append(texts)
 
 
 
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+界面适配层
+
+桌面界面通过 IntegratedInterviewManager 驱动三阶段面试：出题、评分、难度调整和阶段切换都由各阶段引擎完成，
+每轮回答只有引擎自身的一次评估调用和一次出题调用（第三阶段从题库抽题时不调用模型），
+界面不再另外维护自由对话的面试官和独立的评分线程。
+
+引擎调用在后台线程执行，各方法立即返回 Future。同一场面试的各轮在同一个工作线程上依次执行，
+引擎状态不会被并发修改。结果整理为界面直接使用的字典（见 turn_view）。
+
+用法：
+    adapter = InterviewSessionAdapter()
+    adapter.prepare(resume_data, jd_data)      # 文档解析完成后，预生成第一阶段问题
+    adapter.start(resume_data, jd_data).add_done_callback(on_turn)
+    adapter.answer("我负责订单系统的……").add_done_callback(on_turn)
+    adapter.finish().add_done_callback(on_finished)
+"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from . import tracing
+from .stages import IntegratedInterviewManager
+
+
+def turn_view(result: Dict, stage_name: Optional[str] = None) -> Dict:
+    """
+    把 IntegratedInterviewManager 的返回结果整理为界面使用的字段
+
+    Args:
+        result: start_interview() 或 process_answer_and_get_next_question() 的返回值
+        stage_name: 本轮所回答问题所在的阶段
+
+    Returns:
+        {'question', 'question_data', 'stage', 'stage_name', 'question_number', 'difficulty', 'progress',
+         'answered_stage', 'score', 'feedback', 'next_difficulty', 'stage_transition', 'completed',
+         'final_assessment'}
+    """
+    progress = result.get('interview_progress', {})
+    evaluation = result.get('evaluation') or {}
+    question = result.get('question')
+    return {
+        'question': question,
+        'question_data': result if question else None,
+        'stage': progress.get('current_stage'),
+        'stage_name': progress.get('current_stage_name'),
+        'question_number': result.get('question_number'),
+        'difficulty': result.get('difficulty'),
+        'progress': progress.get('progress_percentage', 0),
+        'answered_stage': stage_name,
+        'score': evaluation.get('score'),
+        'feedback': evaluation.get('feedback', ''),
+        'next_difficulty': evaluation.get('next_difficulty'),
+        'stage_transition': result.get('stage_transition'),
+        'completed': bool(result.get('interview_completed')),
+        'final_assessment': result.get('final_assessment')
+    }
+
+
+class InterviewSessionAdapter:
+    """
+    桌面界面的面试会话
+
+    records 按作答顺序保存每一题的 {'stage', 'question', 'answer', 'score', 'feedback', 'difficulty', 'timestamp'}，
+    供复盘和报告导出使用。
+    """
+
+    def __init__(self, manager: Optional[IntegratedInterviewManager] = None, **manager_options):
+        """
+        Args:
+            manager: 面试管理器，默认按 manager_options 新建
+            manager_options: 传给 IntegratedInterviewManager 的参数（deferred_scoring、jd_store、irt、event_log、question_stats）
+        """
+        self.manager = manager or IntegratedInterviewManager(**manager_options)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='interview')
+        self.current_question = None
+        self.records = []
+        self.final_assessment = None
+
+    @property
+    def active(self) -> bool:
+        return self.manager.current_stage in (1, 2, 3)
+
+    def prepare(self, resume_data: Dict, jd_data) -> Future:
+        """简历和JD都已解析时调用，在后台预生成第一阶段问题（面试进行中时不处理）"""
+        return self.executor.submit(self._prepare, resume_data, jd_data)
+
+    def start(self, resume_data: Dict, jd_data) -> Future:
+        """开始面试，Future 的结果为第一题的 turn_view"""
+        return self.executor.submit(self._start, resume_data, jd_data)
+
+    def answer(self, user_response: str) -> Future:
+        """提交当前问题的回答，Future 的结果为下一题（或阶段切换、面试完成）的 turn_view"""
+        return self.executor.submit(self._answer, user_response)
+
+    def finish(self) -> Future:
+        """结束面试（未完成时提前结束），Future 的结果为最终评估"""
+        return self.executor.submit(self._finish)
+
+    def _prepare(self, resume_data: Dict, jd_data):
+        if not self.active:
+            self.manager.prepare_interview(resume_data, jd_data)
+
+    def _start(self, resume_data: Dict, jd_data) -> Dict:
+        with tracing.span('ui.start_interview'):
+            if self.active:
+                self.manager.reset_interview()
+            self.records = []
+            self.final_assessment = None
+            result = self.manager.start_interview(resume_data, jd_data)
+        self.current_question = result if result.get('question') else None
+        return turn_view(result)
+
+    def _answer(self, user_response: str) -> Dict:
+        if self.current_question is None:
+            raise RuntimeError("当前没有待回答的问题")
+        question = self.current_question
+        stage_name = self.manager.stage_names[self.manager.current_stage]
+        with tracing.span('ui.candidate_response', stage=self.manager.current_stage):
+            result = self.manager.process_answer_and_get_next_question(user_response, question)
+
+        view = turn_view(result, stage_name)
+        self.records.append({
+            'stage': stage_name,
+            'question': question['question'],
+            'answer': user_response,
+            'score': view['score'],
+            'feedback': view['feedback'],
+            'difficulty': question.get('difficulty'),
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        })
+        if view['stage_transition']:
+            self._backfill_scores(stage_name, view['stage_transition'])
+        self.current_question = view['question_data']
+        if view['completed']:
+            self.final_assessment = view['final_assessment']
+        return view
+
+    def _finish(self) -> Dict:
+        with tracing.span('ui.end_interview'):
+            if self.final_assessment is None:
+                self.final_assessment = self.manager.end_interview()
+        self.current_question = None
+        return self.final_assessment
+
+    def _backfill_scores(self, stage_name: str, transition: Dict):
+        """延迟评分模式下，阶段结束后用批量评分结果补齐该阶段各题的得分和反馈"""
+        summary = transition.get('stage1_summary') or transition.get('stage2_summary') or {}
+        evaluations = summary.get('batch_evaluations') or []
+        stage_records = [record for record in self.records if record['stage'] == stage_name]
+        for record, evaluation in zip(stage_records, evaluations):
+            record['score'] = evaluation.get('score')
+            record['feedback'] = evaluation.get('feedback', record['feedback'])
+
+    def scores(self) -> List[float]:
+        """已评分的各题得分"""
+        return [record['score'] for record in self.records if record['score'] is not None]
+
+    def close(self):
+        """结束工作线程；面试仍在进行时不再生成评估，只释放状态"""
+        self.executor.shutdown(wait=False)
+        if self.active:
+            self.manager.reset_interview()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+界面事件分发
+
+Tk 控件只能在主线程操作。后台线程（面试引擎、语音等）不直接修改控件，而是通过 UIDispatcher 投递：
+- post_message(text)：追加到对话区域的文本
+- call(func, *args)：需要在主线程执行的控件更新
+
+队列由空变为非空时才唤醒主线程一次（虚拟事件 + after_idle），唤醒前继续投递的事件合并到同一次处理；
+一次处理中连续的文本作为一批交给 render_messages，在一次文本控件操作中写入。
+没有事件时主线程不做任何轮询。
+
+用法：
+    dispatcher = UIDispatcher(root, app.display_messages)
+    dispatcher.post_message("> 请介绍一下你自己")            # 任意线程
+    dispatcher.call(label.config, text="回答中...")          # 任意线程
+"""
+
+import threading
+from collections import deque
+from typing import Callable, List
+
+import tkinter as tk
+
+
+WAKEUP_EVENT = '<<UIDispatcherWakeup>>'
+
+
+class UIDispatcher:
+    """把后台线程的界面更新合并后交给 Tk 主线程执行"""
+
+    def __init__(self, root: tk.Misc, render_messages: Callable[[List[str]], None]):
+        """
+        Args:
+            root: Tk 根窗口（须在主线程创建分发器）
+            render_messages: 在主线程写入一批文本的函数
+        """
+        self.root = root
+        self.render_messages = render_messages
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._main_thread = threading.get_ident()
+        self.root.bind(WAKEUP_EVENT, self._on_wakeup)
+
+    def post_message(self, text: str):
+        """追加一条对话文本（线程安全）"""
+        self._post(('message', text))
+
+    def call(self, func: Callable, *args, **kwargs):
+        """在主线程执行 func(*args, **kwargs)（线程安全）"""
+        self._post(('call', (func, args, kwargs)))
+
+    def _post(self, item):
+        with self._lock:
+            self._pending.append(item)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wakeup()
+
+    def _wakeup(self):
+        if threading.get_ident() == self._main_thread:
+            self.root.after_idle(self._drain)
+            return
+        try:
+            # 后台线程只生成一个虚拟事件，由 Tcl 转交主线程处理
+            self.root.event_generate(WAKEUP_EVENT, when='tail')
+        except (tk.TclError, RuntimeError) as e:
+            # 窗口已关闭或主循环已退出，丢弃未处理的更新
+            print(f"界面事件分发失败: {e}")
+            with self._lock:
+                self._pending.clear()
+                self._scheduled = False
+
+    def _on_wakeup(self, event=None):
+        self.root.after_idle(self._drain)
+
+    def _drain(self):
+        with self._lock:
+            items = list(self._pending)
+            self._pending.clear()
+            self._scheduled = False
+
+        messages = []
+        for kind, payload in items:
+            if kind == 'message':
+                messages.append(payload)
+                continue
+            # 保持投递顺序：先写入之前的文本，再执行控件更新
+            if messages:
+                self._render(messages)
+                messages = []
+            func, args, kwargs = payload
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"界面更新失败: {e}")
+        if messages:
+            self._render(messages)
+
+    def _render(self, messages: List[str]):
+        try:
+            self.render_messages(messages)
+        except Exception as e:
+            print(f"界面更新失败: {e}")
@@ -94,6 +94,8 @@ import os
 import pyaudio
 from faster_whisper import WhisperModel
 
+from . import metrics, tracing
+
 
 class VoiceRecorder:
     def __init__(self, model_size="small", device="cpu"):
@@ -133,10 +135,12 @@ class VoiceRecorder:
 
     def stop_recording(self):
         if self.is_recording:
-            self.is_recording = False
-            self.stream.stop_stream()
-            self.stream.close()
-            return self.process_recording()
+            with tracing.span('asr.stop_recording') as span:
+                self.is_recording = False
+                self.stream.stop_stream()
+                self.stream.close()
+                span.set(audio_seconds=round(len(self.frames) * self.chunk / self.rate, 2))
+                return self.process_recording()
         return None
 
     def process_recording(self):
@@ -148,13 +152,21 @@ class VoiceRecorder:
         wf.writeframes(b''.join(self.frames))
         wf.close()
 
+        audio_seconds = len(self.frames) * self.chunk / self.rate
+        started = time.perf_counter()
         result_text = self._recognize_speech(temp_file)
+        if audio_seconds > 0:
+            metrics.ASR_REAL_TIME_FACTOR.observe((time.perf_counter() - started) / audio_seconds)
         os.remove(temp_file)
         return result_text
 
     def _recognize_speech(self, filename):
-        segments, info = self.model.transcribe(filename, beam_size=5)
-        results = [segment.text for segment in segments]
-        return " ".join(results)
+        with tracing.span('asr.transcribe') as span:
+            # segments 是惰性生成器，解码在遍历时进行
+            segments, info = self.model.transcribe(filename, beam_size=5)
+            results = [segment.text for segment in segments]
+            text = " ".join(results)
+            span.set(segments=len(results), chars=len(text))
+            return text
 
 
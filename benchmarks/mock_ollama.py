@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+Ollama 对话接口的本地模拟
+
+没有真实模型时用于压测和性能对比：
+- MockOllamaClient：进程内客户端，接口与 ollama.Client.chat 相同，可通过 llm.set_client() 注入
+- MockOllamaServer：HTTP 形式的 /api/chat 替身，真实的 ollama.Client(host=...) 可以直接连接
+- 延迟 = 固定开销（可选分布）+ 未命中前缀缓存的提示词token / 提示词处理速度 + 输出token / 生成速度
+- 前缀缓存按最近若干次请求的最长公共前缀估算，用于衡量提示词结构调整的效果
+- 按 format 传入的 JSON Schema 生成评估器可解析的结构化结果（含批量评估的 items），
+  未指定 format 时返回面试问题文本
+- 固定随机种子，相同输入序列得到相同输出和延迟
+
+用法：
+    python -m benchmarks.mock_ollama --port 11435 --tokens-per-sec 40 --base-ms 200
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_interview.llm import estimate_tokens
+
+
+CANNED_QUESTIONS = [
+    "能具体说说这个方案在高并发场景下是如何保证数据一致性的吗？",
+    "当时为什么选择这个技术方案而不是其他替代方案？",
+    "这个优化上线后，核心指标具体提升了多少？是如何度量的？",
+    "如果流量突然增长十倍，现有架构的瓶颈会出现在哪里？",
+    "请介绍一下您在团队中负责的模块以及与其他成员的协作方式。",
+    "遇到的最大技术难点是什么？您是如何定位和解决的？",
+]
+
+CANNED_TEXT = {
+    'overall_comment': "回答结构清晰，能结合实际经历说明，细节还可以更充分。",
+    'improvement_suggestions': "建议补充具体的数据指标和技术取舍的原因。",
+    'technical_highlights': "对缓存和异步处理的使用较为合理。",
+    'feedback': "技术点基本准确，可以进一步说明原理。",
+}
+
+
+class LatencyProfile:
+    """模拟的推理延迟参数"""
+
+    DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal', 'exponential')
+
+    def __init__(self, base_ms: float = 50.0, distribution: str = 'lognormal', sigma: float = 0.25,
+                 tokens_per_sec: float = 40.0, prompt_tokens_per_sec: float = 800.0,
+                 load_ms: float = 0.0):
+        """
+        Args:
+            base_ms: 每次请求的固定开销中位数（毫秒）
+            distribution: 固定开销的分布（fixed/uniform/lognormal/exponential）
+            sigma: lognormal 分布的形状参数
+            tokens_per_sec: 输出token生成速度
+            prompt_tokens_per_sec: 提示词处理速度
+            load_ms: 模型首次加载耗时（keep_alive 为 0 时每次都会重新加载）
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"不支持的延迟分布: {distribution}")
+        self.base_ms = base_ms
+        self.distribution = distribution
+        self.sigma = sigma
+        self.tokens_per_sec = tokens_per_sec
+        self.prompt_tokens_per_sec = prompt_tokens_per_sec
+        self.load_ms = load_ms
+
+    def sample_overhead(self, rng: random.Random) -> float:
+        """采样固定开销（秒）"""
+        if self.base_ms <= 0 or self.distribution == 'fixed':
+            return max(self.base_ms, 0.0) / 1000
+        if self.distribution == 'uniform':
+            return rng.uniform(0.5, 1.5) * self.base_ms / 1000
+        if self.distribution == 'exponential':
+            return rng.expovariate(1000 / self.base_ms)
+        return rng.lognormvariate(math.log(self.base_ms), self.sigma) / 1000
+
+
+class MockOllamaClient:
+    """进程内的模拟客户端，chat() 的参数和返回结构与 ollama.Client.chat 一致"""
+
+    def __init__(self, profile: Optional[LatencyProfile] = None, seed: int = 0,
+                 time_scale: float = 1.0, prefix_cache_slots: int = 4, reasoning_tokens: int = 0):
+        """
+        Args:
+            profile: 延迟参数
+            seed: 随机种子
+            time_scale: 实际等待时间 = 模拟延迟 * time_scale；为0时不等待，只统计
+            prefix_cache_slots: 服务端保留的前缀缓存条数
+            reasoning_tokens: 问题生成回复中附带的 <think> 推理长度（字符数）
+        """
+        self.profile = profile or LatencyProfile()
+        self.time_scale = time_scale
+        self.reasoning_tokens = reasoning_tokens
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._prefix_cache = deque(maxlen=max(prefix_cache_slots, 1))
+        self._loaded_models = set()
+        self.stats = {
+            'calls': 0,
+            'structured_calls': 0,
+            'prompt_tokens': 0,
+            'cached_prompt_tokens': 0,
+            'eval_tokens': 0,
+            'simulated_seconds': 0.0,
+        }
+
+    def chat(self, model: str = '', messages: Optional[List[Dict]] = None, format=None,
+             options: Optional[Dict] = None, keep_alive=None, stream: bool = False, **kwargs) -> Dict:
+        messages = messages or []
+        prompt_text = self._serialize(messages)
+
+        with self._lock:
+            cached_chars = self._cached_prefix(prompt_text)
+            if str(keep_alive) not in ('0', '0s'):
+                self._prefix_cache.append(prompt_text)
+            first_load = model not in self._loaded_models or str(keep_alive) in ('0', '0s')
+            self._loaded_models.add(model)
+
+            content = self._render(messages, format)
+            overhead = self.profile.sample_overhead(self._rng)
+
+        prompt_tokens = estimate_tokens(prompt_text)
+        cached_tokens = estimate_tokens(prompt_text[:cached_chars])
+        eval_tokens = estimate_tokens(content)
+        load_seconds = self.profile.load_ms / 1000 if first_load else 0.0
+        prompt_eval_seconds = (prompt_tokens - cached_tokens) / self.profile.prompt_tokens_per_sec
+        eval_seconds = eval_tokens / self.profile.tokens_per_sec
+        total_seconds = overhead + load_seconds + prompt_eval_seconds + eval_seconds
+
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['structured_calls'] += 1 if format else 0
+            self.stats['prompt_tokens'] += prompt_tokens
+            self.stats['cached_prompt_tokens'] += cached_tokens
+            self.stats['eval_tokens'] += eval_tokens
+            self.stats['simulated_seconds'] += total_seconds
+
+        if self.time_scale > 0:
+            time.sleep(total_seconds * self.time_scale)
+
+        return {
+            'model': model,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'message': {'role': 'assistant', 'content': content},
+            'done': True,
+            'done_reason': 'stop',
+            'total_duration': int(total_seconds * 1e9),
+            'load_duration': int(load_seconds * 1e9),
+            'prompt_eval_count': prompt_tokens - cached_tokens,
+            'prompt_eval_duration': int(prompt_eval_seconds * 1e9),
+            'eval_count': eval_tokens,
+            'eval_duration': int(eval_seconds * 1e9),
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0.0 if key == 'simulated_seconds' else 0
+
+    @staticmethod
+    def _serialize(messages: List[Dict]) -> str:
+        return "".join(f"<|{m.get('role', '')}|>{m.get('content', '')}" for m in messages)
+
+    def _cached_prefix(self, prompt_text: str) -> int:
+        """与最近请求的最长公共前缀（字符数），调用方需持有锁"""
+        longest = 0
+        for previous in self._prefix_cache:
+            longest = max(longest, len(os.path.commonprefix([previous, prompt_text])))
+        return longest
+
+    def _render(self, messages: List[Dict], format) -> str:
+        """生成回复内容，调用方需持有锁"""
+        if isinstance(format, dict):
+            item_count = messages[-1].get('content', '').count('### 第') if messages else 0
+            return json.dumps(self._fake_from_schema(format, max(item_count, 1)), ensure_ascii=False)
+        if format == 'json':
+            return '{}'
+
+        question = self._rng.choice(CANNED_QUESTIONS)
+        if self.reasoning_tokens:
+            return f"<think>{'分析候选人的回答。' * (self.reasoning_tokens // 9 + 1)}</think>\n> {question}"
+        return f"> {question}"
+
+    def _fake_from_schema(self, schema: Dict, item_count: int):
+        """按 JSON Schema 生成结构化结果，调用方需持有锁"""
+        schema_type = schema.get('type')
+        if schema_type == 'object':
+            result = {}
+            for name, sub_schema in schema.get('properties', {}).items():
+                if sub_schema.get('type') == 'string':
+                    result[name] = CANNED_TEXT.get(name, "回答已记录。")
+                else:
+                    result[name] = self._fake_from_schema(sub_schema, item_count)
+            return result
+        if schema_type == 'array':
+            items = []
+            for index in range(item_count):
+                item = self._fake_from_schema(schema.get('items', {}), item_count)
+                if isinstance(item, dict) and 'index' in item:
+                    item['index'] = index + 1
+                items.append(item)
+            return items
+        if schema_type == 'number':
+            low = max(schema.get('minimum', 0), 0.35)
+            high = min(schema.get('maximum', 1), 0.95)
+            return round(self._rng.uniform(low, high), 2)
+        if schema_type == 'integer':
+            return 1
+        if schema_type == 'boolean':
+            return True
+        return "回答已记录。"
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    """/api/chat 等接口的处理器"""
+
+    client = None
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json({'models': [{'name': name, 'model': name} for name in sorted(self.client._loaded_models)]})
+        elif self.path == '/api/version':
+            self._send_json({'version': 'mock'})
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        if self.path != '/api/chat':
+            self._send_json({'error': 'not found'}, status=404)
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json({'error': 'invalid json'}, status=400)
+            return
+
+        response = self.client.chat(
+            model=body.get('model', ''),
+            messages=body.get('messages') or [],
+            format=body.get('format') or None,
+            options=body.get('options'),
+            keep_alive=body.get('keep_alive')
+        )
+
+        # Ollama 的 HTTP 接口默认流式返回
+        if body.get('stream', True):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+            chunk = {'model': response['model'], 'created_at': response['created_at'],
+                     'message': response['message'], 'done': False}
+            final = dict(response, message={'role': 'assistant', 'content': ''})
+            for part in (chunk, final):
+                self.wfile.write((json.dumps(part, ensure_ascii=False) + '\n').encode('utf-8'))
+        else:
+            self._send_json(response)
+
+    def _send_json(self, payload: Dict, status: int = 200):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockOllamaServer:
+    """HTTP 形式的模拟 Ollama 服务"""
+
+    def __init__(self, client: Optional[MockOllamaClient] = None, host: str = '127.0.0.1', port: int = 11435):
+        self.client = client or MockOllamaClient()
+        handler = type('ChatHandler', (_ChatHandler,), {'client': self.client})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockOllamaServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def build_client_from_args(args) -> MockOllamaClient:
+    """根据命令行参数构建模拟客户端（压测脚本共用）"""
+    profile = LatencyProfile(
+        base_ms=args.base_ms,
+        distribution=args.distribution,
+        sigma=args.sigma,
+        tokens_per_sec=args.tokens_per_sec,
+        prompt_tokens_per_sec=args.prompt_tokens_per_sec,
+        load_ms=args.load_ms
+    )
+    return MockOllamaClient(profile, seed=args.seed, time_scale=args.time_scale,
+                            prefix_cache_slots=args.cache_slots, reasoning_tokens=args.reasoning_tokens)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    """模拟延迟相关的命令行参数"""
+    parser.add_argument('--base-ms', type=float, default=50.0, help="每次请求的固定开销中位数（毫秒）")
+    parser.add_argument('--distribution', choices=LatencyProfile.DISTRIBUTIONS, default='lognormal')
+    parser.add_argument('--sigma', type=float, default=0.25, help="lognormal 分布的形状参数")
+    parser.add_argument('--tokens-per-sec', type=float, default=40.0, help="输出token生成速度")
+    parser.add_argument('--prompt-tokens-per-sec', type=float, default=800.0, help="提示词处理速度")
+    parser.add_argument('--load-ms', type=float, default=0.0, help="模型首次加载耗时（毫秒）")
+    parser.add_argument('--time-scale', type=float, default=1.0, help="实际等待 = 模拟延迟 * time_scale，0 表示不等待")
+    parser.add_argument('--cache-slots', type=int, default=4, help="前缀缓存保留的请求数")
+    parser.add_argument('--reasoning-tokens', type=int, default=0, help="问题回复附带的 <think> 长度")
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ollama 对话接口的本地模拟服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    add_mock_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = MockOllamaServer(build_client_from_args(args), host=args.host, port=args.port)
+    print(f"模拟 Ollama 服务已启动: {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.client.stats, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+第三阶段难度策略蒙特卡洛模拟
+
+在不进行真实面试的情况下评估难度与题数策略：大量合成候选人（潜在能力 θ、带噪声的得分模型）
+按向量化方式走完第二阶段→第三阶段的规则：
+- 第二阶段平均分决定第三阶段题数（TechnicalQuestionEngine.QUESTION_LIMITS 范围内增减）和初始难度，
+  简历匹配度参与初始难度
+- AdaptiveDifficultyManager 的阈值阶梯逐题调整 B1/B2/B3；也可模拟 IRT 难度引擎（能力估计达到精度提前结束）
+- 输出每种策略的平均题数、最终定级准确率（与 θ 对应的真实级别比较）和模型调用次数
+
+默认策略的参数直接读取 AdaptiveDifficultyManager 和 TechnicalQuestionEngine 的当前配置；
+--verify 用同一组随机数逐个驱动真实的类，确认向量化实现与代码逻辑一致。
+
+用法：
+    python -m benchmarks.policy_simulator --candidates 1000000
+    python -m benchmarks.policy_simulator --increase 0.7 0.75 0.8 --decrease 0.45 0.5 --base-questions 2 3 --irt
+    python -m benchmarks.policy_simulator --verify 2000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_interview.matching import DIFFICULTY_THRESHOLDS
+from ai_interview.stages.stage3_technical.adaptive_difficulty import AdaptiveDifficultyManager
+from ai_interview.stages.stage3_technical.irt_difficulty import (
+    ABILITY_GRID, LEVEL_DIFFICULTY, MIN_QUESTIONS, PRIOR_STD, TARGET_STANDARD_ERROR
+)
+from ai_interview.stages.stage3_technical.technical_engine import TechnicalQuestionEngine
+
+
+LEVELS = ('B1', 'B2', 'B3')
+LEVEL_B = np.array([LEVEL_DIFFICULTY[level] for level in LEVELS])
+
+# 每批模拟的候选人数（IRT 策略需要 批大小 × 能力网格 的后验矩阵）
+CHUNK_SIZE = 100000
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class CandidateModel:
+    """
+    合成候选人与得分模型
+
+    第三阶段得分 = clip(sigmoid(a(θ - b_级别) + bias) + N(0, noise²), 0, 1)，保留两位小数（与评估器一致）；
+    第二阶段平均分 = clip(sigmoid(aθ + bias) + N(0, stage2_noise²), 0, 1)；
+    简历匹配分 = sigmoid(θ + N(0, match_noise²))。
+    真实级别为 θ 对应的 B1/B2/B3（与 IRT 引擎的级别划分相同）。
+    """
+
+    def __init__(self, discrimination: float = 1.5, bias: float = 0.5, noise: float = 0.12,
+                 stage2_noise: float = 0.08, match_noise: float = 0.8):
+        self.discrimination = discrimination
+        self.bias = bias
+        self.noise = noise
+        self.stage2_noise = stage2_noise
+        self.match_noise = match_noise
+
+    def draw(self, n: int, max_questions: int, rng: np.random.Generator) -> Dict:
+        """一批候选人的全部随机量（各策略共用，比较时只有策略不同）"""
+        return {
+            'theta': rng.standard_normal(n),
+            'stage2_noise': rng.standard_normal(n),
+            'match_noise': rng.standard_normal(n),
+            'answer_noise': rng.standard_normal((n, max_questions))
+        }
+
+    def stage2_scores(self, draws: Dict) -> np.ndarray:
+        mean = _sigmoid(self.discrimination * draws['theta'] + self.bias)
+        return np.round(np.clip(mean + self.stage2_noise * draws['stage2_noise'], 0.0, 1.0), 2)
+
+    def match_scores(self, draws: Dict) -> np.ndarray:
+        return _sigmoid(draws['theta'] + self.match_noise * draws['match_noise'])
+
+    def answer_scores(self, theta: np.ndarray, levels: np.ndarray, noise: np.ndarray) -> np.ndarray:
+        mean = _sigmoid(self.discrimination * (theta - LEVEL_B[levels]) + self.bias)
+        return np.round(np.clip(mean + self.noise * noise, 0.0, 1.0), 2)
+
+    def true_levels(self, theta: np.ndarray) -> np.ndarray:
+        return np.abs(theta[:, None] - LEVEL_B[None, :]).argmin(axis=1)
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+class Policy:
+    """难度与题数策略"""
+
+    def __init__(self, name: str, increase: float, decrease: float,
+                 stage2_strong: float, stage2_weak: float, base_questions: int = 3,
+                 question_limits=(2, 5), resume_match: bool = True, irt: bool = False,
+                 target_standard_error: float = TARGET_STANDARD_ERROR, min_questions: int = MIN_QUESTIONS):
+        self.name = name
+        self.increase = increase
+        self.decrease = decrease
+        self.stage2_strong = stage2_strong
+        self.stage2_weak = stage2_weak
+        self.base_questions = base_questions
+        self.question_limits = tuple(question_limits)
+        self.resume_match = resume_match
+        self.irt = irt
+        self.target_standard_error = target_standard_error
+        self.min_questions = min_questions
+
+    @classmethod
+    def current(cls, **overrides) -> 'Policy':
+        """当前代码中的配置"""
+        thresholds = AdaptiveDifficultyManager().adjustment_thresholds
+        params = {
+            'name': 'current',
+            'increase': thresholds['increase'],
+            'decrease': thresholds['decrease'],
+            'stage2_strong': TechnicalQuestionEngine.STAGE2_STRONG_SCORE,
+            'stage2_weak': TechnicalQuestionEngine.STAGE2_WEAK_SCORE,
+            'question_limits': TechnicalQuestionEngine.QUESTION_LIMITS
+        }
+        params.update(overrides)
+        return cls(**params)
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+def _match_levels(match_scores: np.ndarray) -> np.ndarray:
+    """简历匹配分 → 初始难度（matching.difficulty_for_score 的向量化版本）"""
+    levels = np.zeros(len(match_scores), dtype=np.int64)
+    for difficulty, threshold in reversed(DIFFICULTY_THRESHOLDS):
+        levels[match_scores >= threshold] = LEVELS.index(difficulty)
+    return levels
+
+
+def _stage3_setup(policy: Policy, model: CandidateModel, draws: Dict):
+    """第二阶段→第三阶段规则：每位候选人的题数上限与初始难度"""
+    n = len(draws['theta'])
+    stage2 = model.stage2_scores(draws)
+    if policy.resume_match:
+        match = _match_levels(model.match_scores(draws))
+    else:
+        match = np.full(n, LEVELS.index('B2'))
+    strong = stage2 >= policy.stage2_strong
+    weak = ~strong & (stage2 < policy.stage2_weak)
+
+    min_questions, max_questions = policy.question_limits
+    question_limit = np.full(n, policy.base_questions)
+    question_limit[strong] = min(max_questions, policy.base_questions + 1)
+    question_limit[weak] = max(min_questions, policy.base_questions - 1)
+
+    start = match.copy()
+    start[strong] = np.where(match[strong] == 2, 2, 1)
+    start[weak] = 0
+    return question_limit, start
+
+
+def simulate_ladder(policy: Policy, model: CandidateModel, draws: Dict) -> Dict:
+    """阈值阶梯：得分 >= increase 升一级，< decrease 降一级"""
+    theta = draws['theta']
+    question_limit, level = _stage3_setup(policy, model, draws)
+    for index in range(int(question_limit.max())):
+        active = index < question_limit
+        scores = model.answer_scores(theta, level, draws['answer_noise'][:, index])
+        up = active & (scores >= policy.increase)
+        down = active & ~up & (scores < policy.decrease)
+        level = np.clip(level + up - down, 0, 2)
+    return {'questions': question_limit, 'final_level': level}
+
+
+def simulate_irt(policy: Policy, model: CandidateModel, draws: Dict) -> Dict:
+    """
+    IRT 难度引擎：网格后验更新能力估计，选信息量最大的级别，达到精度提前结束
+
+    题目参数取与得分模型一致的级别参数（相当于标定充分），结果是 IRT 策略的上限。
+    """
+    theta = draws['theta']
+    n = len(theta)
+    question_limit, start = _stage3_setup(policy, model, draws)
+    a = model.discrimination
+    item_b = LEVEL_B - model.bias / a
+    grid = ABILITY_GRID.astype(np.float32)
+    expected = _sigmoid(a * (grid[None, :] - item_b[:, None])).astype(np.float32)      # (级别, 网格)
+
+    log_posterior = -0.5 * ((grid[None, :] - LEVEL_B[start][:, None].astype(np.float32)) / PRIOR_STD) ** 2
+    questions = np.zeros(n, dtype=np.int64)
+    ability = np.zeros(n)
+    remaining = np.arange(n)
+    for index in range(int(question_limit.max()) + 1):
+        # 只计算仍在作答的候选人
+        weights = log_posterior[remaining]
+        weights = np.exp(weights - weights.max(axis=1, keepdims=True))
+        weights /= weights.sum(axis=1, keepdims=True)
+        mean = weights @ grid
+        ability[remaining] = mean
+        standard_error = np.sqrt(np.einsum('ij,ij->i', weights, (grid[None, :] - mean[:, None]) ** 2))
+        converged = (questions[remaining] >= policy.min_questions) & (standard_error <= policy.target_standard_error)
+        remaining = remaining[(index < question_limit[remaining]) & ~converged]
+        if not len(remaining):
+            break
+
+        # 各级别区分度相同，信息量最大的级别即难度最接近能力估计的级别
+        level = np.abs(ability[remaining, None] - item_b[None, :]).argmin(axis=1)
+        scores = model.answer_scores(theta[remaining], level, draws['answer_noise'][remaining, index])
+        log_posterior[remaining] -= 0.5 * ((scores[:, None].astype(np.float32) - expected[level]) / model.noise) ** 2
+        questions[remaining] += 1
+
+    final_level = np.abs(ability[:, None] - LEVEL_B[None, :]).argmin(axis=1)
+    return {'questions': questions, 'final_level': final_level}
+
+
+def run_policy(policy: Policy, model: CandidateModel, candidates: int, seed: int = 0,
+               calls_per_question: float = 1.0) -> Dict:
+    """
+    模拟一种策略
+
+    Args:
+        candidates: 合成候选人数
+        seed: 随机种子（各策略使用相同的种子，候选人和噪声完全相同）
+        calls_per_question: 每题的模型调用次数（题库出题时只有评估调用，为 1）
+    """
+    rng = np.random.default_rng(seed)
+    max_questions = policy.question_limits[1]
+    simulate = simulate_irt if policy.irt else simulate_ladder
+    started = time.perf_counter()
+
+    question_counts = np.zeros(max_questions + 1, dtype=np.int64)
+    confusion = np.zeros((3, 3), dtype=np.int64)
+    for offset in range(0, candidates, CHUNK_SIZE):
+        draws = model.draw(min(CHUNK_SIZE, candidates - offset), max_questions, rng)
+        result = simulate(policy, model, draws)
+        question_counts += np.bincount(result['questions'], minlength=max_questions + 1)
+        np.add.at(confusion, (model.true_levels(draws['theta']), result['final_level']), 1)
+
+    total = max(candidates, 1)
+    mean_questions = float(np.dot(np.arange(max_questions + 1), question_counts)) / total
+    level_error = np.abs(np.arange(3)[:, None] - np.arange(3)[None, :])
+    return {
+        'policy': policy.to_dict(),
+        'candidates': candidates,
+        'mean_questions': round(mean_questions, 4),
+        'question_distribution': {
+            str(count): round(int(number) / total, 4) for count, number in enumerate(question_counts) if number
+        },
+        'final_level_accuracy': round(float(np.trace(confusion)) / total, 4),
+        'within_one_level': round(float(confusion[level_error <= 1].sum()) / total, 4),
+        'confusion': {
+            true_level: dict(zip(LEVELS, confusion[index].tolist())) for index, true_level in enumerate(LEVELS)
+        },
+        'llm_calls_per_interview': round(mean_questions * calls_per_question, 4),
+        'elapsed_seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def verify(policy: Policy, model: CandidateModel, candidates: int = 2000, seed: int = 0) -> Dict:
+    """用同一组随机数逐个驱动 AdaptiveDifficultyManager 和第二阶段规则，与向量化结果比较"""
+    from ai_interview.matching import difficulty_for_score
+
+    rng = np.random.default_rng(seed)
+    draws = model.draw(candidates, policy.question_limits[1], rng)
+    vectorized = simulate_ladder(policy, model, draws)
+    stage2 = model.stage2_scores(draws)
+    match = model.match_scores(draws)
+
+    mismatches = 0
+    for index in range(candidates):
+        # 只使用第二阶段规则和难度管理器，不加载题库
+        engine = TechnicalQuestionEngine.__new__(TechnicalQuestionEngine)
+        engine.difficulty_manager = AdaptiveDifficultyManager()
+        engine.difficulty_manager.adjustment_thresholds.update(increase=policy.increase, decrease=policy.decrease)
+        engine.max_questions = policy.base_questions
+        engine.STAGE2_STRONG_SCORE = policy.stage2_strong
+        engine.STAGE2_WEAK_SCORE = policy.stage2_weak
+        engine.QUESTION_LIMITS = policy.question_limits
+        engine.resume_match = (
+            {'starting_difficulty': difficulty_for_score(float(match[index]))} if policy.resume_match else None
+        )
+        engine._adjust_based_on_stage2({'average_score': float(stage2[index])})
+
+        manager = engine.difficulty_manager
+        theta = draws['theta'][index:index + 1]
+        for question in range(engine.max_questions):
+            level = np.array([LEVELS.index(manager.get_current_difficulty())])
+            score = model.answer_scores(theta, level, draws['answer_noise'][index:index + 1, question])[0]
+            manager.adjust_difficulty(float(score))
+
+        if (engine.max_questions != vectorized['questions'][index]
+                or LEVELS.index(manager.get_current_difficulty()) != vectorized['final_level'][index]):
+            mismatches += 1
+    return {'candidates': candidates, 'mismatches': mismatches}
+
+
+def build_policies(args) -> List[Policy]:
+    base = Policy.current()
+    policies = []
+    for increase, decrease, base_questions in itertools.product(
+            args.increase or [base.increase], args.decrease or [base.decrease],
+            args.base_questions or [base.base_questions]):
+        if decrease >= increase:
+            continue
+        name = 'current' if (increase, decrease, base_questions) == (
+            base.increase, base.decrease, base.base_questions) else f'ladder({increase}/{decrease}, {base_questions}题)'
+        policies.append(Policy.current(name=name, increase=increase, decrease=decrease,
+                                       base_questions=base_questions, resume_match=not args.no_resume_match))
+    if args.irt:
+        for base_questions in args.base_questions or [base.base_questions]:
+            policies.append(Policy.current(name=f'irt({base_questions}题上限)', base_questions=base_questions,
+                                           resume_match=not args.no_resume_match, irt=True))
+    return policies
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="第三阶段难度与题数策略的蒙特卡洛模拟")
+    parser.add_argument('--candidates', type=int, default=1000000, help="合成候选人数")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--increase', type=float, nargs='+', help="升级阈值（可给多个，组合比较）")
+    parser.add_argument('--decrease', type=float, nargs='+', help="降级阈值（可给多个）")
+    parser.add_argument('--base-questions', type=int, nargs='+', help="第三阶段默认题数（可给多个）")
+    parser.add_argument('--irt', action='store_true', help="同时模拟 IRT 难度引擎")
+    parser.add_argument('--no-resume-match', action='store_true', help="初始难度不参考简历匹配度")
+    parser.add_argument('--calls-per-question', type=float, default=1.0, help="每题的模型调用次数")
+    parser.add_argument('--discrimination', type=float, default=1.5, help="得分模型区分度")
+    parser.add_argument('--bias', type=float, default=0.5, help="得分模型偏置（能力等于题目难度时的 logit）")
+    parser.add_argument('--noise', type=float, default=0.12, help="第三阶段得分噪声标准差")
+    parser.add_argument('--verify', type=int, metavar='N', help="用 N 个候选人逐个驱动真实的类进行核对")
+    parser.add_argument('--output', help="结果输出路径（JSON），缺省打印到标准输出")
+    args = parser.parse_args(argv)
+
+    model = CandidateModel(discrimination=args.discrimination, bias=args.bias, noise=args.noise)
+    policies = build_policies(args)
+
+    if args.verify:
+        report = {policy.name: verify(policy, model, args.verify, args.seed) for policy in policies if not policy.irt}
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 1 if any(result['mismatches'] for result in report.values()) else 0
+
+    results = [run_policy(policy, model, args.candidates, args.seed, args.calls_per_question)
+               for policy in policies]
+    report = {'model': model.to_dict(), 'results': results}
+
+    print(f"{'策略':<28}{'平均题数':>10}{'定级准确率':>12}{'相差≤1级':>10}{'模型调用/场':>12}")
+    for result in results:
+        print(f"{result['policy']['name']:<30}{result['mean_questions']:>10.3f}{result['final_level_accuracy']:>14.4f}"
+              f"{result['within_one_level']:>12.4f}{result['llm_calls_per_interview']:>12.3f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())